@@ -0,0 +1,33 @@
+# src/audio.py
+"""Sonidos con inicializacion diferida del mezclador.
+
+Abrir el dispositivo de audio es de lo mas lento del arranque, asi que el
+mezclador se inicializa en un hilo despues de que aparece la ventana; hasta
+entonces ``play`` no hace nada.
+"""
+import threading
+
+import pygame
+
+
+class LazySound:
+    def __init__(self, path):
+        self.path = path
+        self.sound = None
+        self._thread = None
+
+    def load(self):
+        try:
+            if not pygame.mixer.get_init(): pygame.mixer.init()
+            self.sound = pygame.mixer.Sound(self.path)
+        except (pygame.error, FileNotFoundError):
+            self.sound = None
+        return self.sound
+
+    def load_in_background(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.load, name="audio-init", daemon=True)
+            self._thread.start()
+
+    def play(self):
+        if self.sound is not None: self.sound.play()
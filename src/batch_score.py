@@ -0,0 +1,254 @@
+# src/batch_score.py
+"""Re-puntuacion por lotes de sesiones grabadas, en paralelo y sin ventana.
+
+    python -m src.batch_score recordings/ [--output puntuaciones.csv] [--workers N] [--exact] [--coverage F]
+
+Cada grabacion (``.cgs``) reconstruye su palabra con el layout de la
+cabecera a partir del atlas de glifos, publicado una sola vez en memoria
+compartida (``src.shared_pool``) para todos los procesos del pool.
+
+La puntuacion no depende del orden de los pasos: una pieza se completa si
+algun trazo con click la toca (con regla de cobertura, si los pasos con
+click que la tocan pintan la fraccion pedida), y la precision es la
+fraccion de ticks con click cuyo puntero cae dentro de alguna pieza (los
+ticks sin entrada nueva repiten la ultima posicion, como en
+``src.replay``). Asi cada sesion se
+evalua con consultas en lote de NumPy: todos sus segmentos contra cada
+pieza (su contorno en el mundo) con el recorte de ``segments_hit_convex``,
+la misma regla de borde cerrado que la partida. Sin NumPy, o con
+``--exact``, se reproduce paso a paso con ``Simulation``; los dos modos dan
+el mismo progreso y la misma precision.
+
+``--coverage`` re-puntua con otra fraccion de cobertura en lugar de la
+grabada (0 = basta tocar la pieza).
+
+La salida es un CSV (o JSON Lines si la ruta termina en ``.jsonl``) con
+una fila por sesion; el resumen va a stderr.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy es opcional
+    np = None
+
+from src.coverage import cell_centers, paint_mask
+from src.game_entities import VALID_AREA_OFFSET
+from src.query_engine import segments_hit_convex
+from src.session import build_goal, coverage_rule, read_session
+
+FIELDS = ("path", "text", "mode", "coverage", "ticks", "pieces", "completed_pieces", "progress",
+          "click_samples", "valid_samples", "precision", "completed", "method", "ms")
+
+_atlas = None
+
+
+def _init_worker(pool_name):
+    global _atlas
+    from src.shared_pool import SharedGlyphPool
+
+    _atlas = SharedGlyphPool.attach(pool_name)
+
+
+# --- entrada de la sesion ------------------------------------------------------
+
+def session_samples(steps):
+    """Segmentos con click, paso al que pertenece cada uno y muestras de
+    precision ``(x, y, ticks)`` de una grabacion.
+
+    Sigue la misma regla de ticks que ``replay_steps``: los ticks sin
+    registro repiten la ultima entrada.
+    """
+    segments, segment_steps, samples = [], [], []
+    polyline, is_clicking = None, False
+    tick = 0
+
+    def repeat(count):
+        if count > 0 and polyline and is_clicking:
+            x, y = polyline[-1]
+            samples.append((x, y, count))
+
+    for step_tick, _, clicking, points in steps:
+        if step_tick <= tick: continue
+        if points:
+            repeat(step_tick - tick - 1)
+            polyline, is_clicking = points, clicking
+            if is_clicking:
+                if len(points) == 1: segments.append((points[0], points[0]))
+                else: segments.extend(zip(points, points[1:]))
+                segment_steps.extend([step_tick] * (len(segments) - len(segment_steps)))
+            repeat(1)
+        else:
+            # Marca de fin: paso sin entrada nueva
+            repeat(step_tick - tick)
+        tick = step_tick
+    return segments, segment_steps, samples, tick
+
+
+def scene_pieces(goal, atlas):
+    """Contorno en coordenadas de mundo de cada pieza, en el orden de ``first_piece``."""
+    pieces = []
+    for letter in goal.polygons:
+        # Misma colocacion que ``LetterGoal.build``: piezas unitarias mas el ``Affine`` de la letra
+        placement = letter.placement()
+        for piece in atlas.unit_glyph(letter.char):
+            pieces.append([placement.apply(v) for v in piece.vertices])
+    return pieces
+
+
+# --- consultas en lote ---------------------------------------------------------
+
+def _overlapping(polygon, lo, hi):
+    """Indices de las cajas ``[lo, hi]`` que tocan la caja del poligono."""
+    xs = [p[0] for p in polygon]
+    ys = [p[1] for p in polygon]
+    mask = ((lo[:, 0] <= max(xs)) & (hi[:, 0] >= min(xs)) & (lo[:, 1] <= max(ys)) & (hi[:, 1] >= min(ys)))
+    return np.nonzero(mask)[0]
+
+
+def _piece_completed(polygon, starts, ends, lo, hi, step_ids, rule):
+    candidates = _overlapping(polygon, lo, hi)
+    if not len(candidates): return False
+    hits = segments_hit_convex(polygon, starts[candidates], ends[candidates])
+    if rule is None: return bool(hits.any())
+    # Como en ``PixelGoal``: pinta toda la polilinea de cada paso que toca la pieza
+    painting = np.isin(step_ids, step_ids[candidates[hits]])
+    if not painting.any(): return False
+    centers = np.asarray(cell_centers(polygon, rule.resolution), dtype=float)
+    covered = paint_mask(centers, starts[painting], ends[painting], rule.brush_radius)
+    return bool(covered.mean() >= rule.threshold)
+
+
+def score_vectorized(header, steps, atlas):
+    goal = build_goal(header, background_build=False, atlas=atlas)
+    pieces = scene_pieces(goal, atlas)
+    rule = coverage_rule(header)
+    segments, segment_steps, samples, ticks = session_samples(steps)
+    completed = 0
+    if segments:
+        seg = np.asarray(segments, dtype=float)
+        starts, ends = seg[:, 0], seg[:, 1]
+        lo, hi = np.minimum(starts, ends), np.maximum(starts, ends)
+        step_ids = np.asarray(segment_steps)
+        completed = sum(_piece_completed(polygon, starts, ends, lo, hi, step_ids, rule) for polygon in pieces)
+    click_samples = valid_samples = 0
+    if samples:
+        data = np.asarray(samples, dtype=float)
+        starts = data[:, :2]
+        ends = starts + VALID_AREA_OFFSET
+        weights = data[:, 2]
+        inside = np.zeros(len(data), dtype=bool)
+        for polygon in pieces:
+            candidates = _overlapping(polygon, starts, ends)
+            candidates = candidates[~inside[candidates]]
+            if len(candidates):
+                inside[candidates] |= segments_hit_convex(polygon, starts[candidates], ends[candidates])
+        click_samples = int(weights.sum())
+        valid_samples = int(weights[inside].sum())
+    total = len(pieces)
+    return {
+        "ticks": ticks, "pieces": total, "completed_pieces": completed,
+        "progress": completed / total * 100 if total else 0,
+        "click_samples": click_samples, "valid_samples": valid_samples,
+        "precision": valid_samples / click_samples * 100 if click_samples else 100,
+        "completed": completed == total,
+    }
+
+
+def score_exact(path, atlas, coverage=None):
+    from src.replay import replay
+
+    result = replay(path, atlas=atlas, coverage=coverage)
+    return {
+        "ticks": result["ticks"], "pieces": None, "completed_pieces": None,
+        "progress": result["progress"], "click_samples": None, "valid_samples": None,
+        "precision": result["precision"], "completed": result["completed"],
+    }
+
+
+def score_session(path, exact=False, coverage=None, atlas=None):
+    atlas = atlas or _atlas
+    start = time.perf_counter()
+    try:
+        header, steps = read_session(path)
+        if coverage is not None: header = replace(header, coverage=coverage)
+        if exact or np is None:
+            row, method = score_exact(path, atlas, header.coverage), "exact"
+        else:
+            row, method = score_vectorized(header, steps, atlas), "vectorized"
+    except (OSError, ValueError) as error:
+        return {"path": path, "error": str(error)}
+    return {"path": path, "text": header.text, "mode": header.mode, "coverage": header.coverage, **row,
+            "method": method, "ms": (time.perf_counter() - start) * 1000}
+
+
+# --- ejecucion --------------------------------------------------------------------
+
+def find_recordings(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.endswith(".cgs"))
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def score_all(paths, workers=None, exact=False, coverage=None):
+    """Puntua en un pool de procesos que comparten el atlas; devuelve las filas en orden."""
+    from src.shared_pool import SharedGlyphPool
+
+    files = find_recordings(paths)
+    if not files: return []
+    workers = workers or os.cpu_count() or 1
+    with SharedGlyphPool.publish() as pool:
+        if workers == 1:
+            return [score_session(path, exact, coverage, pool) for path in files]
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(pool.name,)) as executor:
+            chunksize = max(1, len(files) // (workers * 8))
+            return list(executor.map(score_session, files, [exact] * len(files), [coverage] * len(files),
+                                     chunksize=chunksize))
+
+
+def write_rows(rows, output):
+    if output.endswith(".jsonl"):
+        with open(output, "w", encoding="utf-8") as handle:
+            for row in rows:
+                handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return
+    with open(output, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDS + ("error",), extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-puntua sesiones grabadas en paralelo")
+    parser.add_argument("paths", nargs="+", help="grabaciones .cgs o carpetas que las contienen")
+    parser.add_argument("--output", default="puntuaciones.csv", help="CSV o .jsonl de salida")
+    parser.add_argument("--workers", type=int, help="procesos (por defecto uno por nucleo)")
+    parser.add_argument("--exact", action="store_true", help="reproduce paso a paso con Simulation")
+    parser.add_argument("--coverage", type=float, help="fraccion de cobertura para completar (0 = tocar)")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    rows = score_all(args.paths, args.workers, args.exact, args.coverage)
+    write_rows(rows, args.output)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for row in rows if "error" in row)
+    print(f"{len(rows)} sesiones ({errors} con error) en {elapsed:.1f} s -> {args.output}", file=sys.stderr)
+    for row in rows:
+        if "error" in row: print(f"  {row['path']}: {row['error']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
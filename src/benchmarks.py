@@ -0,0 +1,344 @@
+# src/benchmarks.py
+"""Suite de benchmarks con salida legible por maquina.
+
+    python -m src.benchmarks [--quick] [--output resultados.json] [--recording sesion.cgs]
+
+Suites:
+
+- ``build``: ``DKHierarchy.build`` sobre poligonos convexos aleatorios y
+  politopos convexos (esferas trianguladas) de varios tamanos: tiempo y
+  memoria retenida por la jerarquia.
+- ``query``: latencia de ``intersects_segment`` frente a la fuerza bruta
+  ``segment_hits_convex`` sobre el mismo poligono (y si coinciden).
+- ``dynamic``: borrar y reinsertar vertices con ``DynamicPolygonHierarchy``
+  (reparacion local) frente a reconstruir la jerarquia entera.
+- ``word``: construccion de ``WordGoal`` y rendimiento de ``update`` para
+  palabras de 1 a 1000 caracteres.
+- ``replay``: reproduccion de una sesion grabada (o de un trazo sintetico).
+
+El resultado es un documento JSON con el entorno y una fila por caso; un
+resumen legible va a stderr.
+"""
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.dk_hierarchy import DKHierarchy, Polyhedron, hierarchy_from_convex_polygon
+from src.dynamic_hierarchy import DynamicPolygonHierarchy
+from src.geometry import segment_hits_convex
+
+SEED = 1234
+SUITES = ("build", "query", "dynamic", "word", "replay")
+
+
+def _timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _summary_ms(times):
+    return {
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "repeat": len(times),
+    }
+
+
+def _retained_bytes(fn):
+    """Bytes que siguen vivos tras ``fn()`` mientras se conserva su resultado."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+# --- generadores ---------------------------------------------------------------
+
+def random_convex_polygon(n, rng, radius=100.0):
+    """``n`` vertices en un circulo con angulos aleatorios (CCW, estrictamente convexo)."""
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(n))
+    return [(radius * math.cos(a), radius * math.sin(a)) for a in angles]
+
+
+def sphere_polytope(rings, segments):
+    """Esfera UV triangulada: politopo convexo con ``rings * segments + 2`` vertices."""
+    vertices = [(0.0, 0.0, 1.0)]
+    for r in range(1, rings + 1):
+        phi = math.pi * r / (rings + 1)
+        for s in range(segments):
+            theta = 2 * math.pi * s / segments
+            vertices.append((math.sin(phi) * math.cos(theta), math.sin(phi) * math.sin(theta), math.cos(phi)))
+    vertices.append((0.0, 0.0, -1.0))
+    south = len(vertices) - 1
+    faces = []
+    ring = lambda r, s: 1 + r * segments + s % segments
+    for s in range(segments):
+        faces.append((0, ring(0, s), ring(0, s + 1)))
+        faces.append((south, ring(rings - 1, s + 1), ring(rings - 1, s)))
+    for r in range(rings - 1):
+        for s in range(segments):
+            a, b = ring(r, s), ring(r, s + 1)
+            c, d = ring(r + 1, s), ring(r + 1, s + 1)
+            faces.append((a, c, b))
+            faces.append((b, c, d))
+    return Polyhedron(vertices, faces)
+
+
+def random_segments(count, rng, extent=150.0):
+    return [
+        ((rng.uniform(-extent, extent), rng.uniform(-extent, extent)),
+         (rng.uniform(-extent, extent), rng.uniform(-extent, extent)))
+        for _ in range(count)
+    ]
+
+
+# --- suites ------------------------------------------------------------------------
+
+def bench_build(sizes, repeat):
+    rng = random.Random(SEED)
+    rows = []
+    for n in sizes:
+        polygon = random_convex_polygon(n, rng)
+        times, hierarchy = _timed(lambda: hierarchy_from_convex_polygon(polygon), repeat)
+        rows.append({
+            "suite": "build", "case": "convex_polygon", "vertices": n,
+            "levels": len(hierarchy.levels),
+            "retained_bytes": _retained_bytes(lambda: hierarchy_from_convex_polygon(polygon)),
+            **_summary_ms(times),
+        })
+    for n in sizes:
+        rings = max(1, int(math.sqrt(n / 2)))
+        segments = max(3, (n - 2) // rings)
+        polytope = sphere_polytope(rings, segments)
+        times, hierarchy = _timed(lambda: DKHierarchy.build(polytope), repeat)
+        rows.append({
+            "suite": "build", "case": "sphere_polytope", "vertices": polytope.num_vertices,
+            "levels": len(hierarchy.levels),
+            "retained_bytes": _retained_bytes(lambda: DKHierarchy.build(polytope)),
+            **_summary_ms(times),
+        })
+    return rows
+
+
+def bench_query(sizes, queries):
+    rng = random.Random(SEED + 1)
+    rows = []
+    for n in sizes:
+        polygon = random_convex_polygon(n, rng)
+        hierarchy = hierarchy_from_convex_polygon(polygon)
+        segments = random_segments(queries, rng)
+        start = time.perf_counter()
+        dk_hits = [hierarchy.intersects_segment(a, b) for a, b in segments]
+        dk_time = time.perf_counter() - start
+        start = time.perf_counter()
+        brute_hits = [segment_hits_convex(a, b, polygon) for a, b in segments]
+        brute_time = time.perf_counter() - start
+        rows.append({
+            "suite": "query", "case": "segment_vs_convex_polygon", "vertices": n, "queries": queries,
+            "dk_us": dk_time / queries * 1e6,
+            "brute_force_us": brute_time / queries * 1e6,
+            "speedup": brute_time / dk_time if dk_time > 0 else None,
+            "hit_rate": sum(brute_hits) / queries,
+            "mismatches": sum(1 for x, y in zip(dk_hits, brute_hits) if x != y),
+        })
+    return rows
+
+
+def bench_dynamic(sizes, edits):
+    """Mueve vertices al punto medio de su arco (borrar + insertar) y compara con reconstruir."""
+    rng = random.Random(SEED + 3)
+    rows = []
+    for n in sizes:
+        angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(n))
+        point = lambda a: (100.0 * math.cos(a), 100.0 * math.sin(a))
+        hierarchy = DynamicPolygonHierarchy([point(a) for a in angles])
+        rebuild_times, _ = _timed(lambda: hierarchy_from_convex_polygon([point(a) for a in angles]), 3)
+        times = []
+        for _ in range(edits):
+            i = rng.randrange(1, len(angles))
+            middle = (angles[i - 1] + angles[i]) / 2
+            start = time.perf_counter()
+            hierarchy.delete_vertex(i)
+            hierarchy.insert_vertex(i, point(middle))
+            times.append(time.perf_counter() - start)
+            angles[i] = middle
+        polygon = list(hierarchy.polygon)
+        segments = random_segments(500, rng)
+        rows.append({
+            "suite": "dynamic", "case": "move_vertex", "vertices": n, "edits": edits,
+            "edit_us": statistics.median(times) * 1e6 / 2,
+            "rebuild_ms": statistics.median(rebuild_times) * 1000,
+            "builds": hierarchy.builds,
+            "levels": len(hierarchy.levels),
+            "mismatches": sum(1 for a, b in segments if hierarchy.intersects_segment(a, b) != segment_hits_convex(a, b, polygon)),
+        })
+    return rows
+
+
+def _word(length, rng):
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return "".join(rng.choice(letters) for _ in range(length))
+
+
+def bench_word(lengths, updates, repeat, screen_width=1280, screen_height=720):
+    from src.game_entities import WordGoal
+
+    rng = random.Random(SEED + 2)
+    rows = []
+    for length in lengths:
+        word = _word(length, rng)
+        start_y = screen_height // 2 - 50
+
+        def construct():
+            goal = WordGoal(word, start_y=start_y, screen_width=screen_width, scale=80, background_build=False)
+            goal.set_view(0, screen_width)
+            return goal
+
+        times, goal = _timed(construct, repeat)
+        # Trazos dentro de la ventana de camara recorriendo toda la palabra
+        camera_step = max(1, int(goal.total_width - screen_width) // max(1, updates)) if goal.total_width > screen_width else 0
+        strokes = []
+        for i in range(updates):
+            camera_x = min(i * camera_step, max(0, goal.total_width - screen_width))
+            a = (camera_x + rng.uniform(0, screen_width), rng.uniform(start_y - 40, start_y + 120))
+            b = (a[0] + rng.uniform(-30, 30), a[1] + rng.uniform(-30, 30))
+            strokes.append((camera_x, a, b))
+        start = time.perf_counter()
+        for camera_x, a, b in strokes:
+            goal.set_view(camera_x, screen_width)
+            goal.update(a, b, True)
+        update_time = time.perf_counter() - start
+        rows.append({
+            "suite": "word", "case": "word_goal", "characters": length, "pieces": goal.total_pieces,
+            "construct": _summary_ms(times),
+            "updates": updates,
+            "update_us": update_time / updates * 1e6,
+            "updates_per_second": updates / update_time if update_time > 0 else None,
+            "progress": goal.get_progress(),
+        })
+    return rows
+
+
+def synthetic_recording(path, text="CONVEXGLYPH", ticks=600, screen_width=1280, screen_height=720):
+    """Graba un trazo sintetico (zigzag sobre la palabra) para reproducirlo."""
+    from dataclasses import replace
+
+    from src.session import SessionRecorder, goal_layout, synthetic_stroke
+
+    header = replace(goal_layout(text, screen_width, screen_height), created=0.0, font=None)
+    recorder = SessionRecorder(path, header)
+    last = None
+    for tick, point in enumerate(synthetic_stroke(header, ticks), start=1):
+        polyline = [last, point] if last else [point]
+        recorder.record(tick, polyline, True)
+        last = point
+    recorder.close(ticks)
+    return path
+
+
+def bench_replay(recording, repeat):
+    from src.replay import replay
+
+    rows = []
+    results = [replay(recording) for _ in range(repeat)]
+    times = [r["wall_ms"] / 1000 for r in results]
+    last = results[-1]
+    rows.append({
+        "suite": "replay", "case": os.path.basename(recording), "text": last["text"][:40],
+        "ticks": last["ticks"], "progress": last["progress"], "precision": last["precision"],
+        "ticks_per_second": last["ticks"] / statistics.median(times),
+        "phases": last["phases"],
+        **_summary_ms(times),
+    })
+    return rows
+
+
+# --- ejecucion ------------------------------------------------------------------------
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(quick=False, recording=None, suites=SUITES):
+    if quick:
+        sizes, lengths, repeat, queries, updates = [8, 32, 64], [1, 10, 100], 2, 500, 200
+    else:
+        sizes, lengths, repeat, queries, updates = [8, 32, 128, 256], [1, 10, 100, 1000], 5, 5000, 2000
+    rows = []
+    if "build" in suites: rows += bench_build(sizes, repeat)
+    if "query" in suites: rows += bench_query(sizes, queries)
+    if "dynamic" in suites: rows += bench_dynamic(sizes, updates // 4)
+    if "word" in suites: rows += bench_word(lengths, updates, repeat)
+    if "replay" in suites:
+        if recording:
+            rows += bench_replay(recording, repeat)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                rows += bench_replay(synthetic_recording(os.path.join(tmp, "synthetic.cgs")), repeat)
+    return {"environment": environment(), "quick": quick, "results": rows}
+
+
+def _print_summary(report, stream):
+    for row in report["results"]:
+        suite = row["suite"]
+        if suite == "build":
+            line = f"{row['case']:<17} n={row['vertices']:<5} {row['median_ms']:9.2f} ms  {row['retained_bytes'] / 1024:8.1f} KiB  {row['levels']} niveles"
+        elif suite == "query":
+            line = f"query             n={row['vertices']:<5} DK {row['dk_us']:7.1f} us  fuerza bruta {row['brute_force_us']:7.1f} us  discrepancias {row['mismatches']}"
+        elif suite == "dynamic":
+            line = f"dynamic           n={row['vertices']:<5} editar {row['edit_us']:7.1f} us  reconstruir {row['rebuild_ms']:7.2f} ms  discrepancias {row['mismatches']}"
+        elif suite == "word":
+            line = f"word              {row['characters']:>5} chars  construir {row['construct']['median_ms']:8.2f} ms  update {row['update_us']:8.1f} us"
+        else:
+            line = f"replay            {row['ticks']} pasos  {row['ticks_per_second']:.0f} pasos/s"
+        print(line, file=stream)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks de jerarquias DK, consultas y escena completa")
+    parser.add_argument("--quick", action="store_true", help="tamanos pequenos (comprobacion rapida)")
+    parser.add_argument("--output", help="fichero JSON de salida (por defecto stdout)")
+    parser.add_argument("--recording", help="sesion grabada para la suite replay (por defecto un trazo sintetico)")
+    parser.add_argument("--suite", action="append", choices=list(SUITES),
+                        help="suites a ejecutar (repetible; por defecto todas)")
+    args = parser.parse_args(argv)
+    report = run(args.quick, args.recording, tuple(args.suite) if args.suite else SUITES)
+    _print_summary(report, sys.stderr)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
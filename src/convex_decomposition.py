@@ -0,0 +1,246 @@
+"""Triangulation and Hertel-Mehlhorn convex decomposition of glyph outlines.
+
+Outlines are lists of closed contours (no repeated closing point). Holes are
+detected by nesting, bridged into their outer contour and the result is
+ear-clipped; Hertel-Mehlhorn then removes every diagonal whose removal keeps
+the merged piece convex, which yields at most four times the optimal number
+of convex pieces.
+"""
+from __future__ import annotations
+
+from typing import Dict, Generator, List, Sequence, Tuple
+
+from src.geometry import cross, dot, is_point_in_polygon, sub
+
+
+Point = Tuple[float, float]
+Triangle = Tuple[int, int, int]
+
+EPS = 1e-12
+
+
+def signed_area(points: Sequence[Point]) -> float:
+    total = 0.0
+    n = len(points)
+    for i in range(n):
+        x1, y1 = points[i]
+        x2, y2 = points[(i + 1) % n]
+        total += x1 * y2 - x2 * y1
+    return total / 2.0
+
+
+def _orient(a: Point, b: Point, c: Point) -> float:
+    return cross(sub(b, a), sub(c, a))
+
+
+def clean_contour(points: Sequence[Point]) -> List[Point]:
+    """Drop repeated and collinear vertices (including a repeated closing point)."""
+    pts: List[Point] = []
+    for p in points:
+        p = (float(p[0]), float(p[1]))
+        if not pts or p != pts[-1]:
+            pts.append(p)
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts.pop()
+    changed = True
+    while changed and len(pts) >= 3:
+        changed = False
+        for i in range(len(pts)):
+            a, b, c = pts[i - 1], pts[i], pts[(i + 1) % len(pts)]
+            if abs(_orient(a, b, c)) <= EPS:
+                del pts[i]
+                changed = True
+                break
+    return pts
+
+
+def _point_in_triangle(p: Point, a: Point, b: Point, c: Point) -> bool:
+    # Triangulo CCW; el borde cuenta como dentro
+    return _orient(a, b, p) >= -EPS and _orient(b, c, p) >= -EPS and _orient(c, a, p) >= -EPS
+
+
+def triangulate_polygon(points: Sequence[Point]) -> List[Triangle]:
+    """Ear-clip a simple polygon (either orientation) into CCW index triangles.
+
+    Repeated coordinates (hole bridges) are allowed; vertices that coincide
+    with an ear's corners are not treated as blocking it.
+    """
+    steps = triangulate_steps(points)
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+
+def triangulate_steps(points: Sequence[Point], ears_per_step: int = 16) -> Generator[None, None, List[Triangle]]:
+    """``triangulate_polygon`` as a generator that pauses every ``ears_per_step`` ears."""
+    idx = list(range(len(points)))
+    if len(idx) < 3:
+        return []
+    if signed_area(points) < 0:
+        idx.reverse()
+    triangles: List[Triangle] = []
+    while len(idx) > 3:
+        m = len(idx)
+        for k in range(m):
+            i_prev, i, i_next = idx[k - 1], idx[k], idx[(k + 1) % m]
+            a, b, c = points[i_prev], points[i], points[i_next]
+            if _orient(a, b, c) <= EPS:
+                continue
+            corners = (a, b, c)
+            if any(
+                _point_in_triangle(points[j], a, b, c)
+                for j in idx
+                if j not in (i_prev, i, i_next) and points[j] not in corners
+            ):
+                continue
+            triangles.append((i_prev, i, i_next))
+            del idx[k]
+            if len(triangles) % ears_per_step == 0:
+                yield
+            break
+        else:
+            # Sin orejas: solo quedan vertices degenerados (colineales)
+            for k in range(m):
+                if abs(_orient(points[idx[k - 1]], points[idx[k]], points[idx[(k + 1) % m]])) <= EPS:
+                    del idx[k]
+                    break
+            else:
+                triangles.append((idx[-1], idx[0], idx[1]))
+                del idx[0]
+    a, b, c = (points[i] for i in idx)
+    if abs(_orient(a, b, c)) > EPS:
+        triangles.append((idx[0], idx[1], idx[2]))
+    return triangles
+
+
+def _segments_cross(p1: Point, p2: Point, q1: Point, q2: Point) -> bool:
+    """True if the segments touch anywhere other than at shared endpoints."""
+    if p1 in (q1, q2) or p2 in (q1, q2):
+        return False
+    d1 = _orient(q1, q2, p1)
+    d2 = _orient(q1, q2, p2)
+    d3 = _orient(p1, p2, q1)
+    d4 = _orient(p1, p2, q2)
+    if ((d1 > EPS and d2 < -EPS) or (d1 < -EPS and d2 > EPS)) and ((d3 > EPS and d4 < -EPS) or (d3 < -EPS and d4 > EPS)):
+        return True
+
+    def on_segment(a: Point, b: Point, p: Point, d: float) -> bool:
+        return abs(d) <= EPS and min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+    return on_segment(q1, q2, p1, d1) or on_segment(q1, q2, p2, d2) or on_segment(p1, p2, q1, d3) or on_segment(p1, p2, q2, d4)
+
+
+def _edges(points: Sequence[Point]):
+    n = len(points)
+    return ((points[i], points[(i + 1) % n]) for i in range(n))
+
+
+def bridge_holes(outer: Sequence[Point], holes: Sequence[Sequence[Point]]) -> List[Point]:
+    """Splice holes into the outer contour through mutually visible bridges.
+
+    ``outer`` must be CCW and every hole CW. Each hole is joined from its
+    rightmost vertex to the nearest polygon vertex whose connecting segment
+    crosses no edge.
+    """
+    polygon = list(outer)
+    pending = sorted((list(h) for h in holes), key=lambda h: max(p[0] for p in h), reverse=True)
+    while pending:
+        hole = pending.pop(0)
+        m_idx = max(range(len(hole)), key=lambda i: (hole[i][0], -hole[i][1]))
+        m = hole[m_idx]
+        blockers = list(_edges(polygon)) + list(_edges(hole))
+        for other in pending:
+            blockers.extend(_edges(other))
+        seen: Dict[Point, int] = {}
+        for p in polygon:
+            seen[p] = seen.get(p, 0) + 1
+        candidates = sorted(
+            (i for i, p in enumerate(polygon) if seen[p] == 1),
+            key=lambda i: (polygon[i][0] - m[0]) ** 2 + (polygon[i][1] - m[1]) ** 2,
+        )
+        bridge = next((i for i in candidates if not any(_segments_cross(m, polygon[i], a, b) for a, b in blockers)), None)
+        if bridge is None:
+            continue
+        p = polygon[bridge]
+        polygon = polygon[: bridge + 1] + hole[m_idx:] + hole[: m_idx + 1] + [p] + polygon[bridge + 1 :]
+    return polygon
+
+
+def _merge_across(first: List[Point], second: List[Point], a: Point, b: Point) -> List[Point]:
+    i = next(k for k in range(len(first)) if first[k] == a and first[(k + 1) % len(first)] == b)
+    j = next(k for k in range(len(second)) if second[k] == b and second[(k + 1) % len(second)] == a)
+    rot_first = first[i + 1 :] + first[: i + 1]  # b ... a
+    rot_second = second[j + 1 :] + second[: j + 1]  # a ... b
+    return rot_first + rot_second[1:-1]
+
+
+def is_convex(points: Sequence[Point]) -> bool:
+    n = len(points)
+    if n < 3 or signed_area(points) <= EPS:
+        return False
+    for i in range(n):
+        a, b, c = points[i - 1], points[i], points[(i + 1) % n]
+        turn = _orient(a, b, c)
+        if turn < -EPS:
+            return False
+        if abs(turn) <= EPS and dot(sub(b, a), sub(c, b)) <= 0:
+            return False
+    return True
+
+
+def hertel_mehlhorn(points: Sequence[Point], triangles: Sequence[Triangle]) -> List[List[Point]]:
+    """Merge CCW triangles across inessential diagonals (longest first)."""
+    pieces: Dict[int, List[Point]] = {k: [points[i] for i in tri] for k, tri in enumerate(triangles)}
+    owner: Dict[Tuple[Point, Point], int] = {}
+    for k, piece in pieces.items():
+        for edge in _edges(piece):
+            owner[edge] = k
+    diagonals = sorted(
+        {(a, b) for a, b in owner if (b, a) in owner and a < b},
+        key=lambda e: (e[0][0] - e[1][0]) ** 2 + (e[0][1] - e[1][1]) ** 2,
+        reverse=True,
+    )
+    for a, b in diagonals:
+        k1, k2 = owner.get((a, b)), owner.get((b, a))
+        if k1 is None or k2 is None or k1 == k2:
+            continue
+        merged = _merge_across(pieces[k1], pieces[k2], a, b)
+        if not is_convex(merged):
+            continue
+        pieces[k1] = merged
+        del pieces[k2]
+        del owner[(a, b)], owner[(b, a)]
+        for edge in _edges(merged):
+            owner[edge] = k1
+    return [clean_contour(piece) for piece in pieces.values()]
+
+
+def convex_decomposition(outer: Sequence[Point], holes: Sequence[Sequence[Point]] = ()) -> List[List[Point]]:
+    outer = list(outer)
+    if signed_area(outer) < 0:
+        outer.reverse()
+    oriented_holes = [list(h) if signed_area(h) < 0 else list(reversed(h)) for h in holes]
+    polygon = bridge_holes(outer, oriented_holes)
+    return [piece for piece in hertel_mehlhorn(polygon, triangulate_polygon(polygon)) if len(piece) >= 3]
+
+
+def decompose_contours(contours: Sequence[Sequence[Point]]) -> List[List[Point]]:
+    """Convex pieces for a glyph given as nested contours (even depth = filled)."""
+    cleaned = [c for c in (clean_contour(c) for c in contours) if len(c) >= 3 and abs(signed_area(c)) > EPS]
+    depth = [
+        sum(1 for j, other in enumerate(cleaned) if j != i and is_point_in_polygon(contour[0], other))
+        for i, contour in enumerate(cleaned)
+    ]
+    holes_of: Dict[int, List[List[Point]]] = {i: [] for i in range(len(cleaned)) if depth[i] % 2 == 0}
+    for i, contour in enumerate(cleaned):
+        if depth[i] % 2 == 0:
+            continue
+        parents = [j for j in holes_of if depth[j] == depth[i] - 1 and is_point_in_polygon(contour[0], cleaned[j])]
+        if parents:
+            holes_of[parents[0]].append(contour)
+    pieces: List[List[Point]] = []
+    for i, holes in holes_of.items():
+        pieces.extend(convex_decomposition(cleaned[i], holes))
+    return pieces
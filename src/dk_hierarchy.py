@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import math
+import time
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Dict, Generator, Iterable, List, Optional, Sequence, Set, Tuple
 
+from src.convex_decomposition import bridge_holes, signed_area, triangulate_polygon, triangulate_steps
 from src.geometry import bounds_overlap, polygon_bounds, segment_bounds, segment_hits_convex
 
 
 VertexId = int
 Face = Tuple[VertexId, VertexId, VertexId]
 
+# Removed vertices between two pauses of a resumable build
+BUILD_SLICE = 16
+# Relative widening of a stroke's box mapped back to local space (it only prunes)
+SEARCH_SLACK = 1e-9
+
 
 def _project(point: Tuple[float, ...]) -> Tuple[float, float]:
     if not point:
@@ -18,6 +26,24 @@ def _project(point: Tuple[float, ...]) -> Tuple[float, float]:
     return (point[0], point[1])
 
 
+def search_bounds(
+    inverse: Optional[Affine],
+    start: Tuple[float, float],
+    end: Tuple[float, float],
+) -> Tuple[float, float, float, float]:
+    """Local box of the world segment ``start -> end``, for pruning only.
+
+    Mapping a point back with ``inverse`` rounds it (``416 / 80`` is not
+    exactly ``5.2``), so the box is widened by ``SEARCH_SLACK``; the exact
+    test always runs in world space, on vertices mapped forward.
+    """
+    if inverse is None:
+        return segment_bounds(start, end)
+    box = segment_bounds(inverse.apply(start), inverse.apply(end))
+    slack = SEARCH_SLACK * (1.0 + max(abs(v) for v in box))
+    return (box[0] - slack, box[1] - slack, box[2] + slack, box[3] + slack)
+
+
 def polyhedron_from_convex_polygon(points: Sequence[Tuple[float, float]]) -> "Polyhedron":
     if len(points) < 3:
         raise ValueError("A convex polygon needs at least three points")
@@ -28,12 +54,148 @@ def polyhedron_from_convex_polygon(points: Sequence[Tuple[float, float]]) -> "Po
     return Polyhedron(vertices, faces)
 
 
+def hierarchy_from_convex_polygon(
+    points: Sequence[Tuple[float, float]],
+    degree_limit: int = 11,
+) -> "DKHierarchy":
+    """DK hierarchy for a convex polygon.
+
+    Up to four vertices the fan triangulation is already the apex. Larger
+    polygons are embedded in an enclosing triangle whose corners are never
+    removed, so every coarser level still covers the finer ones (removing a
+    hull vertex of the bare polygon would cut off an ear and lose hits). Only
+    the faces of the original polygon count as hits at level 0.
+    """
+    return HierarchyBuild(convex_polygon_steps(points, degree_limit)).finish()
+
+
+def convex_polygon_steps(
+    points: Sequence[Tuple[float, float]],
+    degree_limit: int = 11,
+) -> Generator[None, None, "DKHierarchy"]:
+    """Resumable form of ``hierarchy_from_convex_polygon`` (see ``HierarchyBuild``)."""
+    polygon = polyhedron_from_convex_polygon(points)
+    if polygon.num_vertices <= 4:
+        return (yield from DKHierarchy.build_steps(polygon, degree_limit))
+    pts = [_project(v) for v in polygon.vertices]
+    min_x, min_y, max_x, max_y = polygon_bounds(pts)
+    cx, cy = (min_x + max_x) / 2, (min_y + max_y) / 2
+    radius = 4 * max(max_x - min_x, max_y - min_y, 1.0)
+    outer = [(cx, cy + radius), (cx - 0.866 * radius, cy - 0.5 * radius), (cx + 0.866 * radius, cy - 0.5 * radius)]
+    hole = pts if signed_area(pts) < 0 else pts[::-1]
+    annulus = bridge_holes(outer, [hole])
+    index = {p: i for i, p in enumerate(outer + pts)}
+    faces: List[Face] = [tuple(v + 3 for v in face) for face in polygon.faces]
+    for tri in (yield from triangulate_steps(annulus)):
+        mapped = tuple(index[annulus[i]] for i in tri)
+        if len(set(mapped)) == 3:
+            faces.append(mapped)
+    mesh = Polyhedron(outer + pts, faces)
+    return (yield from DKHierarchy.build_steps(
+        mesh,
+        degree_limit,
+        fixed_vertices=(0, 1, 2),
+        inside_faces=range(len(polygon.faces)),
+    ))
+
+
+class HierarchyBuild:
+    """Hierarchy build that advances in slices under a time budget.
+
+    Wraps a ``*_steps`` generator (``DKHierarchy.build_steps``,
+    ``convex_polygon_steps``). ``step(budget)`` runs slices until ``budget``
+    seconds have passed (always at least one) and returns ``done``; the
+    generator's return value (the hierarchy) is in ``result`` afterwards.
+    """
+
+    def __init__(self, steps: Generator):
+        self._steps = steps
+        self.result = None
+        self.done = False
+        self.slices = 0
+
+    def step(self, budget: Optional[float] = None) -> bool:
+        if self.done:
+            return True
+        deadline = None if budget is None else time.perf_counter() + budget
+        try:
+            while True:
+                next(self._steps)
+                self.slices += 1
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return False
+        except StopIteration as stop:
+            self.result = stop.value
+            self.done = True
+        return True
+
+    def finish(self):
+        self.step()
+        return self.result
+
+
+@dataclass(frozen=True)
+class Affine:
+    """2D affine map ``(x, y) -> (a*x + b*y + tx, c*x + d*y + ty)``."""
+
+    a: float = 1.0
+    b: float = 0.0
+    c: float = 0.0
+    d: float = 1.0
+    tx: float = 0.0
+    ty: float = 0.0
+
+    @classmethod
+    def placement(cls, scale: float = 1.0, offset: Tuple[float, float] = (0.0, 0.0)) -> "Affine":
+        """``p * scale + offset`` (how glyph pieces are placed in a word)."""
+        return cls(scale, 0.0, 0.0, scale, offset[0], offset[1])
+
+    @classmethod
+    def rotation(cls, angle: float, center: Tuple[float, float] = (0.0, 0.0)) -> "Affine":
+        cos, sin = math.cos(angle), math.sin(angle)
+        cx, cy = center
+        return cls(cos, -sin, sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+
+    def then(self, other: "Affine") -> "Affine":
+        """Map that applies ``self`` first and ``other`` after it."""
+        return Affine(
+            other.a * self.a + other.b * self.c, other.a * self.b + other.b * self.d,
+            other.c * self.a + other.d * self.c, other.c * self.b + other.d * self.d,
+            other.a * self.tx + other.b * self.ty + other.tx, other.c * self.tx + other.d * self.ty + other.ty,
+        )
+
+    @property
+    def scale_factor(self) -> float:
+        """Length scale (exact for rotations and uniform scales)."""
+        return math.sqrt(abs(self.a * self.d - self.b * self.c))
+
+    def inverse(self) -> "Affine":
+        det = self.a * self.d - self.b * self.c
+        if det == 0:
+            raise ValueError("Affine map is not invertible")
+        a, b, c, d = self.d / det, -self.b / det, -self.c / det, self.a / det
+        return Affine(a, b, c, d, -(a * self.tx + b * self.ty), -(c * self.tx + d * self.ty))
+
+    def apply(self, point: Tuple[float, ...]) -> Tuple[float, float]:
+        x, y = point[0], point[1]
+        return (self.a * x + self.b * y + self.tx, self.c * x + self.d * y + self.ty)
+
+    def map_bounds(self, box: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+        corners = [self.apply(p) for p in ((box[0], box[1]), (box[2], box[1]), (box[0], box[3]), (box[2], box[3]))]
+        return polygon_bounds(corners)
+
+
 @dataclass(frozen=True)
 class ParentPointer:
-    """Describes how a face in layer i+1 maps back to layer i."""
+    """Describes how a face in layer i+1 maps back to layer i.
 
-    kind: str  # "face" or "vertex"
+    ``"faces"`` lists the children explicitly (left by local repairs, see
+    ``src.dynamic_hierarchy``).
+    """
+
+    kind: str  # "face", "vertex" or "faces"
     reference: int
+    faces: Tuple[int, ...] = ()
 
 
 @dataclass
@@ -89,6 +251,23 @@ class Polyhedron:
         ids = self.faces[face_index]
         return [self.vertices[idx] for idx in ids]
 
+    def transformed(
+        self,
+        scale: float = 1.0,
+        offset: Tuple[float, float] = (0.0, 0.0),
+    ) -> "Polyhedron":
+        """Scaled/translated copy that shares faces and adjacency with ``self``."""
+        dx, dy = offset
+        clone = object.__new__(Polyhedron)
+        clone.vertices = [
+            (v[0] * scale + dx, v[1] * scale + dy) + tuple(c * scale for c in v[2:])
+            for v in self.vertices
+        ]
+        clone.faces = self.faces
+        clone.vertex_neighbors = self.vertex_neighbors
+        clone.vertex_faces = self.vertex_faces
+        return clone
+
     # --- hierarchy helpers -------------------------------------------------
     def maximal_independent_set(self, candidates: Iterable[VertexId]) -> List[VertexId]:
         blocked: Set[VertexId] = set()
@@ -107,6 +286,13 @@ class Polyhedron:
         self,
         remove_vertices: Iterable[VertexId],
     ) -> Tuple["Polyhedron", List[ParentPointer]]:
+        return HierarchyBuild(self.next_layer_steps(remove_vertices)).finish()
+
+    def next_layer_steps(
+        self,
+        remove_vertices: Iterable[VertexId],
+    ) -> Generator[None, None, Tuple["Polyhedron", List[ParentPointer]]]:
+        """``create_next_layer`` that pauses every ``BUILD_SLICE`` removed vertices."""
         remove_set = set(remove_vertices)
         if not remove_set:
             raise ValueError("Expected at least one vertex to remove")
@@ -115,16 +301,24 @@ class Polyhedron:
             if remove_set.intersection(face):
                 continue
             face_info[face] = ParentPointer("face", face_index)
-        for vertex in remove_set:
+        for count, vertex in enumerate(remove_set, 1):
+            if count % BUILD_SLICE == 0:
+                yield
             ring = self._ordered_vertex_ring(vertex)
             if len(ring) < 3:
                 continue
-            anchor = ring[0]
-            for i in range(1, len(ring) - 1):
-                tri = self._canonical_face((anchor, ring[i], ring[i + 1]))
-                face_info.setdefault(tri, ParentPointer("vertex", vertex))
+            for tri in self._triangulate_ring(ring):
+                face_info.setdefault(self._canonical_face(tri), ParentPointer("vertex", vertex))
         return self._reindexed(face_info, remove_set)
 
+    def _triangulate_ring(self, ring: List[VertexId]) -> List[Face]:
+        # En el plano el anillo puede ser no convexo: un abanico se saldria del hueco
+        if all(len(self.vertices[v]) == 2 for v in ring):
+            points = [self.vertices[v] for v in ring]
+            return [(ring[a], ring[b], ring[c]) for a, b, c in triangulate_polygon(points)]
+        anchor = ring[0]
+        return [(anchor, ring[i], ring[i + 1]) for i in range(1, len(ring) - 1)]
+
     def _ordered_vertex_ring(self, vertex: VertexId) -> List[VertexId]:
         neighbors = list(self.vertex_neighbors[vertex])
         if len(neighbors) < 3:
@@ -188,12 +382,27 @@ class HierarchyLevel:
 
 
 class DKHierarchy:
-    """Dobkin-Kirkpatrick hierarchy for convex polyhedra."""
+    """Dobkin-Kirkpatrick hierarchy for convex polyhedra.
+
+    ``inside_faces`` restricts which level-0 faces count as hits; ``None``
+    means the whole mesh is the shape.
+
+    ``transform`` (an ``Affine``, ``None`` = identity) places the levels in
+    world space, so moving, scaling or rotating the shape never touches the
+    levels. Queries prune with the stroke mapped back to local space
+    (``search_bounds``) but test each face with its vertices mapped forward:
+    a stroke that touches a placed edge stays on it.
+    """
 
-    def __init__(self, levels: List[HierarchyLevel]):
+    transform: Optional[Affine] = None
+    _inverse: Optional[Affine] = None
+    _world_bounds: Optional[Tuple[float, float, float, float]] = None
+
+    def __init__(self, levels: List[HierarchyLevel], inside_faces: Optional[Iterable[int]] = None):
         if not levels:
             raise ValueError("Hierarchy requires at least one layer")
         self.levels = levels
+        self.inside_faces: Optional[frozenset] = frozenset(inside_faces) if inside_faces is not None else None
         self._prepare_bounds()
 
     @classmethod
@@ -201,27 +410,47 @@ class DKHierarchy:
         cls,
         polyhedron: Polyhedron,
         degree_limit: int = 11,
+        fixed_vertices: Iterable[VertexId] = (),
+        inside_faces: Optional[Iterable[int]] = None,
     ) -> "DKHierarchy":
+        return HierarchyBuild(cls.build_steps(polyhedron, degree_limit, fixed_vertices, inside_faces)).finish()
+
+    @classmethod
+    def build_steps(
+        cls,
+        polyhedron: Polyhedron,
+        degree_limit: int = 11,
+        fixed_vertices: Iterable[VertexId] = (),
+        inside_faces: Optional[Iterable[int]] = None,
+    ) -> Generator[None, None, "DKHierarchy"]:
+        """Generator form of ``build``: pauses between levels and inside large ones."""
         levels = [HierarchyLevel(polyhedron, parents=None)]
+        fixed = {polyhedron.vertices[v] for v in fixed_vertices}
         current = polyhedron
         current_limit = degree_limit
         while current.num_vertices > 4:
-            candidates = [v for v in current.available_vertices() if current.degree(v) <= current_limit]
+            candidates = [
+                v for v in current.available_vertices()
+                if current.degree(v) <= current_limit and current.vertices[v] not in fixed
+            ]
             if not candidates:
+                if current_limit > current.num_vertices:
+                    break
                 current_limit += 1
                 continue
             independent = current.maximal_independent_set(candidates)
             if not independent:
                 current_limit += 1
                 continue
-            next_layer, parents = current.create_next_layer(independent)
+            next_layer, parents = yield from current.next_layer_steps(independent)
+            yield
             if next_layer.num_vertices == current.num_vertices:
                 current_limit += 1
                 continue
             levels.append(HierarchyLevel(next_layer, parents))
             current = next_layer
             current_limit = degree_limit
-        return cls(levels)
+        return cls(levels, inside_faces)
 
     def height(self) -> int:
         return len(self.levels)
@@ -241,15 +470,75 @@ class DKHierarchy:
     def level(self, index: int) -> HierarchyLevel:
         return self.levels[index]
 
+    def with_transform(self, transform: Optional[Affine]) -> "DKHierarchy":
+        """O(1) view of the same levels placed in world space by ``transform``."""
+        clone = object.__new__(DKHierarchy)
+        clone.levels = self.levels
+        clone.inside_faces = self.inside_faces
+        clone.set_transform(transform)
+        return clone
+
+    def set_transform(self, transform: Optional[Affine]) -> None:
+        """Replace the local-to-world map in place (only on views you own)."""
+        self.transform = transform
+        self._inverse = transform.inverse() if transform is not None else None
+        self._world_bounds = None
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """World bounding box of the shape, computed on first use after a transform change."""
+        if self._world_bounds is None:
+            box = self.levels[-1].bbox
+            self._world_bounds = self.transform.map_bounds(box) if self.transform is not None and box else box
+        return self._world_bounds
+
+    def transformed(
+        self,
+        scale: float = 1.0,
+        offset: Tuple[float, float] = (0.0, 0.0),
+    ) -> "DKHierarchy":
+        """Copy of the hierarchy under ``p * scale + offset`` (``scale > 0``).
+
+        Faces and parent pointers do not depend on coordinates, so they are
+        shared with ``self``; only vertices and bounding boxes are mapped.
+        The copy is in local space (it does not keep ``transform``).
+        """
+        if scale <= 0:
+            raise ValueError("Scale must be positive")
+        dx, dy = offset
+
+        def map_box(box):
+            return (box[0] * scale + dx, box[1] * scale + dy, box[2] * scale + dx, box[3] * scale + dy)
+
+        clone = object.__new__(DKHierarchy)
+        clone.inside_faces = self.inside_faces
+        clone.levels = [
+            HierarchyLevel(
+                level.mesh.transformed(scale, offset),
+                parents=level.parents,
+                bbox=map_box(level.bbox) if level.bbox else None,
+                face_bboxes=[map_box(box) for box in level.face_bboxes] if level.face_bboxes else None,
+            )
+            for level in self.levels
+        ]
+        return clone
+
     # --- queries ----------------------------------------------------------
     def intersects_segment(
         self,
         start: Tuple[float, float],
         end: Tuple[float, float],
     ) -> bool:
+        return self._intersects(start, end, search_bounds(self._inverse, start, end))
+
+    def _intersects(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+        seg_bounds: Tuple[float, float, float, float],
+    ) -> bool:
+        """World segment against the placed faces; ``seg_bounds`` (local) prunes."""
         if not self.levels:
             return False
-        seg_bounds = segment_bounds(start, end)
         stack: List[Tuple[int, Optional[ParentPointer]]] = [(len(self.levels) - 1, None)]
         while stack:
             level_idx, constraint = stack.pop()
@@ -263,17 +552,46 @@ class DKHierarchy:
                     continue
                 if face_bboxes and not bounds_overlap(seg_bounds, face_bboxes[face_idx]):
                     continue
-                polygon = [_project(v) for v in level.mesh.face_vertices(face_idx)]
-                if not segment_hits_convex(start, end, polygon):
+                if not segment_hits_convex(start, end, self._face_polygon(level.mesh, face_idx)):
                     continue
                 if level_idx == 0:
-                    return True
+                    if self._is_inside_face(face_idx):
+                        return True
+                    continue
                 pointer = level.parents[face_idx] if level.parents else None
                 if pointer is None:
                     return True
                 stack.append((level_idx - 1, pointer))
         return False
 
+    def intersects_polyline(self, points: Sequence[Tuple[float, float]]) -> bool:
+        """True if any segment of the polyline ``points`` hits the polytope.
+
+        Segments whose bounding box misses the coarsest level are rejected
+        before descending the hierarchy.
+        """
+        if not self.levels or not points:
+            return False
+        if len(points) == 1:
+            points = [points[0], points[0]]
+        top_bbox = self.levels[-1].bbox
+        for start, end in zip(points, points[1:]):
+            seg_bounds = search_bounds(self._inverse, start, end)
+            if top_bbox and not bounds_overlap(seg_bounds, top_bbox):
+                continue
+            if self._intersects(start, end, seg_bounds):
+                return True
+        return False
+
+    def _face_polygon(self, mesh: Polyhedron, face_index: int) -> List[Tuple[float, float]]:
+        """Corners of a face in world space."""
+        if self.transform is None:
+            return [_project(v) for v in mesh.face_vertices(face_index)]
+        return [self.transform.apply(v) for v in mesh.face_vertices(face_index)]
+
+    def _is_inside_face(self, face_idx: int) -> bool:
+        return self.inside_faces is None or face_idx in self.inside_faces
+
     def _faces_to_check(
         self,
         level_idx: int,
@@ -286,6 +604,8 @@ class DKHierarchy:
             return [pointer.reference]
         if pointer.kind == "vertex":
             return list(mesh.incident_faces(pointer.reference))
+        if pointer.kind == "faces":
+            return pointer.faces
         return range(len(mesh.faces))
 
     # --- preprocessing ----------------------------------------------------
@@ -293,6 +613,16 @@ class DKHierarchy:
         for level in self.levels:
             level.bbox = self._mesh_bounds(level.mesh)
             level.face_bboxes = [self._face_bounds(level.mesh, idx) for idx in range(len(level.mesh.faces))]
+        if self.inside_faces is not None:
+            # Los aciertos solo cuentan dentro de la forma: su caja poda todos los niveles
+            base = self.levels[0]
+            boxes = [base.face_bboxes[idx] for idx in self.inside_faces]
+            region = (
+                min(b[0] for b in boxes), min(b[1] for b in boxes),
+                max(b[2] for b in boxes), max(b[3] for b in boxes),
+            )
+            for level in self.levels:
+                level.bbox = region
 
     @staticmethod
     def _mesh_bounds(mesh: Polyhedron) -> Tuple[float, float, float, float]:
@@ -319,8 +649,7 @@ class DKHierarchy:
         trace = []
         if not self.levels:
             return trace
-        
-        seg_bounds = segment_bounds(start, end)
+
         stack: List[Tuple[int, Optional[ParentPointer]]] = [(len(self.levels) - 1, None)]
         
         while stack:
@@ -335,11 +664,13 @@ class DKHierarchy:
             face_indices = self._faces_to_check(level_idx, constraint)
             
             for face_idx in face_indices:
-                if face_idx < 0 or face_idx >= len(level.mesh.faces):
+                if face_idx < 0 or face_idx >= len(level.mesh.faces) or level.mesh.faces[face_idx] is None:
                     continue
                 
-                polygon = [_project(v) for v in level.mesh.face_vertices(face_idx)]
+                polygon = self._face_polygon(level.mesh, face_idx)
                 hit = segment_hits_convex(start, end, polygon)
+                if level_idx == 0 and not self._is_inside_face(face_idx):
+                    hit = False
                 
                 trace.append((level_idx, polygon, hit))
                 
@@ -351,3 +682,96 @@ class DKHierarchy:
                     if pointer is not None:
                         stack.append((level_idx - 1, pointer))
         return trace
+
+
+class DeferredHierarchy:
+    """Stand-in for a hierarchy whose ``HierarchyBuild`` is still pending.
+
+    Until ``job`` finishes, queries test the convex ``polygon`` directly
+    (same answers, linear cost); afterwards they go to the built hierarchy.
+    Views made with ``with_transform`` share the job.
+    """
+
+    __slots__ = ("polygon", "job", "transform", "_world", "_built")
+
+    def __init__(
+        self,
+        polygon: Sequence[Tuple[float, float]],
+        job: HierarchyBuild,
+        transform: Optional[Affine] = None,
+    ):
+        self.polygon = [_project(p) for p in polygon]
+        self.job = job
+        self._built: Optional[DKHierarchy] = None
+        self.set_transform(transform)
+
+    @property
+    def ready(self) -> bool:
+        return self.job.done
+
+    def resolved(self) -> Optional[DKHierarchy]:
+        """The built hierarchy under ``transform``, or ``None`` while pending."""
+        if self._built is None and self.job.done:
+            self._built = self.job.result.with_transform(self.transform)
+        return self._built
+
+    def with_transform(self, transform: Optional[Affine]) -> "DeferredHierarchy":
+        clone = DeferredHierarchy.__new__(DeferredHierarchy)
+        clone.polygon = self.polygon
+        clone.job = self.job
+        clone._built = None
+        clone.set_transform(transform)
+        return clone
+
+    def transformed(
+        self,
+        scale: float = 1.0,
+        offset: Tuple[float, float] = (0.0, 0.0),
+    ) -> "DeferredHierarchy":
+        if scale <= 0:
+            raise ValueError("Scale must be positive")
+        placement = Affine.placement(scale, offset)
+        return self.with_transform(self.transform.then(placement) if self.transform is not None else placement)
+
+    def set_transform(self, transform: Optional[Affine]) -> None:
+        self.transform = transform
+        self._world: Optional[List[Tuple[float, float]]] = None
+        if self._built is not None:
+            self._built.set_transform(transform)
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        box = polygon_bounds(self.polygon)
+        return self.transform.map_bounds(box) if self.transform is not None else box
+
+    def world_polygon(self) -> List[Tuple[float, float]]:
+        """``polygon`` placed by ``transform`` (computed on first use)."""
+        if self._world is None:
+            self._world = self.polygon if self.transform is None else [self.transform.apply(p) for p in self.polygon]
+        return self._world
+
+    def intersects_segment(self, start: Tuple[float, float], end: Tuple[float, float]) -> bool:
+        built = self.resolved()
+        if built is not None:
+            return built.intersects_segment(start, end)
+        return segment_hits_convex(start, end, self.world_polygon())
+
+    def intersects_polyline(self, points: Sequence[Tuple[float, float]]) -> bool:
+        built = self.resolved()
+        if built is not None:
+            return built.intersects_polyline(points)
+        if not points:
+            return False
+        if len(points) == 1:
+            points = [points[0], points[0]]
+        polygon = self.world_polygon()
+        return any(segment_hits_convex(a, b, polygon) for a, b in zip(points, points[1:]))
+
+    def trace_intersection(
+        self,
+        start: Tuple[float, float],
+        end: Tuple[float, float],
+    ) -> List[Tuple[int, List[Tuple[float, float]], bool]]:
+        built = self.resolved()
+        if built is not None:
+            return built.trace_intersection(start, end)
+        return [(0, list(self.world_polygon()), self.intersects_segment(start, end))]
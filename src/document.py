@@ -0,0 +1,219 @@
+# src/document.py
+"""Modo documento: textos largos en lineas y paginas con escena virtualizada.
+
+Cada pagina ocupa una pantalla de ancho y las paginas se colocan una al lado
+de la otra, asi el desplazamiento horizontal de la camara sigue funcionando.
+Cada linea es un chunk: solo los chunks visibles o cercanos tienen geometria
+y jerarquias vivas; el resto se libera (LRU) cuando se supera el presupuesto
+de piezas residentes. El progreso de las piezas liberadas se conserva.
+"""
+import bisect
+from collections import OrderedDict
+
+from src.game_entities import LetterGoal, LetterBuilder, WordGoal, number_pieces
+
+
+class TextChunk:
+    """Una linea de texto de una pagina."""
+
+    def __init__(self, index, page, letters, min_x, max_x, min_y, max_y):
+        self.index = index
+        self.page = page
+        self.letters = letters
+        self.min_x, self.max_x = min_x, max_x
+        self.min_y, self.max_y = min_y, max_y
+        self.piece_count = sum(letter.piece_count for letter in letters)
+
+    @property
+    def is_resident(self):
+        return any(letter.is_built for letter in self.letters)
+
+    def build(self):
+        for letter in self.letters:
+            letter.build()
+
+    def release(self):
+        for letter in self.letters:
+            letter.release()
+
+
+def wrap_words(text, max_chars):
+    """Parte el texto en lineas de como mucho ``max_chars`` caracteres."""
+    lines = []
+    current = ''
+    for word in text.split():
+        while len(word) > max_chars:
+            if current:
+                lines.append(current)
+                current = ''
+            lines.append(word[:max_chars])
+            word = word[max_chars:]
+        if not current:
+            current = word
+        elif len(current) + 1 + len(word) <= max_chars:
+            current += ' ' + word
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    return lines
+
+
+class DocumentGoal(WordGoal):
+    """Escena de texto largo con la misma interfaz que ``WordGoal``.
+
+    ``memory_budget`` es el maximo de piezas (poligono + jerarquia DK) que se
+    mantienen construidas; los chunks visibles nunca se liberan aunque el
+    presupuesto sea menor.
+    """
+
+    def __init__(self, text, start_y, screen_width, screen_height, scale=50,
+                 prefetch_margin=None, background_build=True, atlas=None,
+                 memory_budget=4000, margin_x=50, bottom_margin=40, coverage=None, engine_model=None):
+        self.text = text
+        self.scale = scale
+        self.screen_height = screen_height
+        self.margin_x = margin_x
+        self.bottom_margin = bottom_margin
+        self.memory_budget = memory_budget
+
+        lines = self._layout_lines(start_y, screen_width, scale)
+        self.polygons = [
+            LetterGoal(char, x, y, scale, atlas, coverage, engine_model)
+            for _, y, positions in lines
+            for char, x in positions
+        ]
+        self.prefetch_margin = screen_width if prefetch_margin is None else prefetch_margin
+        self.builder = LetterBuilder() if background_build else None
+        self.total_pieces = number_pieces(self.polygons)
+        self._index_chunks(lines)
+        self._highlighted = []
+        # chunk.index -> chunk, del menos al mas recientemente usado
+        self._resident = OrderedDict()
+        self._resident_pieces = 0
+
+    def _layout_lines(self, start_y, screen_width, scale):
+        """``(pagina, y, [(caracter, x), ...])`` de cada linea con letras; fija
+        ``page_width`` y ``line_height``."""
+        letter_spacing = scale * 1.5
+        word_spacing = scale * 1.0
+        line_height = scale * 1.8
+        self.page_width = screen_width
+        self.line_height = line_height
+
+        max_chars = max(1, int((screen_width - 2 * self.margin_x + word_spacing) // letter_spacing))
+        lines_per_page = max(1, int((self.screen_height - start_y - self.bottom_margin) // line_height))
+
+        lines = []
+        for line_index, line in enumerate(wrap_words(self.text, max_chars)):
+            page, row = divmod(line_index, lines_per_page)
+            y = start_y + row * line_height
+            x = page * screen_width + self.margin_x
+            positions = []
+            for char in line:
+                if char == ' ':
+                    x += word_spacing
+                    continue
+                positions.append((char, x))
+                x += letter_spacing
+            if positions:
+                lines.append((page, y, positions))
+        return lines
+
+    def _index_chunks(self, lines):
+        """Un chunk por linea con las letras de ``polygons`` en orden."""
+        self.chunks = []
+        letters = iter(self.polygons)
+        for page, y, positions in lines:
+            line = [next(letters) for _ in positions]
+            self.chunks.append(TextChunk(len(self.chunks), page, line,
+                                         min(l.min_x for l in line), max(l.max_x for l in line),
+                                         y - self.scale, y + self.line_height))
+        self.page_count = (self.chunks[-1].page + 1) if self.chunks else 1
+        self._page_chunks = [[] for _ in range(self.page_count)]
+        for chunk in self.chunks:
+            self._page_chunks[chunk.page].append(chunk)
+        self.total_width = self.page_count * self.page_width
+        self._chunk_starts = [chunk.letters[0].first_piece for chunk in self.chunks]
+
+    def relayout(self, start_y, screen_width, scale=None, screen_height=None):
+        """Vuelve a partir el texto en lineas y paginas y mueve cada letra con su
+        transformacion; las piezas construidas y el progreso se conservan."""
+        scale = scale or self.scale
+        if screen_height is not None: self.screen_height = screen_height
+        lines = self._layout_lines(start_y, screen_width, scale)
+        letters = iter(self.polygons)
+        for _, y, positions in lines:
+            for _, x in positions:
+                next(letters).place(x, y, scale)
+        self.scale = scale
+        self._index_chunks(lines)
+        self._reset_locator()
+        self._grid = None
+        # Los chunks son nuevos: la residencia se recuenta con las letras ya construidas
+        self._resident = OrderedDict()
+        self._resident_pieces = 0
+        for chunk in self.chunks:
+            if chunk.is_resident: self._touch(chunk)
+        self._evict(set())
+
+    # --- consultas espaciales ---------------------------------------------
+    def chunks_in_range(self, min_x, max_x):
+        first_page = max(0, int(min_x // self.page_width) - 1)
+        last_page = min(self.page_count - 1, int(max_x // self.page_width) + 1)
+        return [
+            chunk
+            for page in range(first_page, last_page + 1)
+            for chunk in self._page_chunks[page]
+            if chunk.max_x >= min_x and chunk.min_x <= max_x
+        ]
+
+    def letters_in_range(self, min_x, max_x):
+        letters = []
+        for chunk in self.chunks_in_range(min_x, max_x):
+            self._touch(chunk)
+            letters.extend(l for l in chunk.letters if l.max_x >= min_x and l.min_x <= max_x)
+        return letters
+
+    def _piece(self, piece):
+        # Las piezas que toca el trazo cuentan para el presupuesto como las de ``letters_in_range``
+        self._touch(self.chunks[bisect.bisect_right(self._chunk_starts, piece) - 1])
+        return super()._piece(piece)
+
+    # --- residencia ---------------------------------------------------------
+    def _touch(self, chunk):
+        if chunk.index in self._resident:
+            self._resident.move_to_end(chunk.index)
+        else:
+            self._resident[chunk.index] = chunk
+            self._resident_pieces += chunk.piece_count
+
+    def _evict(self, keep):
+        for index in list(self._resident):
+            if self._resident_pieces <= self.memory_budget:
+                break
+            if index in keep:
+                continue
+            chunk = self._resident.pop(index)
+            chunk.release()
+            self._resident_pieces -= chunk.piece_count
+
+    def resident_pieces(self):
+        return self._resident_pieces
+
+    def set_view(self, camera_x, view_width):
+        visible = self.chunks_in_range(camera_x, camera_x + view_width)
+        margin = self.prefetch_margin
+        nearby = self.chunks_in_range(camera_x - margin, camera_x + view_width + margin)
+        for chunk in nearby:
+            self._touch(chunk)
+        for chunk in visible:
+            self._touch(chunk)
+            chunk.build()
+        for chunk in nearby:
+            for letter in chunk.letters:
+                if letter.is_built: continue
+                if self.builder: self.builder.submit(letter)
+                else: letter.build()
+        self._evict({chunk.index for chunk in visible})
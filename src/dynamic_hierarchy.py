@@ -0,0 +1,549 @@
+"""Convex polygon hierarchies that follow hull vertex inserts and deletes.
+
+``DynamicPolygonHierarchy`` starts from the enclosing-triangle hierarchy of
+``hierarchy_from_convex_polygon`` and edits it in place:
+
+- deleting a hull vertex retriangulates its star on every level that still
+  contains it (level 0 keeps the new hull edge so the shape stays exact);
+- inserting a hull vertex splits the level-0 face around it and flips edges
+  until both new hull edges exist; the new vertex only lives at level 0.
+
+Only the next coarser level of an edited one needs new parent pointers: its
+faces whose children were replaced (and its own new faces) point to the
+finer faces they overlap, listed explicitly when no single face or vertex
+describes them. Face slots freed by a delete stay empty until an insert
+reuses them.
+
+A full rebuild happens only when a bound is violated: a pointer with more
+than ``max_children`` children, more levels than ``height_bound``, more local
+edits than half the vertices of the last build, or a degenerate position
+(vertex on an edge). Polygons of at most four vertices are a single fan and
+are always rebuilt.
+
+Topology shared with ``transformed`` / ``with_transform`` copies (or adopted
+from a glyph atlas) is copied on the first edit, so those copies never see
+the change. ``set_transform`` moves the polygon itself without sharing.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from src.convex_decomposition import signed_area, triangulate_polygon
+from src.dk_hierarchy import (
+    Affine,
+    DKHierarchy,
+    Face,
+    HierarchyLevel,
+    ParentPointer,
+    Polyhedron,
+    VertexId,
+    hierarchy_from_convex_polygon,
+)
+from src.geometry import bounds_overlap, polygon_bounds
+
+Point = Tuple[float, float]
+
+EMPTY_BOUNDS = (math.inf, math.inf, -math.inf, -math.inf)
+EPS = 1e-9
+
+
+class _Rebuild(Exception):
+    """The edit cannot be repaired locally."""
+
+
+def _orient(a: Point, b: Point, c: Point) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _triangles_overlap(first: Sequence[Point], second: Sequence[Point]) -> bool:
+    """Separating-axis test on closed triangles (touching counts)."""
+    for tri, other in ((first, second), (second, first)):
+        for i in range(3):
+            a, b = tri[i], tri[(i + 1) % 3]
+            nx, ny = a[1] - b[1], b[0] - a[0]
+            mine = [nx * p[0] + ny * p[1] for p in tri]
+            theirs = [nx * p[0] + ny * p[1] for p in other]
+            if max(mine) < min(theirs) - EPS or max(theirs) < min(mine) - EPS:
+                return False
+    return True
+
+
+def _strictly_convex(points: Sequence[Point], indices: Sequence[int], orientation: float) -> bool:
+    n = len(points)
+    return all(
+        _orient(points[(i - 1) % n], points[i % n], points[(i + 1) % n]) * orientation > 0
+        for i in indices
+    )
+
+
+class _LevelEdit:
+    """Slots and vertices touched on one level, with their state before the edit."""
+
+    __slots__ = ("original", "old_incident")
+
+    def __init__(self) -> None:
+        self.original: Dict[int, Optional[Face]] = {}
+        self.old_incident: Dict[VertexId, Set[int]] = {}
+
+    def removed(self) -> Set[int]:
+        return {slot for slot, face in self.original.items() if face is not None}
+
+    def added(self, mesh: Polyhedron) -> Set[int]:
+        return {slot for slot in self.original if mesh.faces[slot] is not None}
+
+
+class DynamicPolygonHierarchy(DKHierarchy):
+    """DK hierarchy of a convex polygon with local repair on hull edits."""
+
+    def __init__(
+        self,
+        points: Sequence[Point],
+        degree_limit: int = 11,
+        max_children: Optional[int] = None,
+    ):
+        self.degree_limit = degree_limit
+        self.max_children = max_children or 2 * degree_limit
+        self.builds = 0
+        self.repairs = 0
+        self._rebuild([tuple(map(float, p)) for p in points])
+
+    @classmethod
+    def adopt(
+        cls,
+        hierarchy: DKHierarchy,
+        points: Sequence[Point],
+        degree_limit: int = 11,
+        max_children: Optional[int] = None,
+    ) -> "DynamicPolygonHierarchy":
+        """Wrap ``hierarchy_from_convex_polygon(points)`` without rebuilding it.
+
+        The topology stays shared with ``hierarchy`` until the first edit.
+        """
+        self = object.__new__(cls)
+        self.degree_limit = degree_limit
+        self.max_children = max_children or 2 * degree_limit
+        self.builds = 0
+        self.repairs = 0
+        self._reset(hierarchy, [tuple(map(float, p)) for p in points])
+        self._shared = True
+        return self
+
+    # --- state ------------------------------------------------------------
+    @property
+    def polygon(self) -> Tuple[Point, ...]:
+        return tuple(self._points)
+
+    def height_bound(self) -> int:
+        return 3 * math.ceil(math.log2(len(self._points) + 3)) + 2
+
+    def _reset(self, hierarchy: DKHierarchy, points: List[Point]) -> None:
+        self.levels = hierarchy.levels
+        self.inside_faces = hierarchy.inside_faces
+        self._points = points
+        self._orientation = 1.0 if signed_area(points) > 0 else -1.0
+        self._shared = False
+        self._refs: Optional[List[Tuple[Dict[int, Set[int]], Dict[int, Set[int]]]]] = None
+        self._ids: List[Dict[Tuple[float, ...], VertexId]] = []
+        self._free: List[List[int]] = []
+        self._edits = 0
+        self._budget = max(4, len(points) // 2)
+        self._violated = False
+        self._world_bounds = None
+
+    def _rebuild(self, points: List[Point]) -> None:
+        self._reset(hierarchy_from_convex_polygon(points, self.degree_limit), points)
+        self.builds += 1
+
+    def transformed(self, scale: float = 1.0, offset: Tuple[float, float] = (0.0, 0.0)) -> DKHierarchy:
+        self._shared = True
+        return super().transformed(scale, offset)
+
+    def with_transform(self, transform: Optional[Affine]) -> DKHierarchy:
+        self._shared = True
+        return super().with_transform(transform)
+
+    def _own(self) -> None:
+        """Copy-on-write of every level before the first in-place edit."""
+        if self._shared:
+            levels = []
+            for level in self.levels:
+                mesh = object.__new__(Polyhedron)
+                mesh.vertices = list(level.mesh.vertices)
+                mesh.faces = list(level.mesh.faces)
+                mesh.vertex_neighbors = [set(n) for n in level.mesh.vertex_neighbors]
+                mesh.vertex_faces = [set(f) for f in level.mesh.vertex_faces]
+                levels.append(HierarchyLevel(
+                    mesh,
+                    parents=list(level.parents) if level.parents is not None else None,
+                    bbox=level.bbox,
+                    face_bboxes=list(level.face_bboxes),
+                ))
+            self.levels = levels
+            self.inside_faces = set(self.inside_faces)
+            self._shared = False
+        if not isinstance(self.inside_faces, set):
+            self.inside_faces = set(self.inside_faces)
+        if self._refs is None:
+            self._index()
+
+    def _index(self) -> None:
+        """Reverse parent pointers and coordinate lookup, built on the first edit."""
+        self._refs = [({}, {})]
+        self._ids = []
+        self._free = []
+        for k, level in enumerate(self.levels):
+            mesh = level.mesh
+            self._ids.append({mesh.vertices[v]: v for v in range(mesh.num_vertices) if mesh.vertex_faces[v]})
+            self._free.append([slot for slot, face in enumerate(mesh.faces) if face is None])
+            if k:
+                self._refs.append(({}, {}))
+                for slot, pointer in enumerate(level.parents):
+                    self._link(k, slot, pointer)
+
+    # --- public edits -----------------------------------------------------
+    def delete_vertex(self, index: int) -> None:
+        """Remove the ``index``-th polygon vertex."""
+        points = self._points[:index] + self._points[index + 1:]
+        if len(points) < 3:
+            raise ValueError("A convex polygon needs at least three points")
+        if len(points) <= 4:
+            return self._rebuild(points)
+        self._own()
+        try:
+            self._delete(self._points[index])
+        except _Rebuild:
+            return self._rebuild(points)
+        self._points = points
+        self._finish()
+
+    def insert_vertex(self, index: int, point: Point) -> None:
+        """Insert ``point`` before the ``index``-th vertex; the polygon must stay strictly convex."""
+        point = tuple(map(float, point))
+        points = self._points[:index] + [point] + self._points[index:]
+        if not _strictly_convex(points, (index - 1, index, index + 1), self._orientation):
+            raise ValueError("The inserted vertex must keep the polygon strictly convex")
+        if len(self._points) <= 4:
+            return self._rebuild(points)
+        self._own()
+        before, after = self._points[index - 1], self._points[index % len(self._points)]
+        try:
+            self._insert(point, before, after)
+        except _Rebuild:
+            return self._rebuild(points)
+        self._points = points
+        self._finish()
+
+    def move_vertex(self, index: int, point: Point) -> None:
+        """Delete and reinsert the ``index``-th vertex at ``point``."""
+        point = tuple(map(float, point))
+        points = self._points[:index] + [point] + self._points[index + 1:]
+        if not _strictly_convex(points, (index - 1, index, index + 1), self._orientation):
+            raise ValueError("The moved vertex must keep the polygon strictly convex")
+        if len(points) <= 5:
+            return self._rebuild(points)
+        self.delete_vertex(index)
+        self.insert_vertex(index, point)
+
+    def _finish(self) -> None:
+        self._edits += 1
+        self.repairs += 1
+        bounds = polygon_bounds(self._points)
+        for level in self.levels:
+            level.bbox = bounds
+        self._world_bounds = None
+        if self._violated or self._edits > self._budget or len(self.levels) > self.height_bound():
+            self._rebuild(self._points)
+
+    # --- level edits ------------------------------------------------------
+    def _set_face(self, k: int, edit: _LevelEdit, slot: int, face: Optional[Sequence[VertexId]]) -> None:
+        level = self.levels[k]
+        mesh = level.mesh
+        if slot == len(mesh.faces):
+            mesh.faces.append(None)
+            level.face_bboxes.append(EMPTY_BOUNDS)
+            if level.parents is not None:
+                level.parents.append(None)
+        old = mesh.faces[slot]
+        edit.original.setdefault(slot, old)
+        new = Polyhedron._canonical_face(face) if face is not None else None
+        for v in (old or ()) + (new or ()):
+            if v not in edit.old_incident:
+                edit.old_incident[v] = set(mesh.vertex_faces[v])
+        for v in old or ():
+            mesh.vertex_faces[v].discard(slot)
+        mesh.faces[slot] = new
+        if new is None:
+            level.face_bboxes[slot] = EMPTY_BOUNDS
+            self._free[k].append(slot)
+            return
+        for v in new:
+            mesh.vertex_faces[v].add(slot)
+        level.face_bboxes[slot] = polygon_bounds(mesh.face_vertices(slot))
+
+    def _new_slot(self, k: int) -> int:
+        free = self._free[k]
+        return free.pop() if free else len(self.levels[k].mesh.faces)
+
+    def _close(self, k: int, edit: _LevelEdit) -> None:
+        mesh = self.levels[k].mesh
+        for v in edit.old_incident:
+            neighbors: Set[VertexId] = set()
+            for slot in mesh.vertex_faces[v]:
+                neighbors.update(mesh.faces[slot])
+            neighbors.discard(v)
+            mesh.vertex_neighbors[v] = neighbors
+
+    def _remove_vertex(self, k: int, v: VertexId, edit: _LevelEdit, hull_edge: Optional[Tuple[VertexId, VertexId]]) -> None:
+        mesh = self.levels[k].mesh
+        ring = mesh._ordered_vertex_ring(v)
+        star = sorted(mesh.vertex_faces[v])
+        if len(ring) != len(star):
+            raise _Rebuild()
+        chains: List[Tuple[List[VertexId], bool]] = [(ring, False)]
+        if hull_edge is not None:
+            # El hueco se parte por la nueva arista del contorno: un lado queda dentro
+            a, b = hull_edge
+            ia, ib = ring.index(a), ring.index(b)
+            n = len(ring)
+            first = [ring[(ia + i) % n] for i in range((ib - ia) % n + 1)]
+            second = [ring[(ib + i) % n] for i in range((ia - ib) % n + 1)]
+            step = mesh.vertex_faces[v] & mesh.vertex_faces[first[0]] & mesh.vertex_faces[first[1]]
+            first_inside = bool(step) and next(iter(step)) in self.inside_faces
+            chains = [(first, first_inside), (second, not first_inside)]
+        triangles = []
+        for chain, inside in chains:
+            if len(chain) < 3:
+                continue
+            found = triangulate_polygon([mesh.vertices[u] for u in chain])
+            if len(found) != len(chain) - 2:
+                raise _Rebuild()
+            triangles += [((chain[i], chain[j], chain[l]), inside) for i, j, l in found]
+        if k == 0:
+            self.inside_faces.difference_update(star)
+        for slot, (face, inside) in zip(star, triangles):
+            self._set_face(k, edit, slot, face)
+            if inside:
+                self.inside_faces.add(slot)
+        for slot in star[len(triangles):]:
+            self._set_face(k, edit, slot, None)
+        del self._ids[k][mesh.vertices[v]]
+        self._close(k, edit)
+
+    def _locate(self, point: Point, a: VertexId, b: VertexId) -> int:
+        """Walk from the outer face on hull edge ``a b`` to the face containing ``point``."""
+        mesh = self.levels[0].mesh
+        outside = [slot for slot in mesh.vertex_faces[a] & mesh.vertex_faces[b] if slot not in self.inside_faces]
+        if not outside:
+            raise _Rebuild()
+        current = outside[0]
+        for _ in range(len(mesh.faces)):
+            face = mesh.faces[current]
+            for i in range(3):
+                u, w, o = face[i], face[(i + 1) % 3], face[(i + 2) % 3]
+                pu, pw = mesh.vertices[u], mesh.vertices[w]
+                side = _orient(pu, pw, point)
+                if side == 0 or side * _orient(pu, pw, mesh.vertices[o]) > 0:
+                    continue
+                across = (mesh.vertex_faces[u] & mesh.vertex_faces[w]) - {current}
+                if not across:
+                    # Fuera del triangulo envolvente
+                    raise _Rebuild()
+                current = next(iter(across))
+                break
+            else:
+                corners = [mesh.vertices[u] for u in face]
+                if any(_orient(corners[i], corners[(i + 1) % 3], point) == 0 for i in range(3)):
+                    raise _Rebuild()
+                if current in self.inside_faces:
+                    raise _Rebuild()
+                return current
+        raise _Rebuild()
+
+    def _crossings(self, s: VertexId, t: VertexId) -> List[Tuple[VertexId, VertexId]]:
+        """Edges crossed by the segment ``s t``, walking from ``s``."""
+        mesh = self.levels[0].mesh
+        ps, pt = mesh.vertices[s], mesh.vertices[t]
+        side = lambda u: _orient(ps, pt, mesh.vertices[u])
+        ahead = lambda u: (mesh.vertices[u][0] - ps[0]) * (pt[0] - ps[0]) + (mesh.vertices[u][1] - ps[1]) * (pt[1] - ps[1]) > 0
+        edge = None
+        for slot in mesh.vertex_faces[s]:
+            u, w = [x for x in mesh.faces[slot] if x != s]
+            su, sw = side(u), side(w)
+            if (su == 0 and ahead(u)) or (sw == 0 and ahead(w)):
+                # Un vertice sobre el segmento: no hay arista que forzar
+                raise _Rebuild()
+            pu, pw = mesh.vertices[u], mesh.vertices[w]
+            if su * sw < 0 and _orient(pu, pw, ps) * _orient(pu, pw, pt) < 0:
+                edge, current = (u, w), slot
+                break
+        if edge is None:
+            raise _Rebuild()
+        crossed = []
+        while True:
+            crossed.append(edge)
+            u, w = edge
+            across = (mesh.vertex_faces[u] & mesh.vertex_faces[w]) - {current}
+            if not across:
+                raise _Rebuild()
+            current = next(iter(across))
+            (o,) = [x for x in mesh.faces[current] if x not in edge]
+            if o == t:
+                return crossed
+            so = side(o)
+            if so == 0:
+                raise _Rebuild()
+            edge = (o, w) if so * side(u) > 0 else (u, o)
+
+    def _force_edge(self, edit: _LevelEdit, s: VertexId, t: VertexId) -> None:
+        """Flip edges crossing ``s t`` until it is an edge of level 0 (Sloan)."""
+        mesh = self.levels[0].mesh
+        if mesh.vertex_faces[s] & mesh.vertex_faces[t]:
+            return
+        ps, pt = mesh.vertices[s], mesh.vertices[t]
+        queue = deque(self._crossings(s, t))
+        guard = 16 * (len(queue) + 1) ** 2
+        while queue:
+            guard -= 1
+            if guard < 0:
+                raise _Rebuild()
+            u, w = queue.popleft()
+            slots = list(mesh.vertex_faces[u] & mesh.vertex_faces[w])
+            if len(slots) != 2 or any(slot in self.inside_faces for slot in slots):
+                raise _Rebuild()
+            x = next(v for v in mesh.faces[slots[0]] if v not in (u, w))
+            y = next(v for v in mesh.faces[slots[1]] if v not in (u, w))
+            px, py, pu, pw = (mesh.vertices[v] for v in (x, y, u, w))
+            if _orient(px, py, pu) * _orient(px, py, pw) >= 0 or _orient(pu, pw, px) * _orient(pu, pw, py) >= 0:
+                queue.append((u, w))
+                continue
+            self._set_face(0, edit, slots[0], (x, u, y))
+            self._set_face(0, edit, slots[1], (x, y, w))
+            if s not in (x, y) and t not in (x, y) and (
+                _orient(ps, pt, px) * _orient(ps, pt, py) < 0 and _orient(px, py, ps) * _orient(px, py, pt) < 0
+            ):
+                queue.append((x, y))
+
+    def _insert(self, point: Point, before: Point, after: Point) -> None:
+        level = self.levels[0]
+        mesh = level.mesh
+        a, b = self._ids[0][before], self._ids[0][after]
+        slot = self._locate(point, a, b)
+        edit = _LevelEdit()
+        p = len(mesh.vertices)
+        mesh.vertices.append(point)
+        mesh.vertex_neighbors.append(set())
+        mesh.vertex_faces.append(set())
+        edit.old_incident[p] = set()
+        x, y, z = mesh.faces[slot]
+        self._set_face(0, edit, slot, (x, y, p))
+        self._set_face(0, edit, self._new_slot(0), (y, z, p))
+        self._set_face(0, edit, self._new_slot(0), (z, x, p))
+        self._force_edge(edit, p, a)
+        self._force_edge(edit, p, b)
+        hull = mesh.vertex_faces[a] & mesh.vertex_faces[b] & mesh.vertex_faces[p]
+        if len(hull) != 1:
+            raise _Rebuild()
+        self.inside_faces.add(next(iter(hull)))
+        self._ids[0][point] = p
+        self._close(0, edit)
+        if len(self.levels) > 1:
+            self._repair(1, edit, None, set())
+
+    def _delete(self, point: Point) -> None:
+        index = self._points.index(point)
+        n = len(self._points)
+        hull_edge = (self._ids[0][self._points[index - 1]], self._ids[0][self._points[(index + 1) % n]])
+        below: Optional[_LevelEdit] = None
+        for k in range(len(self.levels)):
+            v = self._ids[k].get(point)
+            if v is None:
+                self._repair(k, below, None, set())
+                return
+            mesh = self.levels[k].mesh
+            region: Set[int] = set()
+            if k:
+                for slot in mesh.vertex_faces[v]:
+                    region |= self._children(k, slot, below)
+            edit = _LevelEdit()
+            self._remove_vertex(k, v, edit, hull_edge if k == 0 else None)
+            if k:
+                self._repair(k, below, edit, region)
+            below = edit
+
+    # --- parent pointers --------------------------------------------------
+    def _link(self, k: int, slot: int, pointer: Optional[ParentPointer], add: bool = True) -> None:
+        if pointer is None:
+            return
+        face_refs, vertex_refs = self._refs[k]
+        if pointer.kind == "vertex":
+            table, keys = vertex_refs, (pointer.reference,)
+        else:
+            table, keys = face_refs, pointer.faces if pointer.kind == "faces" else (pointer.reference,)
+        for key in keys:
+            if add:
+                table.setdefault(key, set()).add(slot)
+            else:
+                table.get(key, set()).discard(slot)
+
+    def _children(self, k: int, slot: int, below: _LevelEdit) -> Set[int]:
+        """Children of ``slot`` as they were before the edit ``below`` of level ``k - 1``."""
+        pointer = self.levels[k].parents[slot]
+        if pointer.kind == "vertex":
+            incident = below.old_incident.get(pointer.reference)
+            return set(incident if incident is not None else self.levels[k - 1].mesh.vertex_faces[pointer.reference])
+        if pointer.kind == "faces":
+            return set(pointer.faces)
+        return {pointer.reference}
+
+    def _overlapping(self, k: int, slot: int, candidates: Set[int]) -> Set[int]:
+        level, lower = self.levels[k], self.levels[k - 1]
+        box = level.face_bboxes[slot]
+        triangle = level.mesh.face_vertices(slot)
+        return {
+            c for c in candidates
+            if lower.mesh.faces[c] is not None
+            and bounds_overlap(box, lower.face_bboxes[c])
+            and _triangles_overlap(triangle, lower.mesh.face_vertices(c))
+        }
+
+    def _set_pointer(self, k: int, slot: int, children: Set[int]) -> None:
+        level = self.levels[k]
+        if not children:
+            raise _Rebuild()
+        old = level.parents[slot]
+        self._link(k, slot, old, add=False)
+        lower = self.levels[k - 1].mesh
+        if len(children) == 1:
+            pointer = ParentPointer("face", next(iter(children)))
+        elif old is not None and old.kind == "vertex" and children == lower.vertex_faces[old.reference]:
+            pointer = old
+        else:
+            pointer = ParentPointer("faces", -1, tuple(sorted(children)))
+        if len(children) > self.max_children:
+            self._violated = True
+        level.parents[slot] = pointer
+        self._link(k, slot, pointer)
+
+    def _repair(self, k: int, below: _LevelEdit, here: Optional[_LevelEdit], region: Set[int]) -> None:
+        """Re-point level ``k`` after ``below`` edited level ``k - 1`` (and ``here`` edited level ``k``)."""
+        level, lower = self.levels[k], self.levels[k - 1].mesh
+        face_refs, vertex_refs = self._refs[k]
+        removed, added = below.removed(), below.added(lower)
+        affected: Set[int] = set()
+        for slot in removed:
+            affected |= face_refs.get(slot, set())
+        for v in below.old_incident:
+            affected |= vertex_refs.get(v, set())
+        edited = set(here.original) if here is not None else set()
+        for slot in affected - edited:
+            children = (self._children(k, slot, below) - removed) | self._overlapping(k, slot, added)
+            self._set_pointer(k, slot, children)
+        candidates = (region - removed) | added
+        for slot in edited:
+            if level.mesh.faces[slot] is None:
+                self._link(k, slot, level.parents[slot], add=False)
+                level.parents[slot] = None
+            else:
+                self._set_pointer(k, slot, self._overlapping(k, slot, candidates))
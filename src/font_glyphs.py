@@ -0,0 +1,332 @@
+"""Glyph source that reads outlines from a local TrueType font.
+
+Only what the atlas needs is parsed: ``head``, ``maxp``, ``cmap`` (formats 4
+and 12), ``loca`` and ``glyf`` (simple and composite glyphs). Quadratic
+curves are flattened to a tolerance relative to the cap height, the outline
+is simplified to the same tolerance and then split into convex pieces with
+Hertel-Mehlhorn.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.convex_decomposition import decompose_contours
+from src.letter_mesh import LETTER_GRIDS, generate_polygon_mesh
+
+
+Point = Tuple[float, float]
+RawPoint = Tuple[float, float, bool]
+
+_ARG_1_AND_2_ARE_WORDS = 0x0001
+_ARGS_ARE_XY_VALUES = 0x0002
+_WE_HAVE_A_SCALE = 0x0008
+_MORE_COMPONENTS = 0x0020
+_WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+_WE_HAVE_A_TWO_BY_TWO = 0x0080
+
+
+class TrueTypeFont:
+    """Minimal reader for TrueType (``glyf``) outlines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self.data = handle.read()
+        version = self.data[:4]
+        if version == b"OTTO":
+            raise ValueError(f"{path}: CFF outlines are not supported, use a TrueType font")
+        if version not in (b"\x00\x01\x00\x00", b"true"):
+            raise ValueError(f"{path}: not a TrueType font")
+        (num_tables,) = struct.unpack_from(">H", self.data, 4)
+        self.tables: Dict[str, Tuple[int, int]] = {}
+        for i in range(num_tables):
+            tag, _checksum, offset, length = struct.unpack_from(">4sIII", self.data, 12 + 16 * i)
+            self.tables[tag.decode("latin-1")] = (offset, length)
+        for tag in ("head", "maxp", "cmap", "loca", "glyf"):
+            if tag not in self.tables:
+                raise ValueError(f"{path}: missing '{tag}' table")
+        head = self.tables["head"][0]
+        (self.units_per_em,) = struct.unpack_from(">H", self.data, head + 18)
+        (index_format,) = struct.unpack_from(">h", self.data, head + 50)
+        (self.num_glyphs,) = struct.unpack_from(">H", self.data, self.tables["maxp"][0] + 4)
+        loca = self.tables["loca"][0]
+        if index_format == 0:
+            self._loca = [2 * v for v in struct.unpack_from(f">{self.num_glyphs + 1}H", self.data, loca)]
+        else:
+            self._loca = list(struct.unpack_from(f">{self.num_glyphs + 1}I", self.data, loca))
+        self._cmap = self._read_cmap()
+
+    # --- cmap ---------------------------------------------------------------
+    def _read_cmap(self) -> Dict[int, int]:
+        base = self.tables["cmap"][0]
+        (count,) = struct.unpack_from(">H", self.data, base + 2)
+        subtables = {}
+        for i in range(count):
+            platform, encoding, offset = struct.unpack_from(">HHI", self.data, base + 4 + 8 * i)
+            (fmt,) = struct.unpack_from(">H", self.data, base + offset)
+            subtables[(platform, encoding, fmt)] = base + offset
+        for key in ((3, 10, 12), (0, 4, 12), (0, 6, 12), (3, 1, 4), (0, 3, 4), (0, 4, 4), (0, 1, 4), (0, 0, 4)):
+            if key in subtables:
+                reader = self._cmap_format12 if key[2] == 12 else self._cmap_format4
+                return reader(subtables[key])
+        raise ValueError(f"{self.path}: no Unicode cmap subtable")
+
+    def _cmap_format4(self, offset: int) -> Dict[int, int]:
+        (seg_x2,) = struct.unpack_from(">H", self.data, offset + 6)
+        seg = seg_x2 // 2
+        ends = struct.unpack_from(f">{seg}H", self.data, offset + 14)
+        starts = struct.unpack_from(f">{seg}H", self.data, offset + 16 + seg_x2)
+        deltas = struct.unpack_from(f">{seg}h", self.data, offset + 16 + 2 * seg_x2)
+        range_base = offset + 16 + 3 * seg_x2
+        ranges = struct.unpack_from(f">{seg}H", self.data, range_base)
+        mapping = {}
+        for i in range(seg):
+            for code in range(starts[i], ends[i] + 1):
+                if code == 0xFFFF:
+                    continue
+                if ranges[i] == 0:
+                    glyph = (code + deltas[i]) & 0xFFFF
+                else:
+                    pos = range_base + 2 * i + ranges[i] + 2 * (code - starts[i])
+                    (glyph,) = struct.unpack_from(">H", self.data, pos)
+                    if glyph:
+                        glyph = (glyph + deltas[i]) & 0xFFFF
+                if glyph:
+                    mapping[code] = glyph
+        return mapping
+
+    def _cmap_format12(self, offset: int) -> Dict[int, int]:
+        (groups,) = struct.unpack_from(">I", self.data, offset + 12)
+        mapping = {}
+        for i in range(groups):
+            start, end, glyph = struct.unpack_from(">III", self.data, offset + 16 + 12 * i)
+            for code in range(start, end + 1):
+                mapping[code] = glyph + code - start
+        return mapping
+
+    def glyph_index(self, char: str) -> Optional[int]:
+        return self._cmap.get(ord(char))
+
+    # --- glyf ---------------------------------------------------------------
+    def glyph_bounds(self, glyph: int) -> Optional[Tuple[int, int, int, int]]:
+        start, end = self._loca[glyph], self._loca[glyph + 1]
+        if start == end:
+            return None
+        _, x_min, y_min, x_max, y_max = struct.unpack_from(">hhhhh", self.data, self.tables["glyf"][0] + start)
+        return (x_min, y_min, x_max, y_max)
+
+    def glyph_contours(self, glyph: int, depth: int = 0) -> List[List[RawPoint]]:
+        """Raw contours as ``(x, y, on_curve)`` points in font units."""
+        start, end = self._loca[glyph], self._loca[glyph + 1]
+        if start == end or depth > 8:
+            return []
+        offset = self.tables["glyf"][0] + start
+        (num_contours,) = struct.unpack_from(">h", self.data, offset)
+        if num_contours >= 0:
+            return self._simple_glyph(offset, num_contours)
+        return self._composite_glyph(offset, depth)
+
+    def _simple_glyph(self, offset: int, num_contours: int) -> List[List[RawPoint]]:
+        pos = offset + 10
+        end_points = struct.unpack_from(f">{num_contours}H", self.data, pos)
+        pos += 2 * num_contours
+        (instruction_length,) = struct.unpack_from(">H", self.data, pos)
+        pos += 2 + instruction_length
+        num_points = end_points[-1] + 1 if end_points else 0
+        flags: List[int] = []
+        while len(flags) < num_points:
+            flag = self.data[pos]
+            pos += 1
+            flags.append(flag)
+            if flag & 0x08:
+                repeat = self.data[pos]
+                pos += 1
+                flags.extend([flag] * repeat)
+        coords = []
+        for short_bit, same_bit in ((0x02, 0x10), (0x04, 0x20)):
+            values, value = [], 0
+            for flag in flags[:num_points]:
+                if flag & short_bit:
+                    delta = self.data[pos]
+                    pos += 1
+                    value += delta if flag & same_bit else -delta
+                elif not flag & same_bit:
+                    (delta,) = struct.unpack_from(">h", self.data, pos)
+                    pos += 2
+                    value += delta
+                values.append(value)
+            coords.append(values)
+        xs, ys = coords
+        contours, first = [], 0
+        for last in end_points:
+            contours.append([(float(xs[i]), float(ys[i]), bool(flags[i] & 0x01)) for i in range(first, last + 1)])
+            first = last + 1
+        return contours
+
+    def _composite_glyph(self, offset: int, depth: int) -> List[List[RawPoint]]:
+        pos = offset + 10
+        contours: List[List[RawPoint]] = []
+        while True:
+            flags, glyph = struct.unpack_from(">HH", self.data, pos)
+            pos += 4
+            if flags & _ARG_1_AND_2_ARE_WORDS:
+                dx, dy = struct.unpack_from(">hh", self.data, pos)
+                pos += 4
+            else:
+                dx, dy = struct.unpack_from(">bb", self.data, pos)
+                pos += 2
+            if not flags & _ARGS_ARE_XY_VALUES:
+                # Alineacion por puntos: no hace falta para las letras del atlas
+                dx = dy = 0
+            a, b, c, d = 1.0, 0.0, 0.0, 1.0
+            if flags & _WE_HAVE_A_SCALE:
+                (a,) = struct.unpack_from(">h", self.data, pos)
+                a = d = a / 16384.0
+                pos += 2
+            elif flags & _WE_HAVE_AN_X_AND_Y_SCALE:
+                a, d = (v / 16384.0 for v in struct.unpack_from(">hh", self.data, pos))
+                pos += 4
+            elif flags & _WE_HAVE_A_TWO_BY_TWO:
+                a, b, c, d = (v / 16384.0 for v in struct.unpack_from(">hhhh", self.data, pos))
+                pos += 8
+            for contour in self.glyph_contours(glyph, depth + 1):
+                contours.append([(a * x + c * y + dx, b * x + d * y + dy, on) for x, y, on in contour])
+            if not flags & _MORE_COMPONENTS:
+                break
+        return contours
+
+
+def flatten_contour(points: Sequence[RawPoint], tolerance: float) -> List[Point]:
+    """Flatten a TrueType contour (quadratic B-splines) into a polyline."""
+    n = len(points)
+    if n == 0:
+        return []
+    start = next((i for i, p in enumerate(points) if p[2]), None)
+    if start is None:
+        # Todos fuera de la curva: empezar en el punto medio implicito
+        (x0, y0, _), (x1, y1, _) = points[0], points[1 % n]
+        ordered = [((x0 + x1) / 2, (y0 + y1) / 2, True)] + list(points[1:]) + [points[0]]
+    else:
+        ordered = list(points[start:]) + list(points[:start])
+    out: List[Point] = [(ordered[0][0], ordered[0][1])]
+    current = out[0]
+    control: Optional[Point] = None
+    for x, y, on in ordered[1:] + [ordered[0]]:
+        if on:
+            if control is None:
+                out.append((x, y))
+            else:
+                out.extend(_quadratic(current, control, (x, y), tolerance))
+                control = None
+            current = (x, y)
+        elif control is None:
+            control = (x, y)
+        else:
+            mid = ((control[0] + x) / 2, (control[1] + y) / 2)
+            out.extend(_quadratic(current, control, mid, tolerance))
+            current, control = mid, (x, y)
+    return out[:-1] if len(out) > 1 and out[-1] == out[0] else out
+
+
+def simplify_contour(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """Douglas-Peucker on a closed polyline, anchored at its two farthest-apart vertices."""
+    n = len(points)
+    if n <= 4:
+        return list(points)
+    far = max(range(n), key=lambda i: (points[i][0] - points[0][0]) ** 2 + (points[i][1] - points[0][1]) ** 2)
+    ring = list(points[far:]) + list(points[:far])
+    split = max(range(n), key=lambda i: (ring[i][0] - ring[0][0]) ** 2 + (ring[i][1] - ring[0][1]) ** 2)
+    first = _douglas_peucker(ring[: split + 1], tolerance)
+    second = _douglas_peucker(ring[split:] + [ring[0]], tolerance)
+    return first[:-1] + second[:-1]
+
+
+def _douglas_peucker(points: List[Point], tolerance: float) -> List[Point]:
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        (ax, ay), (bx, by) = points[lo], points[hi]
+        length = math.hypot(bx - ax, by - ay)
+        best, best_dist = -1, tolerance
+        for i in range(lo + 1, hi):
+            px, py = points[i]
+            if length == 0:
+                dist = math.hypot(px - ax, py - ay)
+            else:
+                dist = abs((bx - ax) * (ay - py) - (ax - px) * (by - ay)) / length
+            if dist > best_dist:
+                best, best_dist = i, dist
+        if best >= 0:
+            keep[best] = True
+            stack.append((lo, best))
+            stack.append((best, hi))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _quadratic(p0: Point, c: Point, p2: Point, tolerance: float) -> List[Point]:
+    ddx = p0[0] - 2 * c[0] + p2[0]
+    ddy = p0[1] - 2 * c[1] + p2[1]
+    steps = max(1, int(math.ceil(math.sqrt(math.hypot(ddx, ddy) / (8 * tolerance)))))
+    out = []
+    for i in range(1, steps + 1):
+        t = i / steps
+        u = 1 - t
+        out.append((u * u * p0[0] + 2 * u * t * c[0] + t * t * p2[0], u * u * p0[1] + 2 * u * t * c[1] + t * t * p2[1]))
+    return out
+
+
+class FontGlyphSource:
+    """Glyph source for the atlas built from a TrueType font.
+
+    Glyphs are normalized so the cap height spans the same unit box as the
+    block glyphs (y grows downwards, the baseline sits at ``y = 1``).
+    ``flatness`` is the maximum curve deviation as a fraction of the cap height.
+    """
+
+    def __init__(self, path: str, flatness: float = 0.02, charset: Optional[str] = None):
+        self.font = TrueTypeFont(path)
+        self.flatness = flatness
+        self.name = f"font:{os.path.basename(path)}"
+        self._charset = charset
+        cap = None
+        h_glyph = self.font.glyph_index("H")
+        if h_glyph is not None:
+            bounds = self.font.glyph_bounds(h_glyph)
+            cap = bounds[3] if bounds else None
+        self.cap_height = float(cap or 0.7 * self.font.units_per_em)
+
+    def charset(self) -> str:
+        chars = self._charset if self._charset is not None else "".join(LETTER_GRIDS)
+        return "".join(c for c in chars if self.has_glyph(c))
+
+    def has_glyph(self, char: str) -> bool:
+        return self.font.glyph_index(char) is not None
+
+    def contours(self, char: str) -> List[List[Point]]:
+        glyph = self.font.glyph_index(char)
+        if glyph is None:
+            return []
+        tolerance = self.flatness * self.cap_height
+        cap = self.cap_height
+        return [
+            [(x / cap, (cap - y) / cap) for x, y in simplify_contour(flatten_contour(contour, tolerance), tolerance)]
+            for contour in self.font.glyph_contours(glyph)
+        ]
+
+    def polygons(self, char: str) -> List[List[Point]]:
+        if not self.has_glyph(char):
+            return generate_polygon_mesh(char, 1.0)
+        return decompose_contours(self.contours(char))
+
+    def fingerprint(self) -> bytes:
+        digest = hashlib.md5(self.name.encode("utf-8"))
+        digest.update(hashlib.md5(self.font.data).digest())
+        digest.update(repr(self.flatness).encode("ascii"))
+        digest.update(self.charset().encode("utf-8"))
+        return digest.digest()
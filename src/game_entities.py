@@ -1,62 +1,254 @@
 # src/game_entities.py
-import pygame
-from src.letter_mesh import generate_polygon_mesh
-from src.dk_hierarchy import polyhedron_from_convex_polygon, DKHierarchy
+"""Logica de la escena (piezas, letras, palabra). Sin pygame: el dibujo vive
+en ``src.renderer`` y este modulo se puede importar desde herramientas y
+procesos sin ventana."""
+import bisect
+import math
+import queue
+import threading
+
+from src.dk_hierarchy import Affine
+from src.geometry import polygon_bounds, segment_hits_convex
+from src.glyph_atlas import default_atlas
+from src.point_location import PointLocator
+from src.query_engine import choose_engine
+from src.scene_grid import SceneGrid
+
+# Desde cuantas piezas ``piece_at`` usa el localizador de la escena; por debajo
+# la busqueda binaria por letras ya es igual de rapida y no construye nada
+LOCATOR_MIN_PIECES = 1000
+# ``piece_at`` prueba el segmento del puntero a este desplazamiento (en x e y)
+VALID_AREA_OFFSET = 0.1
 
 class PixelGoal:
-    def __init__(self, vertices):
-        self.vertices = vertices 
+    """``coverage`` (``CoverageRule``) pide pintar una fraccion del area para
+    completar la pieza; sin ella basta con tocarla con el click.
+
+    Con ``transform`` (``Affine``) los vertices y la jerarquia estan en
+    coordenadas locales del glifo y ``transform`` los lleva al mundo: mover,
+    escalar o girar la pieza (``set_transform``) es O(1) y no reconstruye
+    nada.
+
+    Las consultas las responde el motor mas barato para el numero de
+    vertices (``src.query_engine``) segun ``model`` (``EngineModel``, el de
+    la sesion): ``engine`` dice cual y se puede forzar al crear la pieza.
+    ``hierarchy`` solo se usa (o se construye) con ``dk``."""
+
+    def __init__(self, vertices, hierarchy=None, coverage=None, transform=None, engine=None, model=None):
+        self.local_vertices = vertices
         self.completed = False
         self.highlight = False
-        poly = polyhedron_from_convex_polygon(self.vertices)
-        self.hierarchy = DKHierarchy.build(poly)
+        self.engine, self.local_hierarchy = choose_engine(vertices, hierarchy, engine, model)
+        self.coverage = coverage
+        # Rejilla de cobertura (en coordenadas locales), creada con la primera pincelada
+        self.raster = None
+        self.set_transform(transform)
+
+    def set_transform(self, transform):
+        self.transform = transform
+        if transform is None:
+            self.hierarchy = self.local_hierarchy
+            self._inverse = None
+        else:
+            self.hierarchy = self.local_hierarchy.with_transform(transform)
+            self._inverse = transform.inverse()
+        # Los vertices del mundo se calculan al pedirlos
+        self._vertices = None
+
+    @property
+    def vertices(self):
+        if self._vertices is None:
+            if self.transform is None: self._vertices = self.local_vertices
+            else: self._vertices = [self.transform.apply(v) for v in self.local_vertices]
+        return self._vertices
     
     def check_collision(self, last_pos, curr_pos):
         return self.hierarchy.intersects_segment(last_pos, curr_pos)
 
     def update(self, last_pos_world, curr_pos_world, is_clicking):
+        return self.update_polyline((last_pos_world, curr_pos_world), is_clicking)
+
+    def update_polyline(self, points, is_clicking):
+        """Como ``update`` pero con todos los puntos del trazo desde el ultimo frame."""
         if self.completed: return False
         
-        if self.check_collision(last_pos_world, curr_pos_world):
+        if self.hierarchy.intersects_polyline(points):
             self.highlight = True
             if is_clicking:
+                if self.coverage is not None and not self._paint(points): return False
                 self.completed = True
                 return True
         else:
             self.highlight = False
         return False
     
+    def _paint(self, points):
+        """Pinta en coordenadas locales; True si ya se cubre la fraccion pedida."""
+        if self.raster is None: self.raster = self.coverage.raster(self.local_vertices)
+        radius = self.coverage.brush_radius
+        if self._inverse is not None:
+            points = [self._inverse.apply(p) for p in points]
+            radius /= self.transform.scale_factor
+        return self.raster.paint(points, radius) >= self.coverage.threshold
+
     def get_debug_trace(self, last_pos_world, curr_pos_world):
         return self.hierarchy.trace_intersection(last_pos_world, curr_pos_world)
 
 class LetterGoal:
-    def __init__(self, char, x, y, scale=50):
+    """Letra de la palabra. Guarda solo su layout hasta que se llama a ``build``."""
+
+    def __init__(self, char, x, y, scale=50, atlas=None, coverage=None, engine_model=None):
         self.char = char
-        raw_polys = generate_polygon_mesh(char, scale)
+        self.x = x
+        self.y = y
+        self.scale = scale
+        self.atlas = atlas or default_atlas()
+        self.coverage = coverage
+        self.engine_model = engine_model
+        self.piece_count = self.atlas.piece_count(char)
+        # Id global de la primera pieza en la escena (lo asigna la palabra)
+        self.first_piece = 0
+        # Rango horizontal que ocupa la letra (para ventanas de camara)
+        bounds = self.atlas.glyph_bounds(char)
+        self.min_x = x + bounds[0] * scale
+        self.max_x = x + bounds[2] * scale
         self.pixels = []
-        for raw_poly in raw_polys:
-            vertices = [(px + x, py + y) for px, py in raw_poly]
-            self.pixels.append(PixelGoal(vertices))
+        self.is_built = False
+        self._saved_completed = None
+        self._saved_rasters = None
+        self.prefetch_requested = False
+        self._build_lock = threading.Lock()
+
+    def build(self, prefetch=False):
+        if self.is_built: return
+        with self._build_lock:
+            if self.is_built: return
+            # Una precarga cancelada (la letra se libero mientras esperaba) no construye
+            if prefetch and not self.prefetch_requested: return
+            # Piezas y jerarquias ya construidas en el atlas (escala 1): solo se colocan
+            placement = self.placement()
+            pixels = [
+                PixelGoal(piece.vertices, piece.hierarchy, self.coverage, placement, model=self.engine_model)
+                for piece in self.atlas.unit_glyph(self.char)
+            ]
+            if self._saved_completed:
+                for pixel, completed, raster in zip(pixels, self._saved_completed, self._saved_rasters):
+                    pixel.completed = completed
+                    pixel.raster = raster
+            self.pixels = pixels
+            self.is_built = True
+
+    def placement(self):
+        return Affine.placement(self.scale, (self.x, self.y))
+
+    def place(self, x, y, scale=None):
+        """Mueve (y reescala) la letra: O(1) por pieza, las jerarquias no cambian."""
+        with self._build_lock:
+            self.x, self.y = x, y
+            if scale is not None: self.scale = scale
+            bounds = self.atlas.glyph_bounds(self.char)
+            self.min_x = x + bounds[0] * self.scale
+            self.max_x = x + bounds[2] * self.scale
+            placement = self.placement()
+            for pixel in self.pixels:
+                pixel.set_transform(placement)
+
+    def release(self):
+        """Libera la geometria conservando que piezas estaban completas."""
+        with self._build_lock:
+            self.prefetch_requested = False
+            if not self.is_built: return
+            self._saved_completed = [pixel.completed for pixel in self.pixels]
+            self._saved_rasters = [pixel.raster for pixel in self.pixels]
+            self.is_built = False
+            self.pixels = []
         
     def update(self, last_pos, curr_pos, is_clicking, sound_effect=None):
+        self.update_polyline((last_pos, curr_pos), is_clicking, sound_effect)
+
+    def update_polyline(self, points, is_clicking, sound_effect=None):
         hit_any = False
         for pixel in self.pixels:
-            if pixel.update(last_pos, curr_pos, is_clicking):
+            if pixel.update_polyline(points, is_clicking):
                 hit_any = True
         if hit_any and sound_effect:
             sound_effect.play()
 
+    def clear_highlight(self):
+        for pixel in self.pixels:
+            pixel.highlight = False
+
+    def completed_count(self):
+        if not self.is_built: return sum(self._saved_completed or ())
+        return sum(1 for pixel in self.pixels if pixel.completed)
+
     def is_completed(self):
-        return all(pixel.completed for pixel in self.pixels)
+        return self.completed_count() == self.piece_count
+
+class LetterBuilder:
+    """Hilo de fondo que construye las letras que se acercan a la camara."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = set()
+        self.thread = None
+        self.closed = False
+
+    def submit(self, letter):
+        if letter.is_built or self.closed: return
+        letter.prefetch_requested = True
+        if id(letter) in self.pending: return
+        self.pending.add(id(letter))
+        self.queue.put(letter)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="letter-builder", daemon=True)
+            self.thread.start()
+
+    def close(self):
+        """Termina el hilo sin construir lo que queda en la cola (la palabra se descarta)."""
+        self.closed = True
+        if self.thread is not None: self.queue.put(None)
+        self.thread = None
+
+    def _run(self):
+        while True:
+            letter = self.queue.get()
+            # El hilo no debe mantener vivas las letras de una palabra descartada
+            if letter is None or self.closed: return
+            self.pending.discard(id(letter))
+            letter.build(prefetch=True)
+            del letter
 
 class WordGoal:
-    def __init__(self, word, start_y, screen_width, scale=50):
-        self.polygons = []
+    # Localizador de puntos de toda la escena (``piece_at``), construido al primer uso
+    _locator = None
+    _locator_thread = None
+    _locator_generation = 0
+    # Rejilla de las cajas de todas las piezas (``pieces_hit_by``), construida al primer uso
+    _grid = None
+
+    def __init__(self, word, start_y, screen_width, scale=50, prefetch_margin=None, background_build=True, atlas=None,
+                 coverage=None, engine_model=None):
+        self.word = word
+        # Solo layout: las jerarquias se construyen cuando la camara se acerca
+        self.polygons = [
+            LetterGoal(char, x, start_y, scale, atlas, coverage, engine_model)
+            for char, x in self._layout(screen_width, scale)
+        ]
+        self.scale = scale
+        self.prefetch_margin = screen_width if prefetch_margin is None else prefetch_margin
+        self.builder = LetterBuilder() if background_build else None
+        self._index_letters()
+        self._highlighted = []
+        self.total_pieces = number_pieces(self.polygons)
+
+    def _layout(self, screen_width, scale):
+        """``(caracter, x)`` de cada letra (los espacios solo avanzan); fija ``total_width``."""
         letter_spacing = scale * 1.5 
         word_spacing = scale * 1.0
         
         calculated_width = 0
-        for char in word:
+        for char in self.word:
             if char == ' ': calculated_width += word_spacing
             else: calculated_width += letter_spacing
         
@@ -65,59 +257,226 @@ class WordGoal:
         else:
             start_x = 50
 
+        positions = []
         current_x = start_x
-        for char in word:
+        for char in self.word:
             if char == ' ':
                 current_x += word_spacing
             else:
-                self.polygons.append(LetterGoal(char, current_x, start_y, scale))
+                positions.append((char, current_x))
                 current_x += letter_spacing
             
         self.total_width = max(calculated_width + 100, screen_width)
+        return positions
+
+    def _index_letters(self):
+        self._letter_starts = [letter.x for letter in self.polygons]
+        self._reach_left = max((letter.x - letter.min_x for letter in self.polygons), default=0)
+        self._reach_right = max((letter.max_x - letter.x for letter in self.polygons), default=0)
+
+    def relayout(self, start_y, screen_width, scale=None):
+        """Recoloca la palabra (ventana redimensionada, zoom) moviendo cada pieza
+        con su transformacion, sin reconstruir jerarquias."""
+        scale = scale or self.scale
+        for letter, (_, x) in zip(self.polygons, self._layout(screen_width, scale)):
+            letter.place(x, start_y, scale)
+        self.scale = scale
+        self._index_letters()
+        self._reset_locator()
+        self._grid = None
+
+    def letters_in_range(self, min_x, max_x):
+        """Letras cuyo rango horizontal toca [min_x, max_x] (busqueda binaria)."""
+        first = bisect.bisect_left(self._letter_starts, min_x - self._reach_right)
+        last = bisect.bisect_right(self._letter_starts, max_x + self._reach_left)
+        return [
+            letter for letter in self.polygons[first:last]
+            if letter.max_x >= min_x and letter.min_x <= max_x
+        ]
+
+    def set_view(self, camera_x, view_width):
+        """Construye lo visible y encola (o construye) lo que esta dentro del margen."""
+        for letter in self.letters_in_range(camera_x, camera_x + view_width):
+            letter.build()
+        margin = self.prefetch_margin
+        for letter in self.letters_in_range(camera_x - margin, camera_x + view_width + margin):
+            if letter.is_built: continue
+            if self.builder: self.builder.submit(letter)
+            else: letter.build()
 
     def update(self, last_pos, curr_pos, is_clicking, sound_effect=None):
-        for poly in self.polygons:
-            poly.update(last_pos, curr_pos, is_clicking, sound_effect)
+        self.update_polyline((last_pos, curr_pos), is_clicking, sound_effect)
 
-    def is_inside_valid_area(self, curr_pos_world):
+    def update_polyline(self, points, is_clicking, sound_effect=None):
+        """Una sola consulta por frame con todo el trazo (varios eventos de movimiento).
+
+        Solo se prueban las piezas de las celdas que cruza el trazo
+        (``scene_grid``): el coste depende de su longitud, no del tamano de la escena."""
+        if not points: return
+        highlighted = []
+        completed_letters = set()
+        for piece in self.scene_grid().candidates_along(points):
+            letter, pixel = self._piece(piece)
+            if pixel.update_polyline(points, is_clicking): completed_letters.add(id(letter))
+            if pixel.highlight: highlighted.append(pixel)
+        # Un sonido por letra con piezas completadas, como ``LetterGoal.update_polyline``
+        if sound_effect:
+            for _ in completed_letters: sound_effect.play()
+        current = set(map(id, highlighted))
+        for pixel in self._highlighted:
+            if id(pixel) not in current: pixel.highlight = False
+        self._highlighted = highlighted
+
+    def pieces_hit_by(self, start, end):
+        """Ids globales de las piezas que toca el segmento."""
+        return self.pieces_hit_by_polyline((start, end))
+
+    def pieces_hit_by_polyline(self, points):
+        """Ids globales (ordenados) de las piezas que toca la polilinea; O(celdas + piezas cercanas)."""
+        hits = []
+        for piece in self.scene_grid().candidates_along(points):
+            if self._piece(piece)[1].hierarchy.intersects_polyline(points): hits.append(piece)
+        return sorted(hits)
+
+    def scene_grid(self):
+        """``SceneGrid`` con la caja en el mundo de cada pieza (ids globales).
+
+        Sale de los contornos del atlas y la colocacion de cada letra: no
+        construye ninguna letra."""
+        if self._grid is None:
+            entries = []
+            unit_bounds = {}
+            for letter in self.polygons:
+                boxes = unit_bounds.get(letter.char)
+                if boxes is None:
+                    boxes = [polygon_bounds(piece.vertices) for piece in letter.atlas.unit_glyph(letter.char)]
+                    unit_bounds[letter.char] = boxes
+                placement = letter.placement()
+                entries.extend((letter.first_piece + index, placement.map_bounds(box)) for index, box in enumerate(boxes))
+            self._piece_starts = [letter.first_piece for letter in self.polygons]
+            self._grid = SceneGrid(entries)
+        return self._grid
+
+    def _piece(self, piece):
+        """``(letra, PixelGoal)`` de un id global; construye la letra si hace falta."""
+        letter = self.polygons[bisect.bisect_right(self._piece_starts, piece) - 1]
+        letter.build()
+        return letter, letter.pixels[piece - letter.first_piece]
+
+    def piece_at(self, curr_pos_world):
+        """Id global de la pieza bajo el puntero, o -1 si esta fuera.
+
+        El puntero es el segmento ``p1 -> p1 + VALID_AREA_OFFSET`` contra las
+        piezas cerradas (la regla de ``src.batch_score``): cuenta la de menor
+        id que contiene ``p1`` o, si ninguna, la de menor id que toca el segmento.
+
+        En escenas grandes ``p1`` se resuelve con el localizador de la escena
+        (O(log N)) y el resto del segmento con ``scene_grid``, sin construir
+        letras; mientras el localizador se construye (en segundo plano si la
+        palabra tiene ``builder``) se pregunta a las letras cercanas."""
         p1 = curr_pos_world
-        p2 = (curr_pos_world[0] + 0.1, curr_pos_world[1] + 0.1)
-        for letter in self.polygons:
-            for pixel in letter.pixels:
+        p2 = (p1[0] + VALID_AREA_OFFSET, p1[1] + VALID_AREA_OFFSET)
+        locator = self.scene_locator()
+        if locator is not None:
+            piece = locator.locate(p1)
+            if piece >= 0: return piece
+            hits = [piece for piece in self.scene_grid().candidates_along((p1, p2))
+                    if segment_hits_convex(p1, p2, self._piece_polygon(piece))]
+            return min(hits, default=-1)
+        hits = []
+        for letter in self.letters_in_range(p1[0], p2[0]):
+            letter.build()
+            for index, pixel in enumerate(letter.pixels):
                 if pixel.check_collision(p1, p2):
-                    return True
-        return False
+                    hits.append((not pixel.check_collision(p1, p1), letter.first_piece + index))
+        return min(hits)[1] if hits else -1
+
+    def _piece_polygon(self, piece):
+        """Contorno en el mundo de una pieza (id global) sin construir su letra."""
+        letter = self.polygons[bisect.bisect_right(self._piece_starts, piece) - 1]
+        placement = letter.placement()
+        return [placement.apply(v) for v in letter.atlas.unit_glyph(letter.char)[piece - letter.first_piece].vertices]
+
+    def scene_locator(self):
+        """``PointLocator`` de todas las piezas (ids globales), o None si aun se
+        construye o la escena es pequena (``LOCATOR_MIN_PIECES``)."""
+        if self.total_pieces < LOCATOR_MIN_PIECES: return None
+        if self._locator is None and self._locator_thread is None:
+            if self.builder is None: self._build_locator(self._locator_generation)
+            else:
+                self._locator_thread = threading.Thread(target=self._build_locator, args=(self._locator_generation,),
+                                                        name="point-locator", daemon=True)
+                self._locator_thread.start()
+        return self._locator
+
+    def _build_locator(self, generation):
+        # Contornos del atlas colocados con la transformacion de cada letra: no hace falta construirlas
+        regions = []
+        for letter in self.polygons:
+            placement = letter.placement()
+            for index, piece in enumerate(letter.atlas.unit_glyph(letter.char)):
+                regions.append((letter.first_piece + index, [placement.apply(v) for v in piece.vertices]))
+        locator = PointLocator.from_regions(regions)
+        # Una recolocacion durante la construccion deja este localizador obsoleto
+        if generation == self._locator_generation: self._locator = locator
+
+    def _reset_locator(self):
+        self._locator_generation += 1
+        self._locator = None
+        self._locator_thread = None
+
+    def close(self):
+        """Para el hilo de precarga; se llama al descartar la palabra."""
+        if self.builder: self.builder.close()
+
+    def is_inside_valid_area(self, curr_pos_world):
+        return self.piece_at(curr_pos_world) >= 0
 
     def is_completed(self):
         return all(poly.is_completed() for poly in self.polygons)
     
     def get_progress(self):
-        total = 0
-        comp = 0
-        for letter in self.polygons:
-            for pixel in letter.pixels:
-                total += 1
-                if pixel.completed: comp += 1
+        total = self.total_pieces
+        comp = sum(letter.completed_count() for letter in self.polygons)
         return (comp / total) * 100 if total > 0 else 0
 
-    def draw(self, surface, camera_x):
-        for letter in self.polygons:
-            for pixel in letter.pixels:
-                screen_vertices = [(v[0] - camera_x, v[1]) for v in pixel.vertices]
-                if any(-50 < v[0] < surface.get_width() + 50 for v in screen_vertices):
-                    color = (0, 255, 0) if pixel.completed else ((255, 255, 0) if pixel.highlight else (100, 100, 255))
-                    pygame.draw.polygon(surface, color, screen_vertices, 0)
-                    pygame.draw.polygon(surface, (50, 50, 50), screen_vertices, 1)
+    def visible_pixels(self, camera_x, view_width, margin=50):
+        for letter in self.letters_in_range(camera_x - margin, camera_x + view_width + margin):
+            letter.build()
+            yield from letter.pixels
+
+
+def number_pieces(letters):
+    """Asigna ``first_piece`` a cada letra en orden; devuelve el total de piezas."""
+    total = 0
+    for letter in letters:
+        letter.first_piece = total
+        total += letter.piece_count
+    return total
+
 
 def get_closest_pixel(word_goal, pos_world):
-    closest = None
-    min_dist = float('inf')
-    for letter in word_goal.polygons:
-        for pixel in letter.pixels:
-            cx = sum(v[0] for v in pixel.vertices) / len(pixel.vertices)
-            cy = sum(v[1] for v in pixel.vertices) / len(pixel.vertices)
-            dist = (cx - pos_world[0])**2 + (cy - pos_world[1])**2
-            if dist < min_dist:
-                min_dist = dist
-                closest = pixel
-    return closest
\ No newline at end of file
+    """Pieza de centro mas cercano a ``pos_world`` en toda la palabra (None si no hay piezas).
+
+    Solo construye las letras de una ventana horizontal alrededor del
+    puntero; la ventana crece hasta contener la distancia de la mejor pieza,
+    asi que ninguna letra de fuera puede estar mas cerca."""
+    if not word_goal.total_pieces: return None
+    reach = word_goal.scale * 2
+    while True:
+        closest = None
+        min_dist = float('inf')
+        for letter in word_goal.letters_in_range(pos_world[0] - reach, pos_world[0] + reach):
+            letter.build()
+            for pixel in letter.pixels:
+                cx = sum(v[0] for v in pixel.vertices) / len(pixel.vertices)
+                cy = sum(v[1] for v in pixel.vertices) / len(pixel.vertices)
+                dist = (cx - pos_world[0])**2 + (cy - pos_world[1])**2
+                if dist < min_dist:
+                    min_dist = dist
+                    closest = pixel
+        if closest is not None:
+            if math.sqrt(min_dist) <= reach: return closest
+            reach = math.sqrt(min_dist)
+        else:
+            reach *= 2
\ No newline at end of file
@@ -45,18 +45,57 @@ def bounds_overlap(b1, b2):
 def segment_bounds(p1, p2):
     return (min(p1[0], p2[0]), min(p1[1], p2[1]), max(p1[0], p2[0]), max(p1[1], p2[1]))
 
-def segment_hits_convex(p1, p2, poly):
-    # Implementacion simplificada: verificar si algun punto esta dentro o si cruza bordes
-    if is_point_in_polygon(p1, poly) or is_point_in_polygon(p2, poly):
+def polygon_orientation(poly):
+    """1 si el poligono es antihorario, -1 si es horario, 0 si no tiene area."""
+    area = 0.0
+    for i in range(len(poly)):
+        x1, y1 = poly[i - 1]
+        x2, y2 = poly[i]
+        area += x1 * y2 - x2 * y1
+    return (area > 0) - (area < 0)
+
+def segment_hits_convex(p1, p2, poly, orientation=None):
+    """True si el segmento toca el poligono convexo cerrado (el borde cuenta).
+
+    Recorte de Cyrus-Beck: ``p1 + t * (p2 - p1)`` debe quedar en el lado
+    interior de cada arista para algun ``t`` en [0, 1]. El lado se evalua en
+    los dos extremos (un extremo sobre una arista o un vertice da 0 exacto)
+    y se interpola. Es la regla de todos los motores de ``src.query_engine``
+    (``segments_hit_convex`` hace las mismas operaciones en lote)."""
+    if orientation is None: orientation = polygon_orientation(poly)
+    if orientation == 0:
+        # Poligono degenerado: solo cuentan sus aristas
+        return any(segments_touch(p1, p2, poly[i - 1], poly[i]) for i in range(len(poly)))
+    sx, sy = p1
+    tx, ty = p2
+    t_low, t_high = 0.0, 1.0
+    for i in range(len(poly)):
+        ax, ay = poly[i - 1]
+        bx, by = poly[i]
+        ex, ey = bx - ax, by - ay
+        # Lado de la arista en el que queda cada extremo (>= 0 es dentro)
+        start = orientation * (ex * (sy - ay) - ey * (sx - ax))
+        end = orientation * (ex * (ty - ay) - ey * (tx - ax))
+        if start < 0 and end < 0: return False
+        if start < 0:
+            t_low = max(t_low, start / (start - end))
+        elif end < 0:
+            t_high = min(t_high, start / (start - end))
+        if t_low > t_high: return False
+    return True
+
+def segments_touch(a, b, c, d):
+    """Segmentos cerrados: True si comparten algun punto (extremos incluidos)."""
+    d1 = cross(sub(d, c), sub(a, c))
+    d2 = cross(sub(d, c), sub(b, c))
+    d3 = cross(sub(b, a), sub(c, a))
+    d4 = cross(sub(b, a), sub(d, a))
+    if ((d1 > 0 and d2 < 0) or (d1 < 0 and d2 > 0)) and ((d3 > 0 and d4 < 0) or (d3 < 0 and d4 > 0)):
         return True
-    # Chequeo de interseccion de segmentos
-    n = len(poly)
-    for i in range(n):
-        edge_p1 = poly[i]
-        edge_p2 = poly[(i + 1) % n]
-        if segments_intersect(p1, p2, edge_p1, edge_p2):
-            return True
-    return False
+    def on_segment(p, q, r):
+        return min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and min(p[1], q[1]) <= r[1] <= max(p[1], q[1])
+    return ((d1 == 0 and on_segment(c, d, a)) or (d2 == 0 and on_segment(c, d, b))
+            or (d3 == 0 and on_segment(a, b, c)) or (d4 == 0 and on_segment(a, b, d)))
 
 def segments_intersect(a, b, c, d):
     def ccw(A, B, C):
@@ -0,0 +1,342 @@
+"""Precompiled glyph atlas: convex pieces and their DK hierarchies per character.
+
+Glyphs are stored at unit scale (the letter box is 1x1) in a small binary file.
+The index is read once and each glyph record is decoded on first use. Pieces
+stay at unit scale: a letter places them with an ``Affine``
+(``LetterGoal.placement``), so laying out a word at any scale is a lookup
+instead of a mesh generation and hierarchy build.
+
+Rebuild the bundled file with ``python -m src.glyph_atlas``; pass ``--font``
+to build an atlas from a TrueType font instead (see ``src.font_glyphs``). The
+game uses a font atlas when ``CONVEXGLYPH_FONT`` points to a ``.ttf`` file.
+
+With a ``scheduler`` (``src.scheduler.FrameScheduler``) the atlas never
+builds a hierarchy synchronously: missing glyphs get ``DeferredHierarchy``
+pieces and a stale file is rewritten in slices of spare frame time.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.geometry import polygon_bounds
+from src.dk_hierarchy import (
+    DeferredHierarchy,
+    DKHierarchy,
+    HierarchyBuild,
+    HierarchyLevel,
+    ParentPointer,
+    Polyhedron,
+    convex_polygon_steps,
+    hierarchy_from_convex_polygon,
+)
+from src.letter_mesh import LETTER_GRIDS, generate_polygon_mesh, get_letter_grid, has_glyph
+
+
+Point = Tuple[float, float]
+
+MAGIC = b"CGDKATL2"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+DEFAULT_ATLAS_PATH = os.path.join(ASSETS_DIR, "glyph_atlas.bin")
+
+_HEADER = struct.Struct("<8s16sI")
+_INDEX_ENTRY = struct.Struct("<IQI")
+_U16 = struct.Struct("<H")
+_POINT = struct.Struct("<dd")
+_FACE = struct.Struct("<HHH")
+_PARENT = struct.Struct("<BI")
+_PARENT_KINDS = ("face", "vertex")
+
+
+class BlockGlyphSource:
+    """Glyph source backed by the 5x5 block grids in ``src.letter_mesh``."""
+
+    name = "blocks"
+
+    def charset(self) -> str:
+        return "".join(LETTER_GRIDS)
+
+    def has_glyph(self, char: str) -> bool:
+        return has_glyph(char)
+
+    def polygons(self, char: str) -> List[List[Point]]:
+        return generate_polygon_mesh(char, 1.0)
+
+    def fingerprint(self) -> bytes:
+        digest = hashlib.md5(self.name.encode("utf-8"))
+        for char in self.charset():
+            digest.update(char.encode("utf-8"))
+            digest.update("|".join(get_letter_grid(char)).encode("utf-8"))
+        return digest.digest()
+
+
+@dataclass(frozen=True)
+class GlyphPiece:
+    """One convex piece of a glyph together with its prebuilt hierarchy."""
+
+    vertices: Tuple[Point, ...]
+    hierarchy: DKHierarchy
+
+    def transformed(self, scale: float = 1.0, offset: Point = (0.0, 0.0)) -> "GlyphPiece":
+        dx, dy = offset
+        vertices = tuple((x * scale + dx, y * scale + dy) for x, y in self.vertices)
+        return GlyphPiece(vertices, self.hierarchy.transformed(scale, offset))
+
+
+def build_pieces(polygons: Sequence[Sequence[Point]]) -> Tuple[GlyphPiece, ...]:
+    pieces = []
+    for polygon in polygons:
+        vertices = tuple((float(x), float(y)) for x, y in polygon)
+        pieces.append(GlyphPiece(vertices, hierarchy_from_convex_polygon(vertices)))
+    return tuple(pieces)
+
+
+def deferred_pieces(polygons: Sequence[Sequence[Point]], scheduler) -> Tuple[GlyphPiece, ...]:
+    """Like ``build_pieces``, but each build is a job handed to ``scheduler``."""
+    pieces = []
+    for polygon in polygons:
+        vertices = tuple((float(x), float(y)) for x, y in polygon)
+        job = scheduler.submit(HierarchyBuild(convex_polygon_steps(vertices)))
+        pieces.append(GlyphPiece(vertices, DeferredHierarchy(vertices, job)))
+    return tuple(pieces)
+
+
+# --- binary encoding ------------------------------------------------------
+
+def _encode_glyph(pieces: Sequence[GlyphPiece]) -> bytes:
+    out = [_U16.pack(len(pieces))]
+    for piece in pieces:
+        out.append(_U16.pack(len(piece.vertices)))
+        out.extend(_POINT.pack(x, y) for x, y in piece.vertices)
+        out.append(_U16.pack(len(piece.hierarchy.levels)))
+        for level in piece.hierarchy.levels:
+            mesh = level.mesh
+            out.append(_U16.pack(mesh.num_vertices))
+            out.extend(_POINT.pack(v[0], v[1]) for v in mesh.vertices)
+            out.append(_U16.pack(len(mesh.faces)))
+            out.extend(_FACE.pack(*face) for face in mesh.faces)
+            parents = level.parents or []
+            out.append(_U16.pack(len(parents)))
+            out.extend(_PARENT.pack(_PARENT_KINDS.index(p.kind), p.reference) for p in parents)
+        inside = sorted(piece.hierarchy.inside_faces) if piece.hierarchy.inside_faces is not None else []
+        out.append(_U16.pack(len(inside)))
+        out.extend(_U16.pack(face) for face in inside)
+    return b"".join(out)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt: struct.Struct):
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def count(self) -> int:
+        return self.unpack(_U16)[0]
+
+
+def _decode_glyph(data: bytes) -> Tuple[GlyphPiece, ...]:
+    reader = _Reader(data)
+    pieces = []
+    for _ in range(reader.count()):
+        vertices = tuple(reader.unpack(_POINT) for _ in range(reader.count()))
+        levels = []
+        for _ in range(reader.count()):
+            mesh_vertices = [reader.unpack(_POINT) for _ in range(reader.count())]
+            faces = [reader.unpack(_FACE) for _ in range(reader.count())]
+            parents = [
+                ParentPointer(_PARENT_KINDS[kind], ref)
+                for kind, ref in (reader.unpack(_PARENT) for _ in range(reader.count()))
+            ]
+            levels.append(HierarchyLevel(Polyhedron(mesh_vertices, faces), parents or None))
+        inside = [reader.count() for _ in range(reader.count())]
+        pieces.append(GlyphPiece(vertices, DKHierarchy(levels, inside or None)))
+    return tuple(pieces)
+
+
+def write_atlas(path: str, source=None) -> None:
+    source = source or BlockGlyphSource()
+    chars = source.charset()
+    records = [_encode_glyph(build_pieces(source.polygons(char))) for char in chars]
+    _write_records(path, source, chars, records)
+
+
+def _write_records(path: str, source, chars: str, records: Sequence[bytes]) -> None:
+    offset = _HEADER.size + _INDEX_ENTRY.size * len(chars)
+    index = []
+    for char, record in zip(chars, records):
+        index.append(_INDEX_ENTRY.pack(ord(char), offset, len(record)))
+        offset += len(record)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, source.fingerprint(), len(chars)))
+        handle.write(b"".join(index))
+        handle.write(b"".join(records))
+    os.replace(tmp_path, path)
+
+
+# --- atlas ----------------------------------------------------------------
+
+class GlyphAtlas:
+    """Lazily loaded glyph atlas of unit-scale pieces, memoized per character.
+
+    If the file is missing or was built from a different source, the atlas
+    is rebuilt once (and written back when the location is writable); with
+    a ``scheduler`` that rebuild is a background job instead.
+    """
+
+    def __init__(self, path: str = DEFAULT_ATLAS_PATH, source=None, scheduler=None):
+        self.path = path
+        self.source = source or BlockGlyphSource()
+        self.scheduler = scheduler
+        self._index: Optional[Dict[str, Tuple[int, int]]] = None
+        self._unit: Dict[str, Tuple[GlyphPiece, ...]] = {}
+        self._bounds: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_index(self) -> Dict[str, Tuple[int, int]]:
+        if self._index is None:
+            index = self._read_index()
+            if index is None and self.scheduler is not None:
+                # Se regenera en el tiempo libre de los frames; mientras, cada glifo se construye diferido
+                self.scheduler.submit(HierarchyBuild(self._rewrite_steps()), background=True)
+                index = {}
+            elif index is None:
+                try:
+                    write_atlas(self.path, self.source)
+                    index = self._read_index()
+                except OSError:
+                    index = None
+            self._index = index if index is not None else {}
+        return self._index
+
+    def _read_index(self) -> Optional[Dict[str, Tuple[int, int]]]:
+        try:
+            with open(self.path, "rb") as handle:
+                magic, fingerprint, count = _HEADER.unpack(handle.read(_HEADER.size))
+                if magic != MAGIC or fingerprint != self.source.fingerprint():
+                    return None
+                raw = handle.read(_INDEX_ENTRY.size * count)
+        except (OSError, struct.error):
+            return None
+        index = {}
+        for pos in range(0, len(raw), _INDEX_ENTRY.size):
+            code, offset, length = _INDEX_ENTRY.unpack_from(raw, pos)
+            index[chr(code)] = (offset, length)
+        return index
+
+    def _rewrite_steps(self):
+        """Rewrite the atlas file glyph by glyph, pausing between build slices."""
+        chars = self.source.charset()
+        records = []
+        for char in chars:
+            pieces = []
+            for piece in self.unit_glyph(char):
+                hierarchy = piece.hierarchy
+                if isinstance(hierarchy, DeferredHierarchy):
+                    while not hierarchy.job.step(0):
+                        yield
+                    hierarchy = hierarchy.job.result
+                pieces.append(GlyphPiece(piece.vertices, hierarchy))
+            records.append(_encode_glyph(pieces))
+            yield
+        try:
+            _write_records(self.path, self.source, chars, records)
+        except OSError:
+            return
+        index = self._read_index()
+        if index is not None:
+            with self._lock:
+                self._index = index
+
+    def unit_glyph(self, char: str) -> Tuple[GlyphPiece, ...]:
+        pieces = self._unit.get(char)
+        if pieces is not None:
+            return pieces
+        with self._lock:
+            pieces = self._unit.get(char)
+            if pieces is None:
+                entry = self._ensure_index().get(char)
+                if entry is not None:
+                    offset, length = entry
+                    with open(self.path, "rb") as handle:
+                        handle.seek(offset)
+                        pieces = _decode_glyph(handle.read(length))
+                else:
+                    # Caracter fuera del atlas: se genera en el momento, por tramos si hay scheduler (el source avisa)
+                    polygons = self.source.polygons(char)
+                    if self.scheduler is not None:
+                        pieces = deferred_pieces(polygons, self.scheduler)
+                    else:
+                        pieces = build_pieces(polygons)
+                self._unit[char] = pieces
+        return pieces
+
+    def piece_count(self, char: str) -> int:
+        return len(self.unit_glyph(char))
+
+    def glyph_bounds(self, char: str) -> Tuple[float, float, float, float]:
+        """Unit-scale bounding box of the glyph (``(0, 0, 1, 1)`` when empty)."""
+        bounds = self._bounds.get(char)
+        if bounds is None:
+            points = [p for piece in self.unit_glyph(char) for p in piece.vertices]
+            bounds = polygon_bounds(points) if points else (0.0, 0.0, 1.0, 1.0)
+            self._bounds[char] = bounds
+        return bounds
+
+    def __contains__(self, char: str) -> bool:
+        return char in self._ensure_index()
+
+
+_default_atlas: Optional[GlyphAtlas] = None
+
+
+def font_atlas_path(font_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(font_path))[0]
+    return os.path.join(ASSETS_DIR, f"glyph_atlas_{stem}.bin")
+
+
+def default_atlas() -> GlyphAtlas:
+    global _default_atlas
+    if _default_atlas is None:
+        font_path = os.environ.get("CONVEXGLYPH_FONT")
+        if font_path:
+            from src.font_glyphs import FontGlyphSource
+
+            _default_atlas = GlyphAtlas(font_atlas_path(font_path), FontGlyphSource(font_path))
+        else:
+            _default_atlas = GlyphAtlas()
+    return _default_atlas
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the precompiled glyph atlas")
+    parser.add_argument("--font", help="TrueType font to take outlines from (default: block grids)")
+    parser.add_argument("--flatness", type=float, default=0.02, help="curve tolerance, fraction of cap height")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    if args.font:
+        from src.font_glyphs import FontGlyphSource
+
+        source = FontGlyphSource(args.font, flatness=args.flatness)
+        output = args.output or font_atlas_path(args.font)
+    else:
+        source = BlockGlyphSource()
+        output = args.output or DEFAULT_ATLAS_PATH
+    write_atlas(output, source)
+    pieces = sum(len(source.polygons(char)) for char in source.charset())
+    print(f"{len(source.charset())} glifos, {pieces} piezas -> {output} ({os.path.getsize(output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,190 +1,484 @@
+import warnings
+
+# 5x5 grids (fila 0 = arriba). Se compilan una sola vez al importar el modulo.
+LETTER_GRIDS = {
+    'A': [
+        "  X  ",
+        " X X ",
+        "XXXXX",
+        "X   X",
+        "X   X"
+    ],
+    'B': [
+        "XXXX ",
+        "X   X",
+        "XXXX ",
+        "X   X",
+        "XXXX "
+    ],
+    'C': [
+        " XXX ",
+        "X    ",
+        "X    ",
+        "X    ",
+        " XXX "
+    ],
+    'D': [
+        "XXXX ",
+        "X   X",
+        "X   X",
+        "X   X",
+        "XXXX "
+    ],
+    'E': [
+        "XXXXX",
+        "X    ",
+        "XXXX ",
+        "X    ",
+        "XXXXX"
+    ],
+    'F': [
+        "XXXXX",
+        "X    ",
+        "XXXX ",
+        "X    ",
+        "X    "
+    ],
+    'G': [
+        " XXX ",
+        "X    ",
+        "X  XX",
+        "X   X",
+        " XXX "
+    ],
+    'H': [
+        "X   X",
+        "X   X",
+        "XXXXX",
+        "X   X",
+        "X   X"
+    ],
+    'I': [
+        "XXXXX",
+        "  X  ",
+        "  X  ",
+        "  X  ",
+        "XXXXX"
+    ],
+    'J': [
+        "XXXXX",
+        "   X ",
+        "   X ",
+        "X  X ",
+        " XX  "
+    ],
+    'K': [
+        "X   X",
+        "X  X ",
+        "XXX  ",
+        "X  X ",
+        "X   X"
+    ],
+    'L': [
+        "X    ",
+        "X    ",
+        "X    ",
+        "X    ",
+        "XXXXX"
+    ],
+    'M': [
+        "X   X",
+        "XX XX",
+        "X X X",
+        "X   X",
+        "X   X"
+    ],
+    'N': [
+        "X   X",
+        "XX  X",
+        "X X X",
+        "X  XX",
+        "X   X"
+    ],
+    'O': [
+        " XXX ",
+        "X   X",
+        "X   X",
+        "X   X",
+        " XXX "
+    ],
+    'P': [
+        "XXXX ",
+        "X   X",
+        "XXXX ",
+        "X    ",
+        "X    "
+    ],
+    'Q': [
+        " XXX ",
+        "X   X",
+        "X   X",
+        "X  X ",
+        " XX X"
+    ],
+    'R': [
+        "XXXX ",
+        "X   X",
+        "XXXX ",
+        "X  X ",
+        "X   X"
+    ],
+    'S': [
+        " XXX ",
+        "X    ",
+        " XXX ",
+        "    X",
+        " XXX "
+    ],
+    'T': [
+        "XXXXX",
+        "  X  ",
+        "  X  ",
+        "  X  ",
+        "  X  "
+    ],
+    'U': [
+        "X   X",
+        "X   X",
+        "X   X",
+        "X   X",
+        " XXX "
+    ],
+    'V': [
+        "X   X",
+        "X   X",
+        "X   X",
+        " X X ",
+        "  X  "
+    ],
+    'W': [
+        "X   X",
+        "X   X",
+        "X X X",
+        "XX XX",
+        "X   X"
+    ],
+    'X': [
+        "X   X",
+        " X X ",
+        "  X  ",
+        " X X ",
+        "X   X"
+    ],
+    'Y': [
+        "X   X",
+        " X X ",
+        "  X  ",
+        "  X  ",
+        "  X  "
+    ],
+    'Z': [
+        "XXXXX",
+        "   X ",
+        "  X  ",
+        " X   ",
+        "XXXXX"
+    ],
+    'a': [
+        "     ",
+        " XXX ",
+        "X   X",
+        "X  XX",
+        " XX X"
+    ],
+    'b': [
+        "X    ",
+        "X    ",
+        "XXXX ",
+        "X   X",
+        "XXXX "
+    ],
+    'c': [
+        "     ",
+        " XXX ",
+        "X    ",
+        "X    ",
+        " XXX "
+    ],
+    'd': [
+        "    X",
+        "    X",
+        " XXXX",
+        "X   X",
+        " XXXX"
+    ],
+    'e': [
+        "     ",
+        " XXX ",
+        "XXXXX",
+        "X    ",
+        " XXX "
+    ],
+    'f': [
+        "  XX ",
+        " X   ",
+        "XXXX ",
+        " X   ",
+        " X   "
+    ],
+    'g': [
+        " XXXX",
+        "X   X",
+        " XXXX",
+        "    X",
+        " XXX "
+    ],
+    'h': [
+        "X    ",
+        "X    ",
+        "XXXX ",
+        "X   X",
+        "X   X"
+    ],
+    'i': [
+        "  X  ",
+        "     ",
+        " XX  ",
+        "  X  ",
+        " XXX "
+    ],
+    'j': [
+        "   X ",
+        "     ",
+        "   X ",
+        "X  X ",
+        " XX  "
+    ],
+    'k': [
+        "X    ",
+        "X  X ",
+        "XXX  ",
+        "X  X ",
+        "X   X"
+    ],
+    'l': [
+        " XX  ",
+        "  X  ",
+        "  X  ",
+        "  X  ",
+        " XXX "
+    ],
+    'm': [
+        "     ",
+        "XX X ",
+        "X X X",
+        "X X X",
+        "X   X"
+    ],
+    'n': [
+        "     ",
+        "XXXX ",
+        "X   X",
+        "X   X",
+        "X   X"
+    ],
+    'o': [
+        "     ",
+        " XXX ",
+        "X   X",
+        "X   X",
+        " XXX "
+    ],
+    'p': [
+        "     ",
+        "XXXX ",
+        "X   X",
+        "XXXX ",
+        "X    "
+    ],
+    'q': [
+        "     ",
+        " XXXX",
+        "X   X",
+        " XXXX",
+        "    X"
+    ],
+    'r': [
+        "     ",
+        "X XX ",
+        "XX   ",
+        "X    ",
+        "X    "
+    ],
+    's': [
+        "     ",
+        " XXXX",
+        "XXX  ",
+        "  XXX",
+        "XXXX "
+    ],
+    't': [
+        " X   ",
+        "XXXX ",
+        " X   ",
+        " X   ",
+        "  XX "
+    ],
+    'u': [
+        "     ",
+        "X   X",
+        "X   X",
+        "X   X",
+        " XXXX"
+    ],
+    'v': [
+        "     ",
+        "X   X",
+        "X   X",
+        " X X ",
+        "  X  "
+    ],
+    'w': [
+        "     ",
+        "X   X",
+        "X X X",
+        "X X X",
+        " X X "
+    ],
+    'x': [
+        "     ",
+        "X   X",
+        " X X ",
+        " X X ",
+        "X   X"
+    ],
+    'y': [
+        "X   X",
+        "X   X",
+        " XXXX",
+        "    X",
+        " XXX "
+    ],
+    'z': [
+        "     ",
+        "XXXXX",
+        "   X ",
+        " X   ",
+        "XXXXX"
+    ],
+    '0': [
+        " XXX ",
+        "X  XX",
+        "X X X",
+        "XX  X",
+        " XXX "
+    ],
+    '1': [
+        "  X  ",
+        " XX  ",
+        "  X  ",
+        "  X  ",
+        " XXX "
+    ],
+    '2': [
+        " XXX ",
+        "X   X",
+        "  XX ",
+        " X   ",
+        "XXXXX"
+    ],
+    '3': [
+        "XXXX ",
+        "    X",
+        " XXX ",
+        "    X",
+        "XXXX "
+    ],
+    '4': [
+        "X  X ",
+        "X  X ",
+        "XXXXX",
+        "   X ",
+        "   X "
+    ],
+    '5': [
+        "XXXXX",
+        "X    ",
+        "XXXX ",
+        "    X",
+        "XXXX "
+    ],
+    '6': [
+        " XXX ",
+        "X    ",
+        "XXXX ",
+        "X   X",
+        " XXX "
+    ],
+    '7': [
+        "XXXXX",
+        "    X",
+        "   X ",
+        "  X  ",
+        "  X  "
+    ],
+    '8': [
+        " XXX ",
+        "X   X",
+        " XXX ",
+        "X   X",
+        " XXX "
+    ],
+    '9': [
+        " XXX ",
+        "X   X",
+        " XXXX",
+        "    X",
+        " XXX "
+    ]
+}
+
+# Marcas diacriticas (una fila encima de la letra base)
+ACCENT_MARKS = {
+    'acute': "   X ",
+    'diaeresis': " X X ",
+    'tilde': " XXX ",
+}
+
+FALLBACK_GRID = ["XXXXX"] * 5
+
+
+def _accented(base, mark):
+    """Coloca la marca en la fila 0 si esta libre; si no, agrega una fila encima."""
+    row = ACCENT_MARKS[mark]
+    if not base[0].strip() or not base[1].strip():
+        return [row] + base[1:]
+    return [row] + base
+
+
+for _base, _accent_char, _mark in (
+    ('A', 'Á', 'acute'), ('E', 'É', 'acute'), ('I', 'Í', 'acute'), ('O', 'Ó', 'acute'),
+    ('U', 'Ú', 'acute'), ('U', 'Ü', 'diaeresis'), ('N', 'Ñ', 'tilde'),
+    ('a', 'á', 'acute'), ('e', 'é', 'acute'), ('i', 'í', 'acute'), ('o', 'ó', 'acute'),
+    ('u', 'ú', 'acute'), ('u', 'ü', 'diaeresis'), ('n', 'ñ', 'tilde'),
+):
+    LETTER_GRIDS[_accent_char] = _accented(LETTER_GRIDS[_base], _mark)
+
+_warned_chars = set()
+
+
+def has_glyph(char):
+    return char in LETTER_GRIDS
+
+
 def get_letter_grid(char):
-    # 5x5 grids
-    grids = {
-        'A': [
-            "  X  ",
-            " X X ",
-            "XXXXX",
-            "X   X",
-            "X   X"
-        ],
-        'B': [
-            "XXXX ",
-            "X   X",
-            "XXXX ",
-            "X   X",
-            "XXXX "
-        ],
-        'C': [
-            " XXX ",
-            "X    ",
-            "X    ",
-            "X    ",
-            " XXX "
-        ],
-        'D': [
-            "XXXX ",
-            "X   X",
-            "X   X",
-            "X   X",
-            "XXXX "
-        ],
-        'E': [
-            "XXXXX",
-            "X    ",
-            "XXXX ",
-            "X    ",
-            "XXXXX"
-        ],
-        'F': [
-            "XXXXX",
-            "X    ",
-            "XXXX ",
-            "X    ",
-            "X    "
-        ],
-        'G': [
-            " XXX ",
-            "X    ",
-            "X  XX",
-            "X   X",
-            " XXX "
-        ],
-        'H': [
-            "X   X",
-            "X   X",
-            "XXXXX",
-            "X   X",
-            "X   X"
-        ],
-        'I': [
-            "XXXXX",
-            "  X  ",
-            "  X  ",
-            "  X  ",
-            "XXXXX"
-        ],
-        'J': [
-            "XXXXX",
-            "   X ",
-            "   X ",
-            "X  X ",
-            " XX  "
-        ],
-        'K': [
-            "X   X",
-            "X  X ",
-            "XXX  ",
-            "X  X ",
-            "X   X"
-        ],
-        'L': [
-            "X    ",
-            "X    ",
-            "X    ",
-            "X    ",
-            "XXXXX"
-        ],
-        'M': [
-            "X   X",
-            "XX XX",
-            "X X X",
-            "X   X",
-            "X   X"
-        ],
-        'N': [
-            "X   X",
-            "XX  X",
-            "X X X",
-            "X  XX",
-            "X   X"
-        ],
-        'O': [
-            " XXX ",
-            "X   X",
-            "X   X",
-            "X   X",
-            " XXX "
-        ],
-        'P': [
-            "XXXX ",
-            "X   X",
-            "XXXX ",
-            "X    ",
-            "X    "
-        ],
-        'Q': [
-            " XXX ",
-            "X   X",
-            "X   X",
-            "X  X ",
-            " XX X"
-        ],
-        'R': [
-            "XXXX ",
-            "X   X",
-            "XXXX ",
-            "X  X ",
-            "X   X"
-        ],
-        'S': [
-            " XXX ",
-            "X    ",
-            " XXX ",
-            "    X",
-            " XXX "
-        ],
-        'T': [
-            "XXXXX",
-            "  X  ",
-            "  X  ",
-            "  X  ",
-            "  X  "
-        ],
-        'U': [
-            "X   X",
-            "X   X",
-            "X   X",
-            "X   X",
-            " XXX "
-        ],
-        'V': [
-            "X   X",
-            "X   X",
-            "X   X",
-            " X X ",
-            "  X  "
-        ],
-        'W': [
-            "X   X",
-            "X   X",
-            "X X X",
-            "XX XX",
-            "X   X"
-        ],
-        'X': [
-            "X   X",
-            " X X ",
-            "  X  ",
-            " X X ",
-            "X   X"
-        ],
-        'Y': [
-            "X   X",
-            " X X ",
-            "  X  ",
-            "  X  ",
-            "  X  "
-        ],
-        'Z': [
-            "XXXXX",
-            "   X ",
-            "  X  ",
-            " X   ",
-            "XXXXX"
-        ]
-    }
-    return grids.get(char.upper(), ["XXXXX"]*5)
+    grid = LETTER_GRIDS.get(char)
+    if grid is not None:
+        return grid
+    if char not in _warned_chars:
+        _warned_chars.add(char)
+        warnings.warn(f"No glyph for {char!r}; using a solid block", stacklevel=2)
+    return FALLBACK_GRID
 
 def generate_polygon_mesh(char, scale=50):
     """
@@ -198,12 +492,14 @@ def generate_polygon_mesh(char, scale=50):
     
     # Tamaño de cada "pixel" cuadrado
     pixel_size = scale / 5.0 
+    # Las filas extra (acentos) quedan por encima de la caja 5x5
+    row_offset = rows - 5
     
     for r in range(rows):
         for c in range(cols):
             if grid[r][c] != ' ':
                 x = c * pixel_size
-                y = r * pixel_size
+                y = (r - row_offset) * pixel_size
                 # Crear polígono cuadrado (convexo)
                 poly = [
                     (x, y),
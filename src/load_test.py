@@ -0,0 +1,128 @@
+# src/load_test.py
+"""Cliente de prueba de carga para ``src.service``.
+
+    python -m src.load_test --sessions 200 --concurrency 50 [--steps 300] [--unix /tmp/convexglyph.sock]
+
+Abre ``concurrency`` conexiones; cada una juega sesiones seguidas con un
+trazo sintetico (``synthetic_stroke``) hasta completar ``sessions`` en total.
+Cada paso espera su ``progress`` antes de enviar el siguiente, como una
+estacion real. Con ``--spawn`` levanta el servicio en un subproceso (un
+nucleo, o ``--workers N``) para medir sesiones concurrentes por nucleo en
+una sola maquina.
+El resultado es un JSON con latencias por paso (p50/p95/p99) y rendimiento.
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from src.profiler import percentile
+from src.service import DEFAULT_HOST, DEFAULT_PORT
+from src.session import goal_layout, synthetic_stroke
+
+WORDS = ["HOLA", "CASA", "PERRO", "GATO", "ESCRIBIR", "MANO", "LETRA", "CONVEXO"]
+
+
+async def _connect(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _request(reader, writer, message):
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    if reply.get("type") == "error":
+        raise RuntimeError(reply["message"])
+    return reply
+
+
+async def _station(host, port, unix_path, queue, steps, latencies, results):
+    reader, writer = await _connect(host, port, unix_path)
+    try:
+        while True:
+            try:
+                text = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            await _request(reader, writer, {"type": "start", "text": text})
+            last = None
+            for point in synthetic_stroke(goal_layout(text, 1280, 720), steps):
+                points = [last, point] if last else [point]
+                start = time.perf_counter()
+                await _request(reader, writer, {"type": "input", "points": points, "clicking": True})
+                latencies.append(time.perf_counter() - start)
+                last = point
+            results.append(await _request(reader, writer, {"type": "end"}))
+    finally:
+        writer.close()
+
+
+async def run_load(sessions, concurrency, steps, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, seed=0):
+    rng = random.Random(seed)
+    queue = asyncio.Queue()
+    for _ in range(sessions):
+        queue.put_nowait(rng.choice(WORDS))
+    latencies, results = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _station(host, port, unix_path, queue, steps, latencies, results)
+        for _ in range(min(concurrency, sessions))
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "sessions": len(results),
+        "concurrency": concurrency,
+        "steps_per_session": steps,
+        "wall_s": elapsed,
+        "sessions_per_second": len(results) / elapsed if elapsed > 0 else None,
+        "steps_per_second": len(latencies) / elapsed if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+        "mean_progress": sum(r["progress"] for r in results) / len(results) if results else 0.0,
+    }
+
+
+def _spawn_service(port, unix_path, workers=1):
+    args = [sys.executable, "-m", "src.service", "--port", str(port), "--workers", str(workers)]
+    if unix_path: args += ["--unix", unix_path]
+    process = subprocess.Popen(args, stderr=subprocess.PIPE, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # Espera a que el servicio anuncie que escucha
+    process.stderr.readline()
+    return process
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de evaluacion de trazos")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=300, help="pasos (mensajes input) por sesion")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix")
+    parser.add_argument("--spawn", action="store_true", help="levanta el servicio en un subproceso")
+    parser.add_argument("--workers", type=int, default=1, help="procesos del servicio con --spawn")
+    args = parser.parse_args(argv)
+    service = _spawn_service(args.port, args.unix, args.workers) if args.spawn else None
+    try:
+        report = asyncio.run(run_load(args.sessions, args.concurrency, args.steps, args.host, args.port, args.unix))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
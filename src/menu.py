@@ -1,6 +1,8 @@
 import pygame
 import time
 
+from src.utils_draw import SURFACE_CACHE
+
 class MenuButton:
     def __init__(self, x, y, w, h, text, color, hover_color, action_value, font_size=28):
         self.original_rect = pygame.Rect(x, y, w, h)
@@ -9,7 +11,7 @@ class MenuButton:
         self.color = color
         self.hover_color = hover_color
         self.action_value = action_value 
-        self.font = pygame.font.SysFont('Arial', font_size, bold=True)
+        self.font = SURFACE_CACHE.font('Arial', font_size, bold=True)
         self.is_hovered = False
 
     def update(self, mouse_pos):
@@ -42,7 +44,7 @@ class GameMenu:
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.title_font = pygame.font.SysFont('Arial', 70, bold=True)
+        self.title_font = SURFACE_CACHE.font('Arial', 70, bold=True)
         self.font = pygame.font.Font(None, 50)
         
         self.state = 'MAIN_TITLE' 
@@ -223,7 +225,7 @@ class GameMenu:
         
         else:
             # Título pequeño
-            header_font = pygame.font.SysFont('Arial', 40, bold=True)
+            header_font = SURFACE_CACHE.font('Arial', 40, bold=True)
             title_surf = header_font.render("CalliRehab", True, (150, 150, 150))
             screen.blit(title_surf, (self.width//2 - title_surf.get_width()//2, 30))
             
@@ -0,0 +1,325 @@
+"""Kirkpatrick point location over a whole scene of convex pieces.
+
+The planar subdivision is an enclosing triangle around the scene's bounding
+box, split into vertical slabs at every piece vertex; each slab is cut into
+trapezoids by the piece edges crossing it and every trapezoid is
+triangulated against all the points on its two slab lines, so the mesh has
+no T-junctions. Each level-0 triangle is labelled with the piece it lies in
+(``OUTSIDE`` for free space).
+
+Coarser levels come from ``Polyhedron.create_next_layer`` like a
+``DKHierarchy``, except that a vertex is only removed when its ring is
+closed and its ring triangulation keeps every ring vertex (collinear ring
+points would otherwise turn into T-junctions one level up). ``locate``
+walks the levels from the apex down, O(log N) for N triangles.
+
+Regions are closed: a point on an edge or a vertex belongs to every region
+that touches it. The mesh only approximates the regions (edges are cut at
+rounded slab crossings), so ``locate`` does not trust the label of the
+triangle it lands in: it tests the point against the regions labelled on
+the triangles around that one, with ``geometry.segment_hits_convex``, and
+returns the lowest label that contains it.
+"""
+from __future__ import annotations
+
+import bisect
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.convex_decomposition import signed_area, triangulate_polygon
+from src.dk_hierarchy import HierarchyLevel, ParentPointer, Polyhedron
+from src.geometry import segment_hits_convex
+
+
+Point = Tuple[float, float]
+
+OUTSIDE = -1
+# Coordinates closer than this (relative to the scene size) are one vertex
+SNAP = 1e-9
+
+
+class _Segment:
+    __slots__ = ("start", "end", "above", "below")
+
+    def __init__(self, start: Point, end: Point, above: int = OUTSIDE, below: int = OUTSIDE):
+        self.start = start
+        self.end = end
+        self.above = above
+        self.below = below
+
+    def y_at(self, x: float) -> float:
+        (x0, y0), (x1, y1) = self.start, self.end
+        if x == x0:
+            return y0
+        if x == x1:
+            return y1
+        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+class PointLocator:
+    """Point location hierarchy over labelled convex regions.
+
+    Build it with ``from_regions``; ``locate(point)`` returns the lowest
+    label of the (closed) regions containing ``point`` or ``OUTSIDE``.
+    """
+
+    def __init__(self, levels: List[HierarchyLevel], labels: Sequence[int], regions: Dict[int, Sequence[Point]]):
+        self.levels = levels
+        self.labels = list(labels)
+        self.regions = regions
+        # Por nivel: coordenadas planas de cada cara e hijos de cada cara en el nivel inferior
+        self._triangles = [
+            [tuple(c for v in face for c in level.mesh.vertices[v]) for face in level.mesh.faces]
+            for level in levels
+        ]
+        self._children = [None] + [
+            [_children(pointer, finer.mesh) for pointer in level.parents]
+            for finer, level in zip(levels, levels[1:])
+        ]
+
+    @classmethod
+    def from_regions(
+        cls,
+        regions: Iterable[Tuple[int, Sequence[Point]]],
+        degree_limit: int = 11,
+    ) -> "PointLocator":
+        """Build from ``(label, convex polygon)`` pairs; polygons must not overlap."""
+        regions = [(label, [(float(x), float(y)) for x, y in polygon]) for label, polygon in regions]
+        vertices, faces, labels, fixed = _subdivision(regions)
+        mesh = Polyhedron(vertices, faces)
+        return cls(_build_levels(mesh, fixed, degree_limit), labels, dict(regions))
+
+    def height(self) -> int:
+        return len(self.levels)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def locate(self, point: Point) -> int:
+        face = self._face(point)
+        if face is None:
+            return OUTSIDE
+        # Cerca de un borde el triangulo puede ser de la region vecina (o de fuera):
+        # se comprueban las regiones de los triangulos que comparten un vertice con el
+        mesh = self.levels[0].mesh
+        candidates = {self.labels[f] for v in mesh.faces[face] for f in mesh.vertex_faces[v]}
+        candidates.discard(OUTSIDE)
+        for label in sorted(candidates):
+            if segment_hits_convex(point, point, self.regions[label]):
+                return label
+        return OUTSIDE
+
+    def _face(self, point: Point) -> Optional[int]:
+        """Level-0 triangle containing ``point`` (the first one found on a shared edge)."""
+        level_idx = len(self.levels) - 1
+        triangles = self._triangles[level_idx]
+        face = _containing(triangles, range(len(triangles)), point)
+        while face is not None and level_idx > 0:
+            candidates = self._children[level_idx][face]
+            level_idx -= 1
+            face = _containing(self._triangles[level_idx], candidates, point)
+        return face
+
+
+def _children(pointer: ParentPointer, finer: Polyhedron) -> Tuple[int, ...]:
+    if pointer.kind == "face":
+        return (pointer.reference,)
+    return tuple(sorted(finer.vertex_faces[pointer.reference]))
+
+
+def _containing(triangles: List[Tuple[float, ...]], faces: Iterable[int], point: Point) -> Optional[int]:
+    px, py = point
+    for face in faces:
+        ax, ay, bx, by, cx, cy = triangles[face]
+        d1 = (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+        d2 = (cx - bx) * (py - by) - (cy - by) * (px - bx)
+        d3 = (ax - cx) * (py - cy) - (ay - cy) * (px - cx)
+        if (d1 >= 0 and d2 >= 0 and d3 >= 0) or (d1 <= 0 and d2 <= 0 and d3 <= 0):
+            return face
+    return None
+
+
+# --- subdivision --------------------------------------------------------------
+
+def _subdivision(regions: List[Tuple[int, Sequence[Point]]]):
+    """Vertices, faces, face labels and the fixed corners of the scene mesh."""
+    points = [p for _, polygon in regions for p in polygon] or [(0.0, 0.0)]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    size = max(max(xs) - min(xs), max(ys) - min(ys), 1.0)
+    margin = 0.05 * size
+    min_x, max_x = min(xs) - margin, max(xs) + margin
+    min_y, max_y = min(ys) - margin, max(ys) + margin
+    eps = SNAP * size
+
+    segments: List[_Segment] = []
+    for label, polygon in regions:
+        ccw = signed_area(polygon) > 0
+        for p, q in zip(polygon, polygon[1:] + polygon[:1]):
+            if p[0] == q[0]:
+                continue
+            # Recorrido en sentido antihorario: el interior queda a la izquierda
+            inside_above = (p[0] < q[0]) == ccw
+            start, end = (p, q) if p[0] < q[0] else (q, p)
+            segments.append(_Segment(start, end, label if inside_above else OUTSIDE, OUTSIDE if inside_above else label))
+    lines = sorted({min_x, max_x, *(s.start[0] for s in segments), *(s.end[0] for s in segments)})
+
+    # Tramos activos en cada franja [lines[k], lines[k + 1]], del suelo al techo de la caja
+    segments.sort(key=lambda s: s.start[0])
+    floor, ceiling = _Segment((min_x, min_y), (max_x, min_y)), _Segment((min_x, max_y), (max_x, max_y))
+    slabs: List[List[_Segment]] = []
+    active: List[_Segment] = []
+    pending = 0
+    for x0, x1 in zip(lines, lines[1:]):
+        active = [s for s in active if s.end[0] > x0]
+        while pending < len(segments) and segments[pending].start[0] <= x0:
+            if segments[pending].end[0] > x0:
+                active.append(segments[pending])
+            pending += 1
+        mid = (x0 + x1) / 2
+        slabs.append([floor] + _merged(sorted(active, key=lambda s: s.y_at(mid)), x0, x1, eps) + [ceiling])
+
+    # Puntos de cada recta vertical: los de las franjas a ambos lados
+    line_ys: List[List[float]] = [[] for _ in lines]
+    for k, slab in enumerate(slabs):
+        line_ys[k].extend(s.y_at(lines[k]) for s in slab)
+        line_ys[k + 1].extend(s.y_at(lines[k + 1]) for s in slab)
+    line_ys = [_unique(sorted(ys), eps) for ys in line_ys]
+
+    vertices: List[Point] = []
+    ids: List[List[int]] = []
+    for x, ys in zip(lines, line_ys):
+        ids.append(list(range(len(vertices), len(vertices) + len(ys))))
+        vertices.extend((x, y) for y in ys)
+
+    def chain(k: int, low: float, high: float) -> List[int]:
+        ys = line_ys[k]
+        first = bisect.bisect_left(ys, low - eps)
+        last = bisect.bisect_right(ys, high + eps)
+        return ids[k][first:last]
+
+    faces: List[Tuple[int, int, int]] = []
+    labels: List[int] = []
+    for k, slab in enumerate(slabs):
+        x0, x1 = lines[k], lines[k + 1]
+        for lower, upper in zip(slab, slab[1:]):
+            label = lower.above if lower.above != OUTSIDE else upper.below
+            left = chain(k, lower.y_at(x0), upper.y_at(x0))
+            right = chain(k + 1, lower.y_at(x1), upper.y_at(x1))
+            for face in _zipper(left, right, vertices):
+                faces.append(face)
+                labels.append(label)
+
+    # Triangulo envolvente: sus esquinas son los unicos vertices fijos
+    cx, width, height = (min_x + max_x) / 2, max_x - min_x, max_y - min_y
+    apex, left_corner, right_corner = len(vertices), len(vertices) + 1, len(vertices) + 2
+    vertices.extend([
+        (cx, max_y + 2 * width + height),
+        (min_x - width, min_y - height),
+        (max_x + width, min_y - height),
+    ])
+    bottom = [ids[k][0] for k in range(len(lines))]
+    top = [ids[k][-1] for k in range(len(lines))]
+    split = len(bottom) // 2
+    outer = [(apex, a, b) for a, b in zip(top, top[1:])]
+    outer += [(left_corner, b, a) for a, b in zip(bottom[:split], bottom[1:split + 1])]
+    outer += [(right_corner, b, a) for a, b in zip(bottom[split:], bottom[split + 1:])]
+    outer += [
+        (left_corner, right_corner, bottom[split]),
+        (left_corner, top[0], bottom[0]),
+        (left_corner, apex, top[0]),
+        (right_corner, bottom[-1], top[-1]),
+        (right_corner, top[-1], apex),
+    ]
+    faces.extend(outer)
+    labels.extend([OUTSIDE] * len(outer))
+    return vertices, faces, labels, (apex, left_corner, right_corner)
+
+
+def _merged(segments: List[_Segment], x0: float, x1: float, eps: float) -> List[_Segment]:
+    """Collapse segments that coincide inside the slab (shared or overlapping edges)."""
+    merged: List[_Segment] = []
+    for segment in segments:
+        if merged:
+            last = merged[-1]
+            if abs(last.y_at(x0) - segment.y_at(x0)) <= eps and abs(last.y_at(x1) - segment.y_at(x1)) <= eps:
+                merged[-1] = _Segment(
+                    last.start, last.end,
+                    last.above if last.above != OUTSIDE else segment.above,
+                    last.below if last.below != OUTSIDE else segment.below,
+                )
+                continue
+        merged.append(segment)
+    return merged
+
+
+def _unique(values: List[float], eps: float) -> List[float]:
+    result: List[float] = []
+    for value in values:
+        if not result or value - result[-1] > eps:
+            result.append(value)
+    return result
+
+
+def _zipper(left: List[int], right: List[int], vertices: List[Point]) -> List[Tuple[int, int, int]]:
+    """Triangulate the strip between two vertical chains (both bottom to top)."""
+    if len(left) + len(right) < 3:
+        return []
+    faces = []
+    i = j = 0
+    while i < len(left) - 1 or j < len(right) - 1:
+        advance_left = j == len(right) - 1 or (
+            i < len(left) - 1 and vertices[left[i + 1]][1] <= vertices[right[j + 1]][1]
+        )
+        if advance_left:
+            faces.append((left[i], right[j], left[i + 1]))
+            i += 1
+        else:
+            faces.append((left[i], right[j], right[j + 1]))
+            j += 1
+    return faces
+
+
+# --- hierarchy ----------------------------------------------------------------
+
+def _removable(mesh: Polyhedron, vertex: int) -> bool:
+    """Closed ring whose triangulation uses every ring vertex."""
+    neighbors = mesh.vertex_neighbors[vertex]
+    if len(neighbors) < 3 or len(mesh.vertex_faces[vertex]) != len(neighbors):
+        return False
+    ring = mesh._ordered_vertex_ring(vertex)
+    for a, b in zip(ring, ring[1:] + ring[:1]):
+        if b not in mesh.vertex_neighbors[a]:
+            return False
+    triangles = triangulate_polygon([mesh.vertices[v] for v in ring])
+    return len(triangles) == len(ring) - 2
+
+
+def _build_levels(mesh: Polyhedron, fixed: Sequence[int], degree_limit: int) -> List[HierarchyLevel]:
+    levels = [HierarchyLevel(mesh)]
+    fixed_points = {mesh.vertices[v] for v in fixed}
+    current = mesh
+    while current.num_vertices > 3:
+        candidates = [
+            v for v in current.available_vertices()
+            if current.degree(v) <= degree_limit and current.vertices[v] not in fixed_points
+        ]
+        independent = _removable_independent_set(current, candidates)
+        if not independent:
+            break
+        next_layer, parents = current.create_next_layer(independent)
+        levels.append(HierarchyLevel(next_layer, parents))
+        current = next_layer
+    return levels
+
+
+def _removable_independent_set(mesh: Polyhedron, candidates: List[int]) -> List[int]:
+    """``maximal_independent_set`` that only tests removability of vertices it could take."""
+    blocked = set()
+    independent = []
+    for vertex in sorted(candidates, key=mesh.degree):
+        if vertex in blocked or not _removable(mesh, vertex):
+            continue
+        independent.append(vertex)
+        blocked.add(vertex)
+        blocked.update(mesh.vertex_neighbors[vertex])
+    return independent
@@ -0,0 +1,135 @@
+# src/profiler.py
+"""Perfilador por fases del bucle principal y de la simulacion.
+
+Dos formas de medir dentro de un frame:
+
+- ``lap(nombre)``: el tiempo desde la marca anterior se asigna a la fase;
+  sirve para trocear el bucle principal sin reindentarlo.
+- ``phase(nombre)``: context manager, para bloques concretos (simulacion).
+
+``end_frame()`` cierra el frame: los tiempos por fase pasan a una ventana
+movil (percentiles p50/p95/p99 e histograma) y al historial que se exporta
+a CSV con ``dump_csv``. Un perfilador se mide desde un solo hilo, pero sus
+estadisticas se pueden leer desde otro (el HUD lee el de la simulacion).
+"""
+import csv
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Limites del histograma en ms (el ultimo cubo es "mas de 33 ms")
+HISTOGRAM_EDGES_MS = (1, 2, 4, 8, 16, 33)
+
+
+def histogram(values, edges=HISTOGRAM_EDGES_MS):
+    counts = [0] * (len(edges) + 1)
+    for value in values:
+        for i, edge in enumerate(edges):
+            if value <= edge:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, window=600, history=36000):
+        self.window = window
+        self.phases = []
+        self._samples = {}
+        self._history = deque(maxlen=history)
+        self._current = {}
+        self._frame_start = None
+        self._last_mark = None
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    # --- medicion ---------------------------------------------------------------
+    def start_frame(self):
+        now = time.perf_counter()
+        self._frame_start = self._last_mark = now
+        self._current = {}
+
+    def _add(self, name, seconds):
+        self._current[name] = self._current.get(name, 0.0) + seconds * 1000
+
+    def lap(self, name):
+        now = time.perf_counter()
+        if self._last_mark is not None:
+            self._add(name, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._current['frame'] = (now - self._frame_start) * 1000
+        with self._lock:
+            for name, value in self._current.items():
+                samples = self._samples.get(name)
+                if samples is None:
+                    samples = self._samples[name] = deque(maxlen=self.window)
+                    self.phases.append(name)
+                samples.append(value)
+            self._history.append(self._current)
+            self.frames += 1
+        self._current = {}
+        self._frame_start = self._last_mark = now
+
+    # --- estadisticas -------------------------------------------------------------
+    def stats(self):
+        """``{fase: (p50, p95, p99, max)}`` en ms sobre la ventana movil."""
+        result = {}
+        with self._lock:
+            windows = [(name, list(self._samples[name])) for name in self.phases]
+        for name, values in windows:
+            values.sort()
+            result[name] = (percentile(values, 0.50), percentile(values, 0.95),
+                            percentile(values, 0.99), values[-1] if values else 0.0)
+        return result
+
+    def histogram(self, name, edges=HISTOGRAM_EDGES_MS):
+        with self._lock:
+            values = list(self._samples.get(name, ()))
+        return histogram(values, edges)
+
+    # --- exportacion ----------------------------------------------------------------
+    def dump_csv(self, path):
+        """Escribe un CSV por frame (ms por fase) y ``*_summary.csv`` con percentiles
+        e histograma de todo el historial."""
+        with self._lock:
+            phases, history, frames = list(self.phases), list(self._history), self.frames
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["frame"] + phases)
+            first = frames - len(history)
+            for offset, row in enumerate(history):
+                writer.writerow([first + offset] + [f"{row.get(name, 0.0):.4f}" for name in phases])
+        stem, ext = os.path.splitext(path)
+        with open(f"{stem}_summary{ext or '.csv'}", "w", newline="") as handle:
+            writer = csv.writer(handle)
+            buckets = [f"le_{edge}ms" for edge in HISTOGRAM_EDGES_MS] + [f"gt_{HISTOGRAM_EDGES_MS[-1]}ms"]
+            writer.writerow(["phase", "samples", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"] + buckets)
+            for name in phases:
+                values = sorted(row[name] for row in history if name in row)
+                if not values: continue
+                summary = (sum(values) / len(values), percentile(values, 0.50), percentile(values, 0.95),
+                           percentile(values, 0.99), values[-1])
+                writer.writerow([name, len(values)] + [f"{v:.4f}" for v in summary] + histogram(values))
@@ -0,0 +1,319 @@
+"""Per-piece collision engines and the cost model that picks one.
+
+Every engine answers the hierarchy query API (``intersects_segment``,
+``intersects_polyline``, ``trace_intersection``, ``with_transform``,
+``set_transform``, ``bounds``) for a polygon in local coordinates placed by
+an optional ``Affine``, like ``DKHierarchy``. Strokes are tested as given
+against the vertices mapped forward (mapped back, a stroke that touches an
+edge is rounded off it):
+
+- ``direct``: edge tests against the convex polygon, O(n) per segment.
+- ``numpy``: separating-axis test of the whole polyline at once.
+- ``dk``: the piece's DK hierarchy, O(log n) per segment.
+
+All of them use the closed-polygon rule of ``geometry.segment_hits_convex``
+(touching an edge or a vertex is a hit) with the same arithmetic, so the
+engine never changes a score.
+
+``EngineModel.calibrate`` times the engines on regular polygons and fits
+``a + b * n`` (``a + b * log2(n)`` for ``dk``) seconds per query;
+``choose_engine`` gives each piece the cheapest one for its vertex count.
+Until a calibration runs (``calibrate_in_background``), ``DEFAULT_MODEL``
+is used. Force an engine with ``CONVEXGLYPH_ENGINE=direct|numpy|dk`` or
+``set_forced_engine``. Sessions record the model they started with
+(``session_model``, ``SessionHeader.engine_costs``) so replays pick the
+same engines.
+
+    python -m src.query_engine   # calibrate and print the choice per size
+"""
+from __future__ import annotations
+
+import abc
+import copy
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+from src.dk_hierarchy import Affine, hierarchy_from_convex_polygon
+from src.geometry import bounds_overlap, polygon_bounds, polygon_orientation, segment_bounds, segment_hits_convex
+
+
+Point = Tuple[float, float]
+
+ENGINES = ("direct", "numpy", "dk")
+CALIBRATION_SIZES = (4, 8, 16, 32, 64)
+# Points per calibration polyline (a frame of stroke input)
+CALIBRATION_POINTS = 4
+
+
+def segments_hit_convex(polygon, starts, ends, orientation=None):
+    """Mask of the segments ``starts[i] -> ends[i]`` that touch the closed convex polygon.
+
+    The Cyrus-Beck clip of ``geometry.segment_hits_convex``, one row per
+    segment and one column per edge, with the same floating-point operations.
+    """
+    if orientation is None:
+        orientation = polygon_orientation(polygon)
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    if orientation == 0:
+        return np.array([segment_hits_convex(tuple(a), tuple(b), polygon, 0) for a, b in zip(starts, ends)], dtype=bool)
+    poly = np.asarray(polygon, dtype=float)
+    ax, ay = np.roll(poly[:, 0], 1), np.roll(poly[:, 1], 1)
+    ex, ey = poly[:, 0] - ax, poly[:, 1] - ay
+    sx, sy = starts[:, :1], starts[:, 1:]
+    tx, ty = ends[:, :1], ends[:, 1:]
+    start = orientation * (ex * (sy - ay) - ey * (sx - ax))
+    end = orientation * (ex * (ty - ay) - ey * (tx - ax))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = start / (start - end)
+    t_low = np.maximum(np.where((start < 0) & (end >= 0), crossing, -np.inf).max(axis=1), 0.0)
+    t_high = np.minimum(np.where((end < 0) & (start >= 0), crossing, np.inf).min(axis=1), 1.0)
+    outside = ((start < 0) & (end < 0)).any(axis=1)
+    return ~outside & (t_low <= t_high)
+
+
+class PolygonQuery(abc.ABC):
+    """Transform handling shared by the engines that test the polygon itself."""
+
+    engine = ""
+    __slots__ = ("polygon", "transform", "_world")
+
+    def __init__(self, polygon: Sequence[Point], transform: Optional[Affine] = None):
+        self.polygon = [(float(x), float(y)) for x, y in polygon]
+        self.set_transform(transform)
+
+    def with_transform(self, transform: Optional[Affine]) -> "PolygonQuery":
+        clone = copy.copy(self)
+        clone.set_transform(transform)
+        return clone
+
+    def set_transform(self, transform: Optional[Affine]) -> None:
+        self.transform = transform
+        self._world = None
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        return self._placed()[1]
+
+    def _placed(self):
+        """``(vertices, bounds, orientation)`` in world space, computed on the
+        first query after a transform change."""
+        if self._world is None:
+            world = self.polygon if self.transform is None else [self.transform.apply(p) for p in self.polygon]
+            self._world = (self._vertices(world), polygon_bounds(world), polygon_orientation(world))
+        return self._world
+
+    def _vertices(self, world: Sequence[Point]):
+        return world
+
+    def intersects_segment(self, start: Point, end: Point) -> bool:
+        return self.intersects_polyline((start, end))
+
+    @abc.abstractmethod
+    def intersects_polyline(self, points: Sequence[Point]) -> bool:
+        """True if any segment of the polyline (world coordinates) touches the piece."""
+
+    def trace_intersection(self, start: Point, end: Point):
+        polygon = [self.transform.apply(p) for p in self.polygon] if self.transform is not None else list(self.polygon)
+        return [(0, polygon, self.intersects_segment(start, end))]
+
+
+def _segments(points: Sequence[Point]) -> Sequence[Point]:
+    """A single point is tested as a zero-length segment."""
+    return [points[0], points[0]] if len(points) == 1 else points
+
+
+class DirectQuery(PolygonQuery):
+    """Edge tests against the polygon, after a bounding-box reject."""
+
+    engine = "direct"
+    __slots__ = ()
+
+    def intersects_polyline(self, points: Sequence[Point]) -> bool:
+        if not points:
+            return False
+        points = _segments(points)
+        polygon, box, orientation = self._placed()
+        for start, end in zip(points, points[1:]):
+            if bounds_overlap(segment_bounds(start, end), box) and segment_hits_convex(start, end, polygon, orientation):
+                return True
+        return False
+
+
+class VectorizedQuery(PolygonQuery):
+    """All segments of the polyline against all polygon axes in one NumPy pass."""
+
+    engine = "numpy"
+    __slots__ = ()
+
+    def _vertices(self, world: Sequence[Point]):
+        return np.asarray(world, dtype=float)
+
+    def intersects_polyline(self, points: Sequence[Point]) -> bool:
+        if not points:
+            return False
+        polygon, _, orientation = self._placed()
+        points = np.asarray(_segments(points), dtype=float)
+        return bool(segments_hit_convex(polygon, points[:-1], points[1:], orientation).any())
+
+
+# --- cost model -------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class EngineModel:
+    """Seconds per polyline query: ``a + b * n`` (``dk``: ``a + b * log2(n)``)."""
+
+    costs: Dict[str, Tuple[float, float]]
+
+    def cost(self, engine: str, vertices: int) -> float:
+        a, b = self.costs[engine]
+        return a + b * (math.log2(max(vertices, 2)) if engine == "dk" else vertices)
+
+    def best(self, vertices: int) -> str:
+        return min(self.costs, key=lambda engine: self.cost(engine, vertices))
+
+    def rows(self) -> Tuple[Tuple[str, float, float], ...]:
+        """``(engine, a, b)`` rows, as stored in ``SessionHeader.engine_costs``."""
+        return tuple((engine, a, b) for engine, (a, b) in self.costs.items())
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "EngineModel":
+        return cls({engine: (float(a), float(b)) for engine, a, b in rows})
+
+    @classmethod
+    def calibrate(cls, sizes: Sequence[int] = CALIBRATION_SIZES, queries: int = 100, seed: int = 0) -> "EngineModel":
+        rng = random.Random(seed)
+        engines = [engine for engine in ENGINES if engine != "numpy" or np is not None]
+        samples: Dict[str, list] = {engine: [] for engine in engines}
+        for n in sizes:
+            polygon = [(math.cos(2 * math.pi * i / n), math.sin(2 * math.pi * i / n)) for i in range(n)]
+            polylines = []
+            for _ in range(queries):
+                x, y = rng.uniform(-2, 2), rng.uniform(-2, 2)
+                points = [(x, y)]
+                for _ in range(CALIBRATION_POINTS - 1):
+                    x, y = x + rng.uniform(-0.3, 0.3), y + rng.uniform(-0.3, 0.3)
+                    points.append((x, y))
+                polylines.append(points)
+            for engine in engines:
+                query = make_query(engine, polygon)
+                start = time.perf_counter()
+                for points in polylines:
+                    query.intersects_polyline(points)
+                samples[engine].append((n, (time.perf_counter() - start) / queries))
+        costs = {}
+        for engine, points in samples.items():
+            xs = [math.log2(n) if engine == "dk" else n for n, _ in points]
+            costs[engine] = _fit_line(xs, [cost for _, cost in points])
+        return cls(costs)
+
+
+def _fit_line(xs: Sequence[float], ys: Sequence[float]) -> Tuple[float, float]:
+    """Least-squares ``(a, b)`` of ``y = a + b * x``, with ``a, b >= 0``."""
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    b = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 0.0
+    b = max(b, 0.0)
+    return max(mean_y - b * mean_x, 0.0), b
+
+
+# Typical calibration (``python -m src.query_engine``); replaced by ``calibrate_in_background``
+DEFAULT_MODEL = EngineModel({
+    "direct": (4.0e-6, 0.13e-6),
+    "numpy": (54e-6, 0.005e-6),
+    "dk": (4.5e-6, 4.4e-6),
+})
+
+_model: Optional[EngineModel] = None
+_forced: Optional[str] = None
+_calibration: Optional[threading.Thread] = None
+
+
+def engine_model(rows: Optional[Iterable[Sequence]] = None) -> EngineModel:
+    """The model in use, or the one recorded as ``rows``.
+
+    Without NumPy its engine is dropped (``direct`` stands in if nothing is
+    left); every engine gives the same answers, so scores do not change.
+    """
+    model = EngineModel.from_rows(rows) if rows else (_model or DEFAULT_MODEL)
+    if np is None and "numpy" in model.costs:
+        costs = {engine: cost for engine, cost in model.costs.items() if engine != "numpy"}
+        model = EngineModel(costs or {"direct": (0.0, 0.0)})
+    return model
+
+
+def calibrate_in_background() -> threading.Thread:
+    """Calibrate once on a daemon thread; pieces created later use the result."""
+    global _calibration
+
+    def run():
+        global _model
+        _model = EngineModel.calibrate()
+
+    if _calibration is None:
+        _calibration = threading.Thread(target=run, name="engine-calibration", daemon=True)
+        _calibration.start()
+    return _calibration
+
+
+def set_forced_engine(engine: Optional[str]) -> None:
+    """Use ``engine`` for every new piece (``None`` = back to the cost model)."""
+    global _forced
+    if engine is not None and engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r} (expected one of {', '.join(ENGINES)})")
+    _forced = engine
+
+
+def forced_engine() -> Optional[str]:
+    return _forced or os.environ.get("CONVEXGLYPH_ENGINE") or None
+
+
+def session_model() -> EngineModel:
+    """Model a new session records: the forced engine alone, or the current model."""
+    forced = forced_engine()
+    return EngineModel({forced: (0.0, 0.0)}) if forced else engine_model()
+
+
+def select_engine(vertices: int, model: Optional[EngineModel] = None) -> str:
+    return forced_engine() or (model or engine_model()).best(vertices)
+
+
+def make_query(engine: str, polygon: Sequence[Point], hierarchy=None):
+    if engine == "direct":
+        return DirectQuery(polygon)
+    if engine == "numpy":
+        if np is None:
+            raise ValueError("The numpy engine needs NumPy installed")
+        return VectorizedQuery(polygon)
+    if engine == "dk":
+        return hierarchy if hierarchy is not None else hierarchy_from_convex_polygon(polygon)
+    raise ValueError(f"Unknown engine {engine!r} (expected one of {', '.join(ENGINES)})")
+
+
+def choose_engine(polygon: Sequence[Point], hierarchy=None, engine: Optional[str] = None,
+                  model: Optional[EngineModel] = None):
+    """``(engine, query)`` for a piece; ``hierarchy`` is reused (not built) for ``dk``."""
+    engine = engine or select_engine(len(polygon), model)
+    return engine, make_query(engine, polygon, hierarchy)
+
+
+def main() -> None:
+    model = EngineModel.calibrate()
+    for engine, (a, b) in model.costs.items():
+        print(f"{engine:>6}: {a * 1e6:7.2f} us + {b * 1e6:6.3f} us * {'log2 n' if engine == 'dk' else 'n'}")
+    for n in (4, 8, 16, 64, 256, 1024, 4096):
+        costs = "  ".join(f"{engine} {model.cost(engine, n) * 1e6:7.1f}" for engine in model.costs)
+        print(f"n={n:>5}: {model.best(n):>6}  ({costs} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# src/renderer.py
+"""Renderizado por capas con rectangulos sucios para la pantalla de juego.
+
+La palabra se pre-renderiza (fondo + cuadricula + piezas) en tiles de
+``TILE_WIDTH`` pixeles de ancho en coordenadas de mundo, asi una palabra muy
+larga no necesita una superficie gigante. Desplazar la camara es copiar la
+ventana visible desde uno o dos tiles; las piezas solo se vuelven a dibujar
+en su tile cuando cambia su estado (resaltado / completado) o cuando aparecen
+por primera vez (letras que se construyen tarde en modo documento).
+Mientras la camara no se mueve, la pantalla se presenta con
+``display.update(rects)``. Las capas de interfaz (HUD, trazo, avisos) se
+dibujan encima cada frame y registran su rectangulo con ``mark_dirty`` para
+borrarse en el siguiente.
+"""
+import weakref
+from collections import OrderedDict
+
+import pygame
+
+GRID_STEP = 50
+GRID_COLOR = (40, 40, 40)
+BACKGROUND = (30, 30, 30)
+# Multiplo de GRID_STEP para que la cuadricula quede alineada entre tiles
+TILE_WIDTH = 1000
+MAX_TILES = 8
+
+
+def pixel_color(pixel):
+    return (0, 255, 0) if pixel.completed else ((255, 255, 0) if pixel.highlight else (100, 100, 255))
+
+
+def draw_pixel(surface, pixel, camera_x):
+    screen_vertices = [(v[0] - camera_x, v[1]) for v in pixel.vertices]
+    pygame.draw.polygon(surface, pixel_color(pixel), screen_vertices, 0)
+    pygame.draw.polygon(surface, (50, 50, 50), screen_vertices, 1)
+
+
+def draw_word(surface, word_goal, camera_x):
+    """Dibuja la palabra directamente (sin tiles), p. ej. bajo la pantalla de resultados."""
+    width = surface.get_width()
+    for pixel in word_goal.visible_pixels(camera_x, width):
+        if any(-50 < v[0] - camera_x < width + 50 for v in pixel.vertices):
+            draw_pixel(surface, pixel, camera_x)
+
+
+def make_grid_layer(width, height):
+    """Fondo con la cuadricula, alineada a coordenadas de mundo multiplo de ``GRID_STEP``."""
+    layer = pygame.Surface((width, height))
+    layer.fill(BACKGROUND)
+    for x in range(0, width, GRID_STEP):
+        pygame.draw.line(layer, GRID_COLOR, (x, 0), (x, height))
+    for y in range(0, height, GRID_STEP):
+        pygame.draw.line(layer, GRID_COLOR, (0, y), (width, y))
+    return layer
+
+
+def pixel_screen_rect(pixel, camera_x):
+    xs = [v[0] for v in pixel.vertices]
+    ys = [v[1] for v in pixel.vertices]
+    left = int(min(xs) - camera_x) - 1
+    top = int(min(ys)) - 1
+    return pygame.Rect(left, top, int(max(xs) - camera_x) - left + 2, int(max(ys)) - top + 2)
+
+
+class LayeredRenderer:
+    def __init__(self, width, height, tile_width=TILE_WIDTH, max_tiles=MAX_TILES):
+        self.tile_width = tile_width
+        self.max_tiles = max_tiles
+        self.size = None
+        self.word_goal = None
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        self.size = (width, height)
+        self.grid_layer = make_grid_layer(self.tile_width, height)
+        self._reset_tiles()
+        self.invalidate()
+
+    def _reset_tiles(self):
+        # indice de tile -> superficie, del menos al mas recientemente usado
+        self.tiles = OrderedDict()
+        # indice de tile -> {pieza: estado con el que se dibujo en ese tile}
+        self.tile_states = {}
+        self._spans = weakref.WeakKeyDictionary()
+
+    def invalidate(self):
+        """Fuerza presentar la pantalla completa en el siguiente frame."""
+        self.needs_full = True
+        self.camera_x = None
+        self.overlay_rects = []
+
+    # --- tiles ----------------------------------------------------------------
+    def _visible_tiles(self, camera_x):
+        first = camera_x // self.tile_width
+        last = (camera_x + self.size[0] - 1) // self.tile_width
+        return range(first, last + 1)
+
+    def _ensure_tiles(self, indices):
+        for index in indices:
+            if index in self.tiles:
+                self.tiles.move_to_end(index)
+                continue
+            tile = pygame.Surface((self.tile_width, self.size[1]))
+            tile.blit(self.grid_layer, (0, 0))
+            self.tiles[index] = tile
+            self.tile_states[index] = weakref.WeakKeyDictionary()
+        keep = set(indices)
+        for index in list(self.tiles):
+            if len(self.tiles) <= self.max_tiles: break
+            if index in keep: continue
+            del self.tiles[index]
+            del self.tile_states[index]
+
+    def _pixel_span(self, pixel):
+        span = self._spans.get(pixel)
+        if span is None:
+            xs = [v[0] for v in pixel.vertices]
+            # +-1 por el contorno de 1px
+            span = range(int((min(xs) - 1) // self.tile_width), int((max(xs) + 1) // self.tile_width) + 1)
+            self._spans[pixel] = span
+        return span
+
+    def _sync_tiles(self, word_goal, camera_x):
+        """Dibuja en sus tiles las piezas nuevas o que cambiaron; devuelve sus rects en pantalla."""
+        changed = []
+        for pixel in word_goal.visible_pixels(camera_x, self.size[0]):
+            state = (pixel.completed, pixel.highlight)
+            redrawn = False
+            for index in self._pixel_span(pixel):
+                states = self.tile_states.get(index)
+                if states is None or states.get(pixel) == state: continue
+                draw_pixel(self.tiles[index], pixel, index * self.tile_width)
+                states[pixel] = state
+                redrawn = True
+            if redrawn:
+                changed.append(pixel_screen_rect(pixel, camera_x))
+        return changed
+
+    def _blit_view(self, screen, rect, camera_x):
+        """Copia ``rect`` (coordenadas de pantalla) desde los tiles."""
+        world_left = rect.left + camera_x
+        world_right = rect.right + camera_x
+        for index in range(world_left // self.tile_width, (world_right - 1) // self.tile_width + 1):
+            tile = self.tiles.get(index)
+            if tile is None: continue
+            tile_x = index * self.tile_width
+            left = max(world_left, tile_x)
+            right = min(world_right, tile_x + self.tile_width)
+            screen.blit(tile, (left - camera_x, rect.top), (left - tile_x, rect.top, right - left, rect.height))
+
+    # --- frame ----------------------------------------------------------------
+    def begin_frame(self, screen, word_goal, camera_x):
+        """Lleva la escena a la pantalla: la ventana completa o solo las zonas sucias."""
+        if screen.get_size() != self.size:
+            self.resize(*screen.get_size())
+        if word_goal is not self.word_goal:
+            self._reset_tiles()
+            self.word_goal = word_goal
+            self.needs_full = True
+        camera_x = int(camera_x)
+        self._ensure_tiles(self._visible_tiles(camera_x))
+        changed = self._sync_tiles(word_goal, camera_x)
+        if self.needs_full or camera_x != self.camera_x:
+            # Desplazar la camara es solo copiar la ventana visible de los tiles
+            self._blit_view(screen, screen.get_rect(), camera_x)
+            self.camera_x = camera_x
+            self.full_frame = True
+            self.dirty = []
+        else:
+            self.dirty = changed + self.overlay_rects
+            for rect in self.dirty:
+                self._blit_view(screen, rect.clip(screen.get_rect()), camera_x)
+            self.full_frame = False
+        self.needs_full = False
+        self.overlay_rects = []
+
+    def mark_dirty(self, rect):
+        rect = pygame.Rect(rect)
+        if rect.width > 0 and rect.height > 0:
+            self.overlay_rects.append(rect)
+
+    def present(self):
+        if self.full_frame:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty + self.overlay_rects)
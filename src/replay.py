@@ -0,0 +1,126 @@
+# src/replay.py
+"""Reproduccion sin ventana de sesiones grabadas, tan rapido como de la CPU.
+
+    python -m src.replay recordings/session_*.cgs [--json] [--repeat N] [--log]
+
+Cada grabacion se reconstruye (misma palabra y layout) y sus pasos se
+aplican con ``Simulation.advance`` sin esperar al reloj, asi que el
+resultado (progreso y precision) es el mismo que en la partida. Sirve como
+oraculo de regresion y como generador de carga; se informa el tiempo por
+fase (layout, update, valid_area, progress). Con ``--log`` se regenera el
+registro de trazo (``.cgl``, ver ``src.stroke_log``) junto a cada grabacion.
+"""
+import json
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import replace
+
+from src.session import build_goal, read_session
+from src.simulation import Simulation
+from src.stroke_log import StrokeLog, log_path_for
+
+
+class PhaseTimings:
+    """Tiempo acumulado y numero de llamadas por fase."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] += time.perf_counter() - start
+            self.calls[name] += 1
+
+    def as_dict(self):
+        return {
+            name: {
+                "total_ms": self.totals[name] * 1000,
+                "calls": self.calls[name],
+                "mean_us": self.totals[name] / self.calls[name] * 1e6,
+            }
+            for name in self.totals
+        }
+
+
+def replay_steps(simulation, steps):
+    """Aplica los pasos grabados; los ticks sin registro repiten la ultima entrada."""
+    polyline, is_clicking = None, False
+    tick = 0
+    for step_tick, _, clicking, points in steps:
+        if step_tick <= tick: continue
+        while tick + 1 < step_tick:
+            simulation.advance(polyline and polyline[-1:], is_clicking)
+            tick += 1
+        if points:
+            polyline, is_clicking = points, clicking
+            simulation.advance(polyline, is_clicking)
+        else:
+            # Marca de fin: paso sin entrada nueva
+            simulation.advance(polyline and polyline[-1:], is_clicking)
+        tick = step_tick
+    return simulation.snapshot
+
+
+def replay(path, log_path=None, atlas=None, coverage=None):
+    """``coverage`` reemplaza la regla de cobertura grabada (re-puntuar con otra regla)."""
+    header, steps = read_session(path)
+    if coverage is not None: header = replace(header, coverage=coverage)
+    timings = PhaseTimings()
+    start = time.perf_counter()
+    with timings.phase("layout"):
+        goal = build_goal(header, background_build=False, atlas=atlas)
+    log = None
+    if log_path:
+        log = StrokeLog(log_path, {"text": header.text, "mode": header.mode}, goal.total_pieces, header.timestep)
+    simulation = Simulation(goal, timestep=header.timestep, phases=timings, log=log)
+    snapshot = replay_steps(simulation, steps)
+    if log: log.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "path": path,
+        "text": header.text,
+        "mode": header.mode,
+        "ticks": snapshot.tick,
+        "recorded_steps": len(steps),
+        "progress": snapshot.progress,
+        "precision": snapshot.precision,
+        "completed": snapshot.completed,
+        "wall_ms": elapsed * 1000,
+        "ticks_per_second": snapshot.tick / elapsed if elapsed > 0 else 0.0,
+        "phases": timings.as_dict(),
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reproduce sesiones grabadas sin ventana")
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument("--repeat", type=int, default=1, help="veces que se reproduce cada grabacion")
+    parser.add_argument("--json", action="store_true", help="una linea JSON por reproduccion")
+    parser.add_argument("--log", action="store_true", help="regenera el registro de trazo .cgl de cada grabacion")
+    args = parser.parse_args(argv)
+    for path in args.recordings:
+        for _ in range(args.repeat):
+            result = replay(path, log_path_for(path) if args.log else None)
+            if args.json:
+                print(json.dumps(result, ensure_ascii=False))
+                continue
+            print(f"{path}: '{result['text'][:30]}' ({result['mode']}) {result['ticks']} pasos "
+                  f"en {result['wall_ms']:.1f} ms ({result['ticks_per_second']:.0f} pasos/s)")
+            print(f"  progreso {result['progress']:.1f}%  precision {result['precision']:.1f}%  "
+                  f"completado {'si' if result['completed'] else 'no'}")
+            for name, phase in result["phases"].items():
+                print(f"  {name:<11} {phase['total_ms']:9.2f} ms  {phase['calls']:7d} llamadas  {phase['mean_us']:9.1f} us/llamada")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
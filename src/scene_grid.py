@@ -0,0 +1,111 @@
+"""Uniform grid over the pieces of a scene for stroke queries.
+
+Each piece's bounding box is registered in every cell it overlaps; cells are
+stored sparsely, so empty space (margins, between pages) costs nothing.
+``candidates_along`` walks the cells a polyline crosses (Amanatides-Woo
+traversal) and reports the pieces whose box touches one of its segments, so a
+query costs O(cells crossed + pieces reported) whatever the size of the
+scene. The exact test against each candidate is left to the caller.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.geometry import bounds_overlap, segment_bounds
+
+
+Point = Tuple[float, float]
+Bounds = Tuple[float, float, float, float]
+Cell = Tuple[int, int]
+
+# Crossings this close (in segment parameter t) count as passing through a corner
+CORNER_TOLERANCE = 1e-9
+
+
+class SceneGrid:
+    """Sparse uniform grid of ``(piece id, bounds)`` entries.
+
+    ``cell_size`` defaults to the median piece extent, so a piece spans a
+    few cells and a cell holds a few pieces.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, Bounds]], cell_size: Optional[float] = None):
+        entries = list(entries)
+        self.cell_size = cell_size or _median_extent(entries)
+        self.bounds: Dict[int, Bounds] = {}
+        self.cells: Dict[Cell, List[int]] = {}
+        for piece, box in entries:
+            self.bounds[piece] = box
+            for cell in self._cells_in(box):
+                self.cells.setdefault(cell, []).append(piece)
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    def candidates_along(self, points: Sequence[Point]) -> List[int]:
+        """Pieces whose box touches a segment of the polyline, in the order the walk meets them."""
+        if not points:
+            return []
+        if len(points) == 1:
+            points = [points[0], points[0]]
+        found: List[int] = []
+        seen = set()
+        for start, end in zip(points, points[1:]):
+            box = segment_bounds(start, end)
+            for cell in self._walk(start, end):
+                for piece in self.cells.get(cell, ()):
+                    if piece not in seen and bounds_overlap(self.bounds[piece], box):
+                        seen.add(piece)
+                        found.append(piece)
+        return found
+
+    def _cells_in(self, box: Bounds) -> Iterator[Cell]:
+        size = self.cell_size
+        first_i, first_j = math.floor(box[0] / size), math.floor(box[1] / size)
+        last_i, last_j = math.floor(box[2] / size), math.floor(box[3] / size)
+        for i in range(first_i, last_i + 1):
+            for j in range(first_j, last_j + 1):
+                yield i, j
+
+    def _walk(self, start: Point, end: Point) -> Iterator[Cell]:
+        """Cells crossed by the segment, from ``start`` to ``end``.
+
+        Never steps past the end cell on either axis, and where the segment
+        crosses a cell corner (up to ``CORNER_TOLERANCE``) it also visits the
+        two cells that only touch it at that corner.
+        """
+        size = self.cell_size
+        x0, y0 = start[0] / size, start[1] / size
+        x1, y1 = end[0] / size, end[1] / size
+        i, j = math.floor(x0), math.floor(y0)
+        last_i, last_j = math.floor(x1), math.floor(y1)
+        dx, dy = x1 - x0, y1 - y0
+        step_i = 1 if dx > 0 else -1
+        step_j = 1 if dy > 0 else -1
+        # Parametro t (0..1) del siguiente cruce de una linea vertical / horizontal de la rejilla
+        next_x = ((i + (dx > 0)) - x0) / dx if dx else math.inf
+        next_y = ((j + (dy > 0)) - y0) / dy if dy else math.inf
+        delta_x = abs(1 / dx) if dx else math.inf
+        delta_y = abs(1 / dy) if dy else math.inf
+        yield i, j
+        while i != last_i or j != last_j:
+            move_i = j == last_j or (i != last_i and next_x <= next_y)
+            move_j = i == last_i or (j != last_j and next_y <= next_x)
+            if i != last_i and j != last_j and abs(next_x - next_y) <= CORNER_TOLERANCE:
+                move_i = move_j = True
+                yield i + step_i, j
+                yield i, j + step_j
+            if move_i:
+                i += step_i
+                next_x += delta_x
+            if move_j:
+                j += step_j
+                next_y += delta_y
+            yield i, j
+
+
+def _median_extent(entries: Sequence[Tuple[int, Bounds]]) -> float:
+    extents = sorted(max(box[2] - box[0], box[3] - box[1]) for _, box in entries)
+    extent = extents[len(extents) // 2] if extents else 0.0
+    return extent if extent > 0 else 1.0
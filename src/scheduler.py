@@ -0,0 +1,57 @@
+# src/scheduler.py
+"""Trabajo pendiente repartido en el tiempo que sobra de cada frame.
+
+Un trabajo es cualquier objeto con ``step(budget) -> bool`` (como
+``HierarchyBuild``): avanza hasta agotar ``budget`` segundos y dice si ya
+termino. El bucle del juego llama a ``FrameScheduler.run`` una vez por frame
+con el tiempo libre; los trabajos avanzan en orden de llegada, y los de
+``background`` (regenerar el atlas) solo cuando no queda nada mas urgente.
+Un frame se pasa como mucho un tramo de su presupuesto.
+"""
+import time
+from collections import deque
+
+# Con menos tiempo libre no se empieza ningun tramo
+MIN_BUDGET = 0.001
+
+
+class FrameScheduler:
+    """Cola de trabajos por tramos. ``submit`` se puede llamar desde cualquier
+    hilo (``LetterBuilder``); ``run`` y ``drain`` solo desde el hilo del juego."""
+
+    def __init__(self):
+        self._jobs = deque()
+        self._background = deque()
+        self.completed = 0
+        self.busy_time = 0.0
+
+    def submit(self, job, background=False):
+        (self._background if background else self._jobs).append(job)
+        return job
+
+    @property
+    def pending(self):
+        return len(self._jobs) + len(self._background)
+
+    def run(self, budget):
+        """Avanza trabajos durante ``budget`` segundos; devuelve cuantos quedan."""
+        if budget < MIN_BUDGET or not self.pending: return self.pending
+        start = time.perf_counter()
+        deadline = start + budget
+        while self.pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0: break
+            jobs = self._jobs or self._background
+            if jobs[0].step(remaining):
+                jobs.popleft()
+                self.completed += 1
+        self.busy_time += time.perf_counter() - start
+        return self.pending
+
+    def drain(self):
+        """Termina todo lo pendiente sin limite de tiempo."""
+        while self.pending:
+            jobs = self._jobs or self._background
+            jobs[0].step()
+            jobs.popleft()
+            self.completed += 1
@@ -0,0 +1,245 @@
+# src/service.py
+"""Servicio local de evaluacion de trazos para varias estaciones a la vez.
+
+    python -m src.service [--host 127.0.0.1] [--port 8765] [--unix /tmp/convexglyph.sock] [--workers N]
+
+Protocolo: una linea JSON por mensaje, en ambos sentidos.
+
+Cliente -> servidor::
+
+    {"type": "start", "text": "HOLA", "screen_width": 1280, "screen_height": 720, "time_limit": null, "coverage": 0.5}
+    {"type": "input", "points": [[x, y], ...], "clicking": true}
+    {"type": "end"}
+
+Servidor -> cliente: ``started`` (id de sesion, piezas, modo), un
+``progress`` por cada ``input`` (tick, progreso, precision, completado),
+``summary`` al terminar y ``error`` si un mensaje no es valido (la
+conexion sigue abierta).
+
+Un ``start`` monta la escena en un hilo (``asyncio.to_thread``), con su
+rejilla y su localizador de puntos ya construidos antes de responder
+``started``: en un documento largo tarda segundos y mientras tanto el
+proceso sigue atendiendo a las demas estaciones.
+
+Cada ``input`` es un paso de ``Simulation.advance``, igual que en el juego y
+en ``src.replay``. Todas las sesiones comparten el atlas de glifos del
+proceso (``default_atlas``): las piezas y sus jerarquias DK se construyen o
+leen una vez y cada sesion solo las traslada a su posicion. Con
+``--workers N`` el atlas se publica en memoria compartida
+(``src.shared_pool``) y N procesos atienden el mismo puerto TCP
+(``SO_REUSEPORT``) sin construir ni copiar las jerarquias.
+"""
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import signal
+import sys
+from dataclasses import replace
+
+from src.glyph_atlas import default_atlas
+from src.session import build_goal, goal_layout
+from src.simulation import Simulation
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class StrokeSession:
+    def __init__(self, session_id, header, atlas):
+        self.id = session_id
+        self.header = header
+        self.goal = build_goal(header, background_build=False, atlas=atlas)
+        # Se construyen ya para que el primer ``input`` no pague el localizador de la escena
+        self.goal.scene_grid()
+        self.goal.scene_locator()
+        self.simulation = Simulation(self.goal, timestep=header.timestep)
+
+    def advance(self, points, is_clicking):
+        polyline = parse_points(points) or None
+        snapshot = self.simulation.advance(polyline, is_clicking)
+        return {
+            "type": "progress", "session": self.id, "tick": snapshot.tick,
+            "progress": snapshot.progress, "precision": snapshot.precision,
+            "completed": snapshot.completed,
+        }
+
+    def summary(self):
+        snapshot = self.simulation.snapshot
+        return {
+            "type": "summary", "session": self.id, "ticks": snapshot.tick,
+            "progress": snapshot.progress, "precision": snapshot.precision,
+            "total_samples": snapshot.total_samples, "valid_samples": snapshot.valid_samples,
+            "completed": snapshot.completed,
+        }
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def parse_points(points):
+    """Polilinea de un ``input``: lista de pares ``[x, y]`` de numeros finitos."""
+    if not isinstance(points, list):
+        raise ValueError("'points' debe ser una lista de [x, y]")
+    polyline = []
+    for point in points:
+        if not (isinstance(point, (list, tuple)) and len(point) == 2 and all(map(_is_number, point))):
+            raise ValueError(f"punto no valido: {point!r} (se espera [x, y])")
+        polyline.append((float(point[0]), float(point[1])))
+    return polyline
+
+
+def _number(message, key, default, minimum=None, maximum=None):
+    value = message.get(key, default)
+    if value is None and default is None: return None
+    if not _is_number(value) or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"'{key}' no valido: {value!r}")
+    return value
+
+
+class StrokeService:
+    def __init__(self, atlas=None):
+        self.atlas = atlas or default_atlas()
+        self._ids = itertools.count(1)
+        self.active = 0
+        self.served = 0
+
+    def _start(self, message):
+        text = message.get("text", "")
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("'start' necesita un texto")
+        screen_width = int(_number(message, "screen_width", 1280, minimum=1))
+        screen_height = int(_number(message, "screen_height", 720, minimum=1))
+        time_limit = _number(message, "time_limit", None, minimum=0)
+        header = goal_layout(text.strip(), screen_width, screen_height, time_limit)
+        if "coverage" in message: header = replace(header, coverage=float(_number(message, "coverage", 0.0, 0, 1)))
+        session = StrokeSession(next(self._ids), header, self.atlas)
+        reply = {"type": "started", "session": session.id, "mode": header.mode,
+                 "pieces": session.goal.total_pieces}
+        return session, reply
+
+    def handle(self, session, message):
+        """Atiende un mensaje ya decodificado; devuelve ``(sesion, respuesta)``."""
+        if not isinstance(message, dict):
+            raise ValueError("cada mensaje debe ser un objeto JSON")
+        kind = message.get("type")
+        if kind == "start":
+            return self._start(message)
+        if session is None:
+            raise ValueError("primero hay que enviar 'start'")
+        if kind == "input":
+            return session, session.advance(message.get("points", []), bool(message.get("clicking")))
+        if kind == "end":
+            self.served += 1
+            return None, session.summary()
+        raise ValueError(f"tipo de mensaje desconocido: {kind!r}")
+
+    async def handle_async(self, session, message):
+        """``handle`` sin bloquear el bucle de eventos: un ``start`` va a un hilo."""
+        if isinstance(message, dict) and message.get("type") == "start":
+            return await asyncio.to_thread(self._start, message)
+        return self.handle(session, message)
+
+    async def handle_client(self, reader, writer):
+        session = None
+        self.active += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                try:
+                    session, reply = await self.handle_async(session, json.loads(line))
+                except ValueError as error:
+                    reply = {"type": "error", "message": str(error)}
+                except Exception as error:
+                    # Un fallo con un mensaje no cierra la conexion ni las demas sesiones
+                    reply = {"type": "error", "message": f"{type(error).__name__}: {error}"}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                # Respeta el control de flujo si el cliente no lee
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, ready=None, reuse_port=False):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, reuse_port=reuse_port or None)
+        if ready is not None: ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def _worker(pool_name, host, port, started):
+    from src.shared_pool import SharedGlyphPool
+
+    pool = SharedGlyphPool.attach(pool_name)
+    try:
+        asyncio.run(StrokeService(pool).serve(host, port, ready=lambda server: started.put(port), reuse_port=True))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_workers(workers, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+    """Publica el atlas en memoria compartida y lanza ``workers`` procesos en el mismo puerto."""
+    from src.shared_pool import SharedGlyphPool
+
+    with SharedGlyphPool.publish() as pool:
+        started = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(pool.name, host, port, started), name=f"service-{i}")
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        # terminate() del padre tambien debe parar a los hijos y liberar el bloque
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        try:
+            for _ in processes:
+                started.get()
+            if ready is not None: ready(pool)
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servicio local de evaluacion de trazos")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="socket Unix en lugar de TCP")
+    parser.add_argument("--workers", type=int, default=1, help="procesos que atienden el puerto TCP")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and args.unix:
+        parser.error("--workers solo funciona con TCP")
+
+    def ready(server):
+        where = args.unix or "{}:{}".format(*server.sockets[0].getsockname()[:2])
+        print(f"Escuchando en {where}", file=sys.stderr)
+
+    def workers_ready(pool):
+        print(f"Escuchando en {args.host}:{args.port} con {args.workers} procesos"
+              f" (atlas compartido {pool.name}, {pool.nbytes // 1024} KiB)", file=sys.stderr)
+
+    try:
+        if args.workers > 1:
+            serve_workers(args.workers, args.host, args.port, workers_ready)
+        else:
+            asyncio.run(StrokeService().serve(args.host, args.port, args.unix, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# src/session.py
+"""Grabacion compacta de sesiones: la entrada exacta que consumio la simulacion.
+
+Formato (little endian)::
+
+    MAGIC | u32 largo | cabecera JSON (utf-8)
+    por cada paso con entrada nueva:
+        u32 tick | u32 ms desde el inicio | u8 click | u16 n | n * (f64 x, f64 y)
+
+Los pasos sin entrada nueva no se guardan: la simulacion repite la ultima
+posicion y estado del click, y la reproduccion hace lo mismo. Al cerrar se
+escribe un paso sin puntos con el ultimo tick simulado. La cabecera
+guarda el texto, el modo, el layout, la regla de cobertura y el modelo de
+motores de colision (``src.query_engine``) para reconstruir la misma
+palabra con los mismos motores. Las
+coordenadas van en f64 para que la reproduccion de exactamente el mismo
+resultado que la partida.
+"""
+import json
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Optional, Tuple
+
+from src.coverage import DEFAULT_THRESHOLD, CoverageRule
+from src.query_engine import engine_model, session_model
+
+MAGIC = b"CGSESS01"
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recordings")
+
+# Escenas listas que guarda ``ScenePrefetcher``
+SCENE_CACHE_SIZE = 2
+
+# Textos mas largos que esto se juegan en modo documento (lineas y paginas)
+DOCUMENT_MODE_MIN_CHARS = 40
+
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<IIBH")
+_POINT = struct.Struct("<dd")
+
+
+@dataclass(frozen=True)
+class SessionHeader:
+    text: str
+    mode: str
+    start_y: float
+    screen_width: int
+    screen_height: int
+    scale: float
+    time_limit: Optional[float] = None
+    timestep: float = 1 / 60
+    font: Optional[str] = None
+    created: float = 0.0
+    # Fraccion del area a pintar para completar una pieza (0 = basta tocarla)
+    coverage: float = 0.0
+    # Filas ``(motor, a, b)`` del ``EngineModel`` de la partida; sin ellas se usa el del proceso
+    engine_costs: Optional[Tuple[Tuple[str, float, float], ...]] = None
+
+
+def goal_layout(text, screen_width, screen_height, time_limit=None):
+    """Cabecera (modo y layout) con la que el juego monta la palabra ``text``."""
+    if len(text) > DOCUMENT_MODE_MIN_CHARS:
+        mode, start_y, scale = "document", 130, 60
+    else:
+        mode, start_y, scale = "word", screen_height // 2 - 50, 80
+    return SessionHeader(text, mode, start_y, screen_width, screen_height, scale, time_limit,
+                         font=os.environ.get("CONVEXGLYPH_FONT"), created=time.time(),
+                         coverage=float(os.environ.get("CONVEXGLYPH_COVERAGE", DEFAULT_THRESHOLD)),
+                         engine_costs=session_model().rows())
+
+
+def coverage_rule(header):
+    return CoverageRule.for_scale(header.coverage, header.scale) if header.coverage > 0 else None
+
+
+def build_goal(header, background_build=True, atlas=None):
+    from src.document import DocumentGoal
+    from src.game_entities import WordGoal
+
+    coverage = coverage_rule(header)
+    model = engine_model(header.engine_costs)
+    if header.mode == "document":
+        return DocumentGoal(header.text, start_y=header.start_y, screen_width=header.screen_width,
+                            screen_height=header.screen_height, scale=header.scale,
+                            background_build=background_build, atlas=atlas, coverage=coverage,
+                            engine_model=model)
+    return WordGoal(header.text, start_y=header.start_y, screen_width=header.screen_width,
+                    scale=header.scale, background_build=background_build, atlas=atlas, coverage=coverage,
+                    engine_model=model)
+
+
+def scene_key(header):
+    """La parte de la cabecera que decide la escena (no el tiempo limite ni la fecha)."""
+    return replace(header, time_limit=None, created=0.0)
+
+
+class ScenePrefetcher:
+    """Monta en un hilo de fondo la escena del proximo ejercicio.
+
+    ``request`` pide una escena; solo cuenta la ultima peticion pendiente
+    (mientras se escribe el texto cambia con cada tecla). Las escenas
+    listas esperan en una cache LRU de ``capacity`` entradas con la primera
+    pantalla ya construida, y ``take`` se lleva la suya: si se esta montando
+    espera a que acabe, y si nadie la pidio la monta en el momento.
+    """
+
+    def __init__(self, capacity=SCENE_CACHE_SIZE, atlas=None):
+        self.capacity = capacity
+        self.atlas = atlas
+        self._ready = OrderedDict()
+        self._wanted = None
+        self._building = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, header):
+        key = scene_key(header)
+        with self._cond:
+            if key in self._ready: self._ready.move_to_end(key); return
+            if key == self._building: return
+            self._wanted = key
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scene-prefetch", daemon=True)
+                self._thread.start()
+
+    def take(self, header):
+        """Escena lista para ``header``; el ejercicio empieza sin construir nada."""
+        key = scene_key(header)
+        with self._cond:
+            while key == self._building: self._cond.wait()
+            goal = self._ready.pop(key, None)
+            if key == self._wanted: self._wanted = None
+        if goal is None:
+            self.misses += 1
+            return build_goal(header, atlas=self.atlas)
+        self.hits += 1
+        from src.game_entities import LetterBuilder
+
+        # Montada sin hilo propio: si se descarta no deja un constructor vivo
+        goal.builder = LetterBuilder()
+        return goal
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._wanted is None: self._cond.wait()
+                key, self._wanted = self._wanted, None
+                self._building = key
+            try:
+                goal = build_goal(key, background_build=False, atlas=self.atlas)
+                goal.set_view(0, key.screen_width)
+                # Rejilla de ``update_polyline``: en documentos largos su primer uso costaria un frame
+                goal.scene_grid()
+            except Exception:
+                # ``take`` la volvera a montar y el error saldra alli
+                goal = None
+            with self._cond:
+                self._building = None
+                if goal is not None:
+                    self._ready[key] = goal
+                    while len(self._ready) > self.capacity: self._ready.popitem(last=False)
+                self._cond.notify_all()
+
+
+def synthetic_stroke(header, ticks):
+    """Trazo sintetico en zigzag a lo largo de la palabra, un punto por paso
+    (benchmarks y pruebas de carga)."""
+    for tick in range(1, ticks + 1):
+        t = tick / ticks
+        yield (60 + t * (len(header.text) * header.scale * 1.5),
+               header.start_y + header.scale * (0.5 + 0.5 * math.sin(tick * 0.7)))
+
+
+class SessionRecorder:
+    """Escribe los pasos de una ``Simulation`` a medida que ocurren."""
+
+    def __init__(self, path, header):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.header = header
+        self._start = time.perf_counter()
+        self._handle = open(path, "wb")
+        payload = json.dumps(asdict(header), ensure_ascii=False).encode("utf-8")
+        self._handle.write(MAGIC + _LENGTH.pack(len(payload)) + payload)
+
+    def record(self, tick, polyline, is_clicking):
+        if self._handle is None: return
+        elapsed_ms = int((time.perf_counter() - self._start) * 1000)
+        chunks = [_RECORD.pack(tick, elapsed_ms, 1 if is_clicking else 0, len(polyline))]
+        chunks.extend(_POINT.pack(x, y) for x, y in polyline)
+        self._handle.write(b"".join(chunks))
+
+    def close(self, last_tick=None):
+        if self._handle is not None:
+            if last_tick is not None: self.record(last_tick, [], False)
+            self._handle.close()
+            self._handle = None
+
+
+def new_recording_path(directory=RECORDINGS_DIR):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"session_{stamp}_{os.getpid()}.cgs")
+
+
+def recording_enabled():
+    return os.environ.get("CONVEXGLYPH_RECORD", "1") != "0"
+
+
+def read_session(path):
+    """Devuelve ``(cabecera, pasos)``; cada paso es ``(tick, ms, click, polilinea)``."""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path}: no es una grabacion de sesion")
+    pos = len(MAGIC)
+    (length,) = _LENGTH.unpack_from(data, pos)
+    pos += _LENGTH.size
+    fields = json.loads(data[pos:pos + length].decode("utf-8"))
+    # JSON no tiene tuplas: la cabecera debe seguir siendo hashable (``scene_key``)
+    if fields.get("engine_costs"): fields["engine_costs"] = tuple(tuple(row) for row in fields["engine_costs"])
+    header = SessionHeader(**fields)
+    pos += length
+    steps = []
+    # Un paso cortado al final (el juego se cerro a mitad de escritura) se ignora
+    while pos + _RECORD.size <= len(data):
+        tick, elapsed_ms, clicking, count = _RECORD.unpack_from(data, pos)
+        end = pos + _RECORD.size + count * _POINT.size
+        if end > len(data): break
+        polyline = [_POINT.unpack_from(data, pos + _RECORD.size + i * _POINT.size) for i in range(count)]
+        steps.append((tick, elapsed_ms, bool(clicking), polyline))
+        pos = end
+    return header, steps
@@ -0,0 +1,377 @@
+"""Glyph hierarchies published in shared memory for worker processes.
+
+The parent process takes every glyph of an atlas (already built, or decoded
+from the atlas file) and packs all hierarchy levels into one
+``multiprocessing.shared_memory`` block as flat arrays: vertices, faces,
+face bounding boxes, encoded parent pointers and a CSR vertex -> incident
+faces table per level. Workers attach to the block by name and wrap it in
+``SharedHierarchy`` views whose queries read the arrays in place, so a new
+worker neither builds nor unpickles anything and adds almost no memory.
+
+``SharedGlyphPool`` offers the same ``unit_glyph`` / ``piece_count`` /
+``glyph_bounds`` interface as ``GlyphAtlas`` and can be passed as ``atlas``
+to ``WordGoal`` or ``build_goal``. Views are unit-scale; ``transformed`` and
+``with_transform`` store an ``Affine`` that places each tested face, as in
+``DKHierarchy``.
+"""
+from __future__ import annotations
+
+import bisect
+import multiprocessing
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.dk_hierarchy import Affine, search_bounds
+from src.geometry import segment_hits_convex
+from src.glyph_atlas import GlyphPiece, default_atlas
+
+Point = Tuple[float, float]
+
+MAGIC = b"CGSHPOL1"
+
+_HEADER = struct.Struct("<8s8I")
+# (codepoint, first piece, piece count)
+_GLYPH_COLUMNS = 3
+# (outline offset, outline count, first level, level count, inside offset, inside count or -1)
+_PIECE_COLUMNS = 6
+# (vertex offset, vertex count, face offset, face count, incidence offset)
+_LEVEL_COLUMNS = 5
+_PARENT_KINDS = ("face", "vertex")
+
+
+def _sections(counts: Sequence[int]) -> List[Tuple[str, str, int]]:
+    glyphs, pieces, levels, points, faces, incidence_starts, incidence, inside = counts
+    # Primero los f64 para que todo quede alineado
+    return [
+        ("glyph_bounds", "d", glyphs * 4),
+        ("level_bbox", "d", levels * 4),
+        ("points", "d", points * 2),
+        ("face_bbox", "d", faces * 4),
+        ("glyphs", "i", glyphs * _GLYPH_COLUMNS),
+        ("pieces", "i", pieces * _PIECE_COLUMNS),
+        ("levels", "i", levels * _LEVEL_COLUMNS),
+        ("faces", "i", faces * 3),
+        ("parents", "i", faces),
+        ("incidence_starts", "i", incidence_starts),
+        ("incidence", "i", incidence),
+        ("inside", "i", inside),
+    ]
+
+
+def _layout(counts: Sequence[int]) -> Tuple[Dict[str, Tuple[int, str, int]], int]:
+    offset = _HEADER.size
+    offset += -offset % 8
+    layout = {}
+    for name, fmt, length in _sections(counts):
+        layout[name] = (offset, fmt, length)
+        offset += length * struct.calcsize(fmt)
+    return layout, offset
+
+
+def _overlaps(bounds: Sequence[float], boxes: Sequence[float], at: int) -> bool:
+    """``bounds_overlap`` against the box stored at ``boxes[at:at + 4]``, without slicing."""
+    return not (
+        bounds[2] < boxes[at] or bounds[0] > boxes[at + 2] or bounds[3] < boxes[at + 1] or bounds[1] > boxes[at + 3]
+    )
+
+
+class _Packer:
+    """Flattens unit-scale glyphs into the pool's column lists."""
+
+    def __init__(self):
+        self.columns = {name: [] for name, _, _ in _sections([0] * 8)}
+
+    def add_glyph(self, char: str, pieces: Sequence[GlyphPiece], bounds: Sequence[float]) -> None:
+        cols = self.columns
+        cols["glyphs"] += [ord(char), len(cols["pieces"]) // _PIECE_COLUMNS, len(pieces)]
+        cols["glyph_bounds"] += list(bounds)
+        for piece in pieces:
+            self._add_piece(piece)
+
+    def _add_piece(self, piece: GlyphPiece) -> None:
+        cols = self.columns
+        hierarchy = piece.hierarchy
+        outline_offset = len(cols["points"]) // 2
+        for x, y in piece.vertices:
+            cols["points"] += [x, y]
+        inside = sorted(hierarchy.inside_faces) if hierarchy.inside_faces is not None else None
+        cols["pieces"] += [
+            outline_offset, len(piece.vertices),
+            len(cols["levels"]) // _LEVEL_COLUMNS, len(hierarchy.levels),
+            len(cols["inside"]), -1 if inside is None else len(inside),
+        ]
+        cols["inside"] += inside or []
+        for level in hierarchy.levels:
+            mesh = level.mesh
+            cols["levels"] += [
+                len(cols["points"]) // 2, mesh.num_vertices,
+                len(cols["faces"]) // 3, len(mesh.faces),
+                len(cols["incidence_starts"]),
+            ]
+            cols["level_bbox"] += list(level.bbox)
+            for vertex in mesh.vertices:
+                cols["points"] += [vertex[0], vertex[1]]
+            for face, box in zip(mesh.faces, level.face_bboxes):
+                cols["faces"] += face
+                cols["face_bbox"] += list(box)
+            if level.parents:
+                cols["parents"] += [p.reference * 2 + _PARENT_KINDS.index(p.kind) for p in level.parents]
+            else:
+                cols["parents"] += [-1] * len(mesh.faces)
+            for faces in mesh.vertex_faces:
+                cols["incidence_starts"].append(len(cols["incidence"]))
+                cols["incidence"] += sorted(faces)
+            cols["incidence_starts"].append(len(cols["incidence"]))
+
+    def counts(self) -> List[int]:
+        cols = self.columns
+        return [
+            len(cols["glyphs"]) // _GLYPH_COLUMNS, len(cols["pieces"]) // _PIECE_COLUMNS,
+            len(cols["levels"]) // _LEVEL_COLUMNS, len(cols["points"]) // 2,
+            len(cols["faces"]) // 3, len(cols["incidence_starts"]), len(cols["incidence"]),
+            len(cols["inside"]),
+        ]
+
+
+class SharedHierarchy:
+    """Read-only DK hierarchy view over a ``SharedGlyphPool`` block.
+
+    Answers ``intersects_segment`` / ``intersects_polyline`` /
+    ``trace_intersection`` like ``DKHierarchy``; ``transformed`` and
+    ``with_transform`` are O(1).
+    """
+
+    __slots__ = ("pool", "piece", "transform", "_inverse")
+
+    def __init__(self, pool: "SharedGlyphPool", piece: int, scale: float = 1.0, offset: Point = (0.0, 0.0)):
+        self.pool = pool
+        self.piece = piece
+        self.set_transform(Affine.placement(scale, offset))
+
+    def transformed(self, scale: float = 1.0, offset: Point = (0.0, 0.0)) -> "SharedHierarchy":
+        if scale <= 0:
+            raise ValueError("Scale must be positive")
+        return self.with_transform(self.transform.then(Affine.placement(scale, offset)))
+
+    def with_transform(self, transform: Optional[Affine]) -> "SharedHierarchy":
+        clone = SharedHierarchy(self.pool, self.piece)
+        clone.set_transform(transform)
+        return clone
+
+    def set_transform(self, transform: Optional[Affine]) -> None:
+        self.transform = transform or Affine()
+        self._inverse = self.transform.inverse()
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        first_level, level_count = self.pool._piece_row(self.piece)[2:4]
+        box = (first_level + level_count - 1) * 4
+        return self.transform.map_bounds(tuple(self.pool._level_bbox[box:box + 4]))
+
+    def height(self) -> int:
+        return self.pool._piece_row(self.piece)[3]
+
+    def __len__(self) -> int:
+        return self.height()
+
+    def intersects_segment(self, start: Point, end: Point) -> bool:
+        return self.pool._walk(self.piece, start, end, self.transform, search_bounds(self._inverse, start, end), None)
+
+    def intersects_polyline(self, points: Sequence[Point]) -> bool:
+        if not points:
+            return False
+        if len(points) == 1:
+            points = [points[0], points[0]]
+        return any(self.intersects_segment(a, b) for a, b in zip(points, points[1:]))
+
+    def trace_intersection(self, start: Point, end: Point) -> List[Tuple[int, List[Point], bool]]:
+        trace: List[Tuple[int, List[Point], bool]] = []
+        self.pool._walk(self.piece, start, end, self.transform, None, trace)
+        return trace
+
+
+class SharedGlyphPool:
+    """Glyph atlas published in a single shared-memory block.
+
+    Create it once in the parent with ``publish`` and call ``attach(name)``
+    in each worker. The owner must ``close`` and ``unlink`` it when done;
+    workers only ``close``.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool, fallback=None):
+        self.shm = shm
+        self.owner = owner
+        self.fallback = fallback
+        magic, *counts = _HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{shm.name} is not a glyph pool")
+        layout, _ = _layout(counts)
+        self._views = {
+            name: shm.buf[offset:offset + length * struct.calcsize(fmt)].cast(fmt)
+            for name, (offset, fmt, length) in layout.items()
+        }
+        for name, view in self._views.items():
+            setattr(self, "_" + name, view)
+        glyphs = self._glyphs
+        self._index = {
+            chr(glyphs[row]): row // _GLYPH_COLUMNS for row in range(0, len(glyphs), _GLYPH_COLUMNS)
+        }
+        self._unit: Dict[str, Tuple[GlyphPiece, ...]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    @classmethod
+    def publish(cls, atlas=None, chars: Optional[str] = None, name: Optional[str] = None) -> "SharedGlyphPool":
+        atlas = atlas or default_atlas()
+        packer = _Packer()
+        for char in chars if chars is not None else atlas.source.charset():
+            packer.add_glyph(char, atlas.unit_glyph(char), atlas.glyph_bounds(char))
+        counts = packer.counts()
+        layout, size = _layout(counts)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        try:
+            _HEADER.pack_into(shm.buf, 0, MAGIC, *counts)
+            for section, (offset, fmt, length) in layout.items():
+                if length:
+                    struct.pack_into(f"<{length}{fmt}", shm.buf, offset, *packer.columns[section])
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        return cls(shm, owner=True, fallback=atlas)
+
+    @classmethod
+    def attach(cls, name: str, fallback=None) -> "SharedGlyphPool":
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None:
+            # Proceso independiente: su propio resource_tracker borraria el bloque al salir
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False, fallback=fallback)
+
+    def close(self) -> None:
+        """Releases this process' mapping; views and pieces stop working."""
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._unit = {}
+        self.shm.close()
+
+    def unlink(self) -> None:
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> "SharedGlyphPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        self.unlink()
+
+    # --- atlas interface ----------------------------------------------------
+    def __contains__(self, char: str) -> bool:
+        return char in self._index
+
+    def unit_glyph(self, char: str) -> Tuple[GlyphPiece, ...]:
+        pieces = self._unit.get(char)
+        if pieces is not None:
+            return pieces
+        row = self._index.get(char)
+        if row is None:
+            # Caracter no publicado: lo resuelve el atlas local de este proceso
+            self.fallback = self.fallback or default_atlas()
+            pieces = self.fallback.unit_glyph(char)
+        else:
+            glyphs = self._glyphs
+            first, count = glyphs[row * _GLYPH_COLUMNS + 1], glyphs[row * _GLYPH_COLUMNS + 2]
+            pieces = tuple(self._piece(index) for index in range(first, first + count))
+        with self._lock:
+            return self._unit.setdefault(char, pieces)
+
+    def _piece(self, index: int) -> GlyphPiece:
+        outline_offset, outline_count = self._piece_row(index)[:2]
+        points = self._points
+        vertices = tuple(
+            (points[2 * i], points[2 * i + 1]) for i in range(outline_offset, outline_offset + outline_count)
+        )
+        return GlyphPiece(vertices, SharedHierarchy(self, index))
+
+    def piece_count(self, char: str) -> int:
+        row = self._index.get(char)
+        if row is None:
+            return len(self.unit_glyph(char))
+        return self._glyphs[row * _GLYPH_COLUMNS + 2]
+
+    def glyph_bounds(self, char: str) -> Tuple[float, float, float, float]:
+        row = self._index.get(char)
+        if row is None:
+            self.fallback = self.fallback or default_atlas()
+            return self.fallback.glyph_bounds(char)
+        return tuple(self._glyph_bounds[row * 4:row * 4 + 4])
+
+    # --- queries ------------------------------------------------------------
+    def _piece_row(self, index: int) -> Sequence[int]:
+        return self._pieces[index * _PIECE_COLUMNS:(index + 1) * _PIECE_COLUMNS]
+
+    def _walk(self, piece: int, start: Point, end: Point, transform: Affine,
+              seg_bounds: Optional[Tuple[float, float, float, float]], trace: Optional[list]) -> bool:
+        """DK descent over the flat arrays (same order as ``DKHierarchy``).
+
+        ``start -> end`` is in world space and faces are placed by
+        ``transform``; ``seg_bounds`` (``search_bounds``, local) prunes. With
+        ``trace`` every tested face is appended as ``(level, polygon, hit)``
+        and bounding boxes are not used to prune, as in
+        ``DKHierarchy.trace_intersection``.
+        """
+        _, _, first_level, level_count, inside_offset, inside_count = self._piece_row(piece)
+        levels, points, faces, parents = self._levels, self._points, self._faces, self._parents
+        face_bbox, level_bbox = self._face_bbox, self._level_bbox
+        place = transform.apply
+        stack: List[Tuple[int, int]] = [(level_count - 1, -1)]
+        while stack:
+            level_idx, pointer = stack.pop()
+            row = (first_level + level_idx) * _LEVEL_COLUMNS
+            vertex_offset, face_offset, face_count, incidence_offset = (
+                levels[row], levels[row + 2], levels[row + 3], levels[row + 4],
+            )
+            box = (first_level + level_idx) * 4
+            if trace is None and not _overlaps(seg_bounds, level_bbox, box):
+                continue
+            if pointer < 0:
+                candidates = range(face_count)
+            elif pointer & 1 == 0:
+                candidates = (pointer >> 1,)
+            else:
+                start_row = incidence_offset + (pointer >> 1)
+                starts = self._incidence_starts
+                candidates = self._incidence[starts[start_row]:starts[start_row + 1]]
+            for face_idx in candidates:
+                face = face_offset + face_idx
+                if trace is None and not _overlaps(seg_bounds, face_bbox, face * 4):
+                    continue
+                polygon = []
+                for corner in range(face * 3, face * 3 + 3):
+                    at = 2 * (vertex_offset + faces[corner])
+                    polygon.append(place((points[at], points[at + 1])))
+                hit = segment_hits_convex(start, end, polygon)
+                if hit and level_idx == 0 and inside_count >= 0:
+                    inside = self._inside[inside_offset:inside_offset + inside_count]
+                    position = bisect.bisect_left(inside, face_idx)
+                    hit = position < inside_count and inside[position] == face_idx
+                if trace is not None:
+                    trace.append((level_idx, polygon, hit))
+                if not hit:
+                    continue
+                if level_idx == 0 or parents[face] < 0:
+                    return True
+                stack.append((level_idx - 1, parents[face]))
+        return False
@@ -0,0 +1,170 @@
+# src/simulation.py
+"""Simulacion a paso fijo (colision + puntuacion) desacoplada del render.
+
+El bucle principal solo envia la entrada de cada frame (la polilinea del
+trazo y si el click cuenta) a una cola. Un hilo consume esa cola y avanza la
+simulacion en pasos de ``timestep`` segundos: actualiza la palabra, toma una
+muestra de precision por paso y publica una ``SimulationSnapshot`` inmutable
+que el render lee sin bloquear. Un frame lento solo retrasa lo que se ve;
+la puntuacion no depende de los FPS.
+
+Las estructuras compartidas con el render (letras que se construyen o
+liberan, LRU del modo documento) se protegen con ``lock``.
+"""
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+# Paso por defecto igual al antiguo tope de FPS: misma densidad de muestras
+DEFAULT_TIMESTEP = 1 / 60
+# Pasos maximos de recuperacion tras un parón (evita la espiral de la muerte)
+MAX_CATCH_UP_STEPS = 5
+
+
+@dataclass(frozen=True)
+class SimulationSnapshot:
+    tick: int = 0
+    progress: float = 0.0
+    total_samples: int = 0
+    valid_samples: int = 0
+    completed: bool = False
+
+    @property
+    def precision(self):
+        return (self.valid_samples / self.total_samples * 100) if self.total_samples > 0 else 100
+
+
+class _NoPhases:
+    def phase(self, name):
+        return nullcontext()
+
+    def start_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+class Simulation:
+    """``recorder`` (opcional) recibe cada paso con entrada nueva; ``log``
+    (opcional, ``StrokeLog``) recibe una muestra por paso con puntero;
+    ``phases`` (opcional) debe ofrecer ``phase(nombre)`` para cronometrar
+    cada fase y, si se usa ``step``, ``start_frame``/``end_frame``
+    (``FrameProfiler``)."""
+
+    def __init__(self, word_goal, timestep=DEFAULT_TIMESTEP, sound_effect=None, recorder=None, phases=None, log=None):
+        self.word_goal = word_goal
+        self.timestep = timestep
+        self.sound_effect = sound_effect
+        self.recorder = recorder
+        self.log = log
+        self.phases = phases or _NoPhases()
+        self.lock = threading.RLock()
+        self.inputs = queue.Queue()
+        self.snapshot = SimulationSnapshot(progress=word_goal.get_progress())
+        self._last_pos = None
+        self._clicking = False
+        self._total_samples = 0
+        self._valid_samples = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # --- entrada ----------------------------------------------------------------
+    def submit(self, polyline, is_clicking):
+        """Entrada de un frame: polilinea en coordenadas de mundo y si el click cuenta."""
+        self.inputs.put((list(polyline), is_clicking))
+
+    def _collect_input(self):
+        """Une toda la entrada pendiente en una polilinea desde la ultima posicion.
+
+        Si en este paso no llego entrada se mantiene la ultima posicion y el
+        estado del click (el boton sigue pulsado entre frames).
+        """
+        polyline = [self._last_pos] if self._last_pos is not None else []
+        is_clicking = None
+        while True:
+            try:
+                points, clicking = self.inputs.get_nowait()
+            except queue.Empty:
+                break
+            for point in points:
+                if not polyline or point != polyline[-1]: polyline.append(point)
+            is_clicking = is_clicking or clicking
+        fresh = is_clicking is not None
+        if fresh: self._clicking = is_clicking
+        if not polyline: return None, False, False
+        self._last_pos = polyline[-1]
+        return polyline, self._clicking, fresh
+
+    # --- pasos ------------------------------------------------------------------
+    def step(self):
+        """Avanza un paso fijo con la entrada recibida hasta ahora y publica el estado."""
+        self.phases.start_frame()
+        with self.phases.phase('input'):
+            polyline, is_clicking, fresh = self._collect_input()
+        if fresh and self.recorder:
+            self.recorder.record(self.snapshot.tick + 1, polyline, is_clicking)
+        snapshot = self.advance(polyline, is_clicking)
+        self.phases.end_frame()
+        return snapshot
+
+    def advance(self, polyline, is_clicking):
+        """Un paso con una entrada ya decidida (``None`` = todavia no hay puntero)."""
+        word_goal = self.word_goal
+        phases = self.phases
+        log = self.log
+        with self.lock:
+            if polyline is not None:
+                with phases.phase('update'):
+                    word_goal.update_polyline(polyline, is_clicking, self.sound_effect)
+                # Sin registro solo hace falta la zona valida de las muestras con click
+                if is_clicking or log is not None:
+                    with phases.phase('valid_area'):
+                        piece = word_goal.piece_at(polyline[-1])
+                    if is_clicking:
+                        self._total_samples += 1
+                        if piece >= 0: self._valid_samples += 1
+                    if log is not None:
+                        x, y = polyline[-1]
+                        log.append(self.snapshot.tick + 1, x, y, is_clicking, piece)
+            with phases.phase('progress'):
+                progress = word_goal.get_progress()
+                completed = word_goal.is_completed()
+        self.snapshot = SimulationSnapshot(self.snapshot.tick + 1, progress,
+                                           self._total_samples, self._valid_samples, completed)
+        return self.snapshot
+
+    def _run(self):
+        next_time = time.perf_counter()
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            steps = 0
+            while next_time <= now and steps < MAX_CATCH_UP_STEPS:
+                self.step()
+                next_time += self.timestep
+                steps += 1
+            if next_time <= now:
+                # Demasiado atrasados: se descartan los pasos perdidos
+                next_time = now + self.timestep
+            if self.snapshot.completed: break
+            self._stop_event.wait(max(0.0, next_time - time.perf_counter()))
+
+    # --- ciclo de vida ----------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self.recorder:
+            # Marca el ultimo paso para que la reproduccion avance lo mismo
+            self.recorder.close(self.snapshot.tick)
+        if self.log:
+            self.log.close()
@@ -0,0 +1,41 @@
+# src/stroke_input.py
+"""Acumula todas las posiciones de movimiento (raton y tactil) entre frames.
+
+Un raton de alta frecuencia o una pantalla tactil generan varios eventos de
+movimiento por frame; en lugar de quedarse solo con la posicion final, el
+trazo del frame es la polilinea que pasa por todos ellos y se consulta contra
+la palabra de una sola vez (``WordGoal.update_polyline``).
+"""
+import pygame
+
+
+class StrokeInput:
+    def __init__(self):
+        self.points = []
+
+    def handle_event(self, event, screen_size):
+        if event.type == pygame.MOUSEMOTION:
+            # SDL duplica los toques como eventos de raton; esos ya llegan como FINGERMOTION
+            if getattr(event, 'touch', False): return
+            self.points.append(event.pos)
+        elif event.type == pygame.FINGERMOTION:
+            width, height = screen_size
+            self.points.append((event.x * width, event.y * height))
+
+    def clear(self):
+        self.points = []
+
+    def drain(self):
+        """Devuelve (y olvida) las posiciones en pantalla recibidas desde el ultimo frame."""
+        points, self.points = self.points, []
+        return points
+
+
+def world_polyline(last_pos_world, screen_points, curr_pos_world, camera_x):
+    """Polilinea en coordenadas de mundo desde la posicion del frame anterior a la actual."""
+    polyline = [last_pos_world]
+    for x, y in screen_points:
+        point = (x + camera_x, y)
+        if point != polyline[-1]: polyline.append(point)
+    if curr_pos_world != polyline[-1]: polyline.append(curr_pos_world)
+    return polyline
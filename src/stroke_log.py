@@ -0,0 +1,270 @@
+# src/stroke_log.py
+"""Registro columnar de las muestras del trazo, solo de anadir.
+
+Cada paso de la simulacion con puntero es una muestra: tick, posicion en el
+mundo, flags (click, dentro de la zona valida) y la pieza bajo el puntero
+(-1 = fuera). Las muestras se escriben en arrays preasignados, uno por
+columna, y se vuelcan al fichero por bloques de ``BLOCK_SAMPLES``.
+``StrokeStats`` mantiene precision, velocidad y cobertura al dia muestra a
+muestra, sin volver a recorrer el historial.
+
+Formato (little endian)::
+
+    MAGIC | u32 largo | cabecera JSON (utf-8)
+    por bloque: u32 n | n * u32 tick | n * f32 x | n * f32 y | n * u8 flags | n * i32 pieza
+    cierre: u32 0 | resumen JSON | u32 largo del resumen | END_MAGIC
+
+El resumen del cierre guarda los agregados, asi que ``read_summary`` solo
+lee la cola del fichero; si falta (el juego se corto) se recalcula desde
+los bloques. ``read_log`` lee solo las columnas pedidas.
+
+    python -m src.stroke_log recordings/   # resumen de todas las sesiones
+"""
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+
+from src.simulation import DEFAULT_TIMESTEP
+
+MAGIC = b"CGSLOG01"
+END_MAGIC = b"CGSLEND1"
+BLOCK_SAMPLES = 4096
+
+FLAG_CLICK = 1
+FLAG_INSIDE = 2
+
+# (nombre, typecode de array): el orden es el del fichero
+COLUMNS = (("tick", "I"), ("x", "f"), ("y", "f"), ("flags", "B"), ("piece", "i"))
+
+_LENGTH = struct.Struct("<I")
+
+
+def log_path_for(recording_path):
+    return os.path.splitext(recording_path)[0] + ".cgl"
+
+
+class StrokeStats:
+    """Agregados en streaming: O(1) por muestra y memoria acotada por las piezas."""
+
+    def __init__(self, total_pieces=0, timestep=DEFAULT_TIMESTEP):
+        self.total_pieces = total_pieces
+        self.timestep = timestep
+        self.samples = 0
+        self.click_samples = 0
+        self.valid_samples = 0
+        self.distance = 0.0
+        self.drawing_time = 0.0
+        self.max_speed = 0.0
+        # Welford sobre la velocidad de cada paso con el click pulsado
+        self._speed_n = 0
+        self._speed_mean = 0.0
+        self._speed_m2 = 0.0
+        self._last = None
+        self.pieces_touched = set()
+
+    def add(self, tick, x, y, flags, piece):
+        self.samples += 1
+        clicking = flags & FLAG_CLICK
+        last = self._last
+        self._last = (tick, x, y, clicking)
+        if not clicking: return
+        self.click_samples += 1
+        if flags & FLAG_INSIDE: self.valid_samples += 1
+        if piece >= 0: self.pieces_touched.add(piece)
+        if last is None or not last[3] or tick <= last[0]: return
+        dt = (tick - last[0]) * self.timestep
+        step = math.hypot(x - last[1], y - last[2])
+        speed = step / dt
+        self.distance += step
+        self.drawing_time += dt
+        if speed > self.max_speed: self.max_speed = speed
+        self._speed_n += 1
+        delta = speed - self._speed_mean
+        self._speed_mean += delta / self._speed_n
+        self._speed_m2 += delta * (speed - self._speed_mean)
+
+    @property
+    def precision(self):
+        return (self.valid_samples / self.click_samples * 100) if self.click_samples > 0 else 100
+
+    @property
+    def coverage(self):
+        return (len(self.pieces_touched) / self.total_pieces * 100) if self.total_pieces > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "samples": self.samples,
+            "click_samples": self.click_samples,
+            "valid_samples": self.valid_samples,
+            "precision": self.precision,
+            "distance": self.distance,
+            "drawing_time": self.drawing_time,
+            "mean_speed": self._speed_mean,
+            "speed_stdev": math.sqrt(self._speed_m2 / self._speed_n) if self._speed_n > 1 else 0.0,
+            "max_speed": self.max_speed,
+            "pieces_touched": len(self.pieces_touched),
+            "total_pieces": self.total_pieces,
+            "coverage": self.coverage,
+        }
+
+
+class StrokeLog:
+    """Escritor del registro; ``append`` solo escribe en memoria salvo al llenar un bloque."""
+
+    def __init__(self, path, header=None, total_pieces=0, timestep=DEFAULT_TIMESTEP, block_samples=BLOCK_SAMPLES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.block_samples = block_samples
+        self.stats = StrokeStats(total_pieces, timestep)
+        self._columns = [array(code, bytes(array(code).itemsize * block_samples)) for _, code in COLUMNS]
+        self._count = 0
+        self._handle = open(path, "wb")
+        header = dict(header or {}, timestep=timestep, total_pieces=total_pieces)
+        payload = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        self._handle.write(MAGIC + _LENGTH.pack(len(payload)) + payload)
+
+    def append(self, tick, x, y, clicking, piece):
+        flags = (FLAG_CLICK if clicking else 0) | (FLAG_INSIDE if piece >= 0 else 0)
+        i = self._count
+        ticks, xs, ys, all_flags, pieces = self._columns
+        ticks[i] = tick
+        xs[i] = x
+        ys[i] = y
+        all_flags[i] = flags
+        pieces[i] = piece
+        self.stats.add(tick, x, y, flags, piece)
+        self._count = i + 1
+        if self._count == self.block_samples: self.flush()
+
+    def flush(self):
+        count = self._count
+        if self._handle is None or count == 0: return
+        chunks = [_LENGTH.pack(count)]
+        for column in self._columns:
+            if sys.byteorder == "big":
+                column = array(column.typecode, column[:count])
+                column.byteswap()
+            chunks.append(memoryview(column)[:count].tobytes())
+        self._handle.write(b"".join(chunks))
+        self._count = 0
+
+    def close(self):
+        if self._handle is None: return
+        self.flush()
+        summary = json.dumps(self.stats.as_dict()).encode("utf-8")
+        self._handle.write(_LENGTH.pack(0) + summary + _LENGTH.pack(len(summary)) + END_MAGIC)
+        self._handle.close()
+        self._handle = None
+
+
+# --- lectura ---------------------------------------------------------------------
+
+def _read_header(handle, path):
+    if handle.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path}: no es un registro de trazo")
+    (length,) = _LENGTH.unpack(handle.read(_LENGTH.size))
+    return json.loads(handle.read(length).decode("utf-8"))
+
+
+def _blocks(handle, wanted):
+    """Recorre los bloques leyendo solo las columnas de ``wanted`` (salta el resto)."""
+    sizes = [array(code).itemsize for _, code in COLUMNS]
+    while True:
+        raw = handle.read(_LENGTH.size)
+        if len(raw) < _LENGTH.size: return
+        (count,) = _LENGTH.unpack(raw)
+        if count == 0: return
+        block = {}
+        for (name, code), size in zip(COLUMNS, sizes):
+            if name not in wanted:
+                handle.seek(count * size, os.SEEK_CUR)
+                continue
+            data = handle.read(count * size)
+            # Bloque cortado al final (el juego se cerro a mitad de escritura)
+            if len(data) < count * size: return
+            column = array(code)
+            column.frombytes(data)
+            if sys.byteorder == "big": column.byteswap()
+            block[name] = column
+        yield block
+
+
+def read_log(path, columns=None):
+    """Devuelve ``(cabecera, {columna: array})`` con las columnas pedidas (todas por defecto)."""
+    wanted = set(columns) if columns is not None else {name for name, _ in COLUMNS}
+    result = {name: array(code) for name, code in COLUMNS if name in wanted}
+    with open(path, "rb") as handle:
+        header = _read_header(handle, path)
+        for block in _blocks(handle, wanted):
+            for name, column in block.items():
+                result[name].extend(column)
+    return header, result
+
+
+def read_summary(path):
+    """Resumen de una sesion leyendo solo la cola; sin cierre se recalcula desde los bloques."""
+    with open(path, "rb") as handle:
+        header = _read_header(handle, path)
+        end = handle.seek(0, os.SEEK_END)
+        tail = _LENGTH.size + len(END_MAGIC)
+        if end >= tail:
+            handle.seek(end - tail)
+            raw = handle.read(tail)
+            if raw[_LENGTH.size:] == END_MAGIC:
+                (length,) = _LENGTH.unpack(raw[:_LENGTH.size])
+                handle.seek(end - tail - length)
+                return header, json.loads(handle.read(length).decode("utf-8"))
+        handle.seek(0)
+        _read_header(handle, path)
+        stats = StrokeStats(header.get("total_pieces", 0), header.get("timestep", DEFAULT_TIMESTEP))
+        for block in _blocks(handle, {name for name, _ in COLUMNS}):
+            for sample in zip(block["tick"], block["x"], block["y"], block["flags"], block["piece"]):
+                stats.add(*sample)
+    return header, stats.as_dict()
+
+
+def scan_logs(paths):
+    """``(ruta, cabecera, resumen)`` de cada registro en ``paths`` (ficheros o carpetas)."""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".cgl"))
+        else:
+            files = [path]
+        for file in files:
+            try:
+                header, summary = read_summary(file)
+            except (OSError, ValueError) as error:
+                print(f"{file}: {error}", file=sys.stderr)
+                continue
+            yield file, header, summary
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumen de los registros de trazo (.cgl)")
+    parser.add_argument("paths", nargs="+", help="ficheros .cgl o carpetas que los contienen")
+    parser.add_argument("--json", action="store_true", help="una linea JSON por sesion")
+    args = parser.parse_args(argv)
+    sessions = samples = click_samples = valid_samples = 0
+    for path, header, summary in scan_logs(args.paths):
+        sessions += 1
+        samples += summary["samples"]
+        click_samples += summary["click_samples"]
+        valid_samples += summary["valid_samples"]
+        if args.json:
+            print(json.dumps({"path": path, "text": header.get("text"), **summary}, ensure_ascii=False))
+        else:
+            print(f"{os.path.basename(path)}: {summary['samples']} muestras, precision {summary['precision']:.1f}%, "
+                  f"cobertura {summary['coverage']:.1f}%, velocidad media {summary['mean_speed']:.0f} px/s")
+    if not args.json and sessions:
+        precision = valid_samples / click_samples * 100 if click_samples else 100
+        print(f"{sessions} sesiones, {samples} muestras, precision global {precision:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
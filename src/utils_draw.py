@@ -1,6 +1,56 @@
 # src/utils_draw.py
+from collections import OrderedDict
+
 import pygame
 
+class SurfaceCache:
+    """Cache LRU de superficies de texto y paneles de la interfaz.
+
+    Los textos fijos se renderizan una sola vez y los valores numericos solo
+    cuando cambia la cadena que se muestra.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._surfaces = OrderedDict()
+        self._fonts = {}
+
+    def _get(self, key, factory):
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = factory()
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.capacity:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+    def font(self, name, size, bold=False):
+        """``SysFont`` memoizado: buscar la fuente del sistema es caro."""
+        key = (name, size, bold)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+        return font
+
+    def text(self, font, text, color, antialias=True):
+        return self._get(('text', font, text, tuple(color), antialias),
+                         lambda: font.render(text, antialias, color))
+
+    def panel(self, size, color, alpha=None):
+        def make():
+            surface = pygame.Surface(size)
+            if alpha is not None: surface.set_alpha(alpha)
+            surface.fill(color)
+            return surface
+        return self._get(('panel', tuple(size), tuple(color), alpha), make)
+
+    def __len__(self):
+        return len(self._surfaces)
+
+SURFACE_CACHE = SurfaceCache()
+
 def draw_grid(surface, width, height, camera_x):
     offset_x = int(camera_x) % 50 
     for x in range(-offset_x, width, 50):
@@ -21,21 +71,18 @@ def draw_scrollbar(surface, camera_x, total_width, screen_width, screen_height):
     thumb_x = (camera_x / scrollable) * (screen_width - thumb_width)
     pygame.draw.rect(surface, (150, 150, 150), (thumb_x, bar_y, thumb_width, 10), border_radius=5)
 
-def draw_debug_trace(surface, trace, font_trace):
+def draw_debug_trace(surface, trace, font_trace, cache=SURFACE_CACHE):
     if not trace: return
     PANEL_W = 350
     PANEL_X = surface.get_width() - PANEL_W
-    s = pygame.Surface((PANEL_W, surface.get_height()))
-    s.set_alpha(230)
-    s.fill((20, 20, 30))
-    surface.blit(s, (PANEL_X, 0))
+    surface.blit(cache.panel((PANEL_W, surface.get_height()), (20, 20, 30), 230), (PANEL_X, 0))
     
-    title = font_trace.render("DK Trace", True, (255, 255, 255))
+    title = cache.text(font_trace, "DK Trace", (255, 255, 255))
     surface.blit(title, (PANEL_X + 20, 20))
     
     y_offset = 60
   
-    font_small = pygame.font.SysFont('Consolas', 12)
+    font_small = cache.font('Consolas', 12)
     
     for i, (level_idx, polygon, hit) in enumerate(trace):
         if y_offset > surface.get_height() - 50: break
@@ -46,6 +93,22 @@ def draw_debug_trace(surface, trace, font_trace):
         status_color = (100, 255, 100) if hit else (255, 100, 100)
         pygame.draw.rect(surface, status_color, rect, 2, border_radius=5)
         
-        surface.blit(font_small.render(f"Nivel: {level_idx}", True, (200,200,200)), (rect.x + 10, rect.y + 10))
-        surface.blit(font_small.render(f"Result: {'HIT' if hit else 'MISS'}", True, status_color), (rect.x + 10, rect.y + 50))
-        y_offset += step_height + 10
\ No newline at end of file
+        surface.blit(cache.text(font_small, f"Nivel: {level_idx}", (200,200,200)), (rect.x + 10, rect.y + 10))
+        surface.blit(cache.text(font_small, f"Result: {'HIT' if hit else 'MISS'}", status_color), (rect.x + 10, rect.y + 50))
+        y_offset += step_height + 10
+
+def draw_profiler_overlay(surface, stats, pos, cache=SURFACE_CACHE):
+    """Tabla p50/p95/p99 (ms) por fase; devuelve el rectangulo ocupado."""
+    font = cache.font('Consolas', 14)
+    line_h = 18
+    x, y = pos
+    rect = pygame.Rect(x, y, 330, line_h * (len(stats) + 1) + 16)
+    surface.blit(cache.panel(rect.size, (20, 20, 30), 220), rect)
+    header = cache.text(font, f"{'fase':<14}{'p50':>8}{'p95':>8}{'p99':>8}", (255, 255, 255))
+    surface.blit(header, (x + 10, y + 8))
+    for i, (name, (p50, p95, p99, _)) in enumerate(stats.items()):
+        # Verde dentro del presupuesto de un frame a 60 FPS, rojo si lo supera
+        color = (100, 255, 100) if p95 < 16.7 else ((255, 255, 0) if p50 < 16.7 else (255, 100, 100))
+        row = cache.text(font, f"{name[:14]:<14}{p50:8.2f}{p95:8.2f}{p99:8.2f}", color)
+        surface.blit(row, (x + 10, y + 8 + line_h * (i + 1)))
+    return rect
@@ -0,0 +1,6 @@
+# tests/conftest.py
+"""Las pruebas importan ``src.*`` desde la raiz del repositorio."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,41 @@
+# tests/test_batch_score.py
+"""El modo en lote de ``batch_score`` puntua igual que reproducir la sesion
+con ``Simulation`` (``--exact``), tambien en muestras sobre un borde, y
+coloca las piezas igual que la partida."""
+import pytest
+
+from src.batch_score import scene_pieces, score_session
+from src.benchmarks import synthetic_recording
+from src.glyph_atlas import default_atlas
+from src.query_engine import np
+
+
+@pytest.mark.skipif(np is None, reason="el modo en lote necesita NumPy")
+@pytest.mark.parametrize("coverage", [None, 0.0])
+@pytest.mark.parametrize("text, ticks", [("hola mundo", 300), ("hola mundo", 600), ("ESCRIBIR CONVEXO", 600)])
+def test_vectorized_matches_exact(tmp_path, text, ticks, coverage):
+    path = synthetic_recording(str(tmp_path / "session.cgs"), text=text, ticks=ticks)
+    atlas = default_atlas()
+    vectorized = score_session(path, False, coverage, atlas)
+    exact = score_session(path, True, coverage, atlas)
+    assert vectorized["method"] == "vectorized" and exact["method"] == "exact"
+    for key in ("ticks", "progress", "precision", "completed"):
+        assert vectorized[key] == exact[key], key
+
+
+@pytest.mark.parametrize("scale", [80, 60, 37.5])
+def test_scene_pieces_match_the_placed_pieces(scale):
+    from src.game_entities import WordGoal
+    from src.shared_pool import SharedGlyphPool
+
+    atlas = default_atlas()
+    with SharedGlyphPool.publish(atlas, chars="holamundo") as pool:
+        for source in (atlas, pool):
+            goal = WordGoal("hola mundo", 300, 1280, scale, background_build=False, atlas=source)
+            # Tambien tras mover y reescalar una letra, como en un relayout
+            goal.polygons[1].place(goal.polygons[1].x + 3.25, goal.polygons[1].y - 1.5, scale * 0.75)
+            placed = []
+            for letter in goal.polygons:
+                letter.build()
+                placed.extend([tuple(v) for v in pixel.vertices] for pixel in letter.pixels)
+            assert [[tuple(v) for v in piece] for piece in scene_pieces(goal, source)] == placed
@@ -0,0 +1,93 @@
+# tests/test_coverage.py
+"""La rejilla de cobertura (``CoverageRaster``, mascara de bits) y su version
+en lote (``paint_mask``, la de ``src.batch_score``) pintan las mismas celdas,
+y una pieza se completa justo al llegar al umbral."""
+import random
+
+import pytest
+
+from src.coverage import CoverageRaster, CoverageRule, cell_centers, paint_mask
+from src.dk_hierarchy import Affine
+from src.game_entities import PixelGoal
+
+np = pytest.importorskip("numpy")
+
+SQUARE = [(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 4.0)]
+
+
+def _painted(raster):
+    return [bool(raster.painted >> index & 1) for index in range(len(raster.centers))]
+
+
+def _batch(vertices, resolution, points, radius):
+    centers = np.asarray(cell_centers(vertices, resolution), dtype=float)
+    points = points * 2 if len(points) == 1 else points
+    segments = np.asarray(list(zip(points, points[1:])), dtype=float)
+    return list(paint_mask(centers, segments[:, 0], segments[:, 1], radius))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_raster_and_paint_mask_agree_on_random_strokes(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        cx, cy, size = rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(1, 20)
+        count = rng.randint(3, 8)
+        vertices = [(cx + size * np.cos(2 * np.pi * i / count), cy + size * np.sin(2 * np.pi * i / count))
+                    for i in range(count)]
+        vertices = [(float(x), float(y)) for x, y in vertices]
+        resolution = rng.randint(1, 6)
+        points = [(rng.uniform(cx - 2 * size, cx + 2 * size), rng.uniform(cy - 2 * size, cy + 2 * size))
+                  for _ in range(rng.randint(1, 5))]
+        radius = rng.uniform(0, size)
+        raster = CoverageRaster(vertices, resolution)
+        fraction = raster.paint(points, radius)
+        painted = _painted(raster)
+        assert painted == _batch(vertices, resolution, points, radius)
+        assert fraction == sum(painted) / len(painted)
+
+
+@pytest.mark.parametrize("radius, rows", [(2.0, 1), (1.999, 0), (3.0, 2), (0.0, 0)])
+def test_brush_radius_is_inclusive(radius, rows):
+    # Centros en 0.5, 1.5, 2.5, 3.5: el trazo en y = -1.5 queda a 2.0 exactos de la primera fila
+    points = [(0.0, -1.5), (4.0, -1.5)]
+    raster = CoverageRaster(SQUARE, 4)
+    raster.paint(points, radius)
+    painted = _painted(raster)
+    assert sum(painted) == 4 * rows
+    assert painted == _batch(SQUARE, 4, points, radius)
+
+
+def test_single_point_paints_a_disc():
+    raster = CoverageRaster(SQUARE, 4)
+    raster.paint([(1.5, 1.5)], 1.0)
+    # El centro del pincel y sus cuatro vecinos a distancia 1
+    assert sum(_painted(raster)) == 5
+    assert _painted(raster) == _batch(SQUARE, 4, [(1.5, 1.5)], 1.0)
+
+
+@pytest.mark.parametrize("threshold, rows_to_complete", [(0.5, 2), (0.75, 3), (1.0, 4), (0.25, 1)])
+def test_piece_completes_exactly_at_threshold(threshold, rows_to_complete):
+    rule = CoverageRule(threshold, 4, brush_radius=0.5)
+    pixel = PixelGoal(SQUARE, coverage=rule)
+    for row in range(4):
+        y = row + 0.5
+        # Cada pasada pinta una fila de 4 celdas (los vecinos quedan a 1.0 > 0.5)
+        completed = pixel.update_polyline([(0.0, y), (4.0, y)], True)
+        assert completed == (row + 1 == rows_to_complete), row
+        if completed: break
+    assert pixel.completed
+
+
+def test_placed_piece_paints_in_local_cells():
+    # Pieza unidad colocada a escala 80: el pincel del mundo se divide por la escala
+    unit = [(x / 4, y / 4) for x, y in SQUARE]
+    rule = CoverageRule(0.5, 4, brush_radius=0.5 * 20)
+    pixel = PixelGoal(unit, coverage=rule, transform=Affine.placement(80, (100, 200)))
+    assert not pixel.update_polyline([(100.0, 210.0), (180.0, 210.0)], True)
+    assert pixel.update_polyline([(100.0, 230.0), (180.0, 230.0)], True)
+
+
+def test_without_rule_a_touch_completes():
+    pixel = PixelGoal(SQUARE)
+    assert not pixel.update_polyline([(5.0, 5.0), (6.0, 6.0)], True)
+    assert pixel.update_polyline([(4.0, 4.0), (6.0, 6.0)], True)
@@ -0,0 +1,89 @@
+# tests/test_dynamic_hierarchy.py
+"""``DynamicPolygonHierarchy`` tras secuencias de borrados, inserciones y
+movimientos: cada respuesta coincide con ``segment_hits_convex`` sobre el
+poligono actual (fuerza bruta), con coordenadas aleatorias y enteras."""
+import math
+import random
+
+import pytest
+
+from src.dk_hierarchy import Affine, hierarchy_from_convex_polygon
+from src.dynamic_hierarchy import DynamicPolygonHierarchy
+from src.geometry import segment_hits_convex
+
+RADIUS = 1000
+
+
+def _point(angle, integer):
+    x, y = RADIUS * math.cos(angle), RADIUS * math.sin(angle)
+    return (round(x), round(y)) if integer else (x, y)
+
+
+def _segments(rng, polygon, integer, count=150):
+    coordinate = (lambda: rng.randint(-RADIUS - 50, RADIUS + 50)) if integer else (lambda: rng.uniform(-RADIUS - 50, RADIUS + 50))
+    segments = [((coordinate(), coordinate()), (coordinate(), coordinate())) for _ in range(count)]
+    # Contactos con el borde: desde un vertice hacia fuera, a lo largo de una arista y puntos sueltos
+    for _ in range(count // 3):
+        i = rng.randrange(len(polygon))
+        a, b = polygon[i], polygon[(i + 1) % len(polygon)]
+        segments.append((a, (a[0] * 2, a[1] * 2)))
+        segments.append(((2 * a[0] - b[0], 2 * a[1] - b[1]), a))
+        segments.append((a, a))
+    return segments
+
+
+def _check(hierarchy, rng, integer):
+    polygon = list(hierarchy.polygon)
+    for start, end in _segments(rng, polygon, integer):
+        assert hierarchy.intersects_segment(start, end) == segment_hits_convex(start, end, polygon), (start, end)
+
+
+def _edit(hierarchy, angles, rng, integer):
+    """Un borrado, una insercion o un movimiento al azar; ``angles`` sigue al poligono."""
+    n = len(angles)
+    kind = rng.choice(("delete", "insert", "move")) if n > 6 else "insert"
+    i = rng.randrange(n)
+    if kind == "delete":
+        hierarchy.delete_vertex(i)
+        del angles[i]
+        return
+    previous = angles[i - 1] if i else angles[-1] - 2 * math.pi
+    following = angles[i + 1] if kind == "move" and i + 1 < n else (angles[i] if kind == "insert" else angles[0] + 2 * math.pi)
+    angle = rng.uniform(previous, following) if not integer else (previous + following) / 2
+    try:
+        if kind == "insert":
+            hierarchy.insert_vertex(i, _point(angle, integer))
+            angles.insert(i, angle)
+        else:
+            hierarchy.move_vertex(i, _point(angle, integer))
+            angles[i] = angle
+    except ValueError:
+        # Redondear a enteros puede dejar el vertice sin convexidad estricta: el poligono no cambia
+        pass
+
+
+@pytest.mark.parametrize("integer", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_edits_match_brute_force(seed, integer):
+    rng = random.Random(seed)
+    angles = sorted(rng.uniform(0, 2 * math.pi) for _ in range(24))
+    angles = [a for k, a in enumerate(angles) if k == 0 or a - angles[k - 1] > 0.05]
+    hierarchy = DynamicPolygonHierarchy([_point(a, integer) for a in angles])
+    for _ in range(40):
+        _edit(hierarchy, angles, rng, integer)
+        assert list(hierarchy.polygon) == [tuple(map(float, _point(a, integer))) for a in angles]
+        _check(hierarchy, rng, integer)
+    assert hierarchy.repairs > 0
+
+
+def test_edits_do_not_leak_into_shared_copies():
+    rng = random.Random(5)
+    polygon = [_point(2 * math.pi * k / 16, True) for k in range(16)]
+    hierarchy = DynamicPolygonHierarchy.adopt(hierarchy_from_convex_polygon(polygon), polygon)
+    placed = hierarchy.with_transform(Affine.placement(0.5, (100, 100)))
+    hierarchy.delete_vertex(3)
+    hierarchy.delete_vertex(7)
+    _check(hierarchy, rng, True)
+    world = [(100 + x * 0.5, 100 + y * 0.5) for x, y in polygon]
+    for start, end in _segments(rng, world, False):
+        assert placed.intersects_segment(start, end) == segment_hits_convex(start, end, world), (start, end)
@@ -0,0 +1,126 @@
+# tests/test_font_glyphs.py
+"""Piezas convexas de glifos TrueType reales: cada pieza es convexa, no se
+solapan y juntas cubren justo el relleno del contorno (par-impar, con
+agujeros).
+
+El repositorio no trae ninguna fuente: se usa la que incluye pygame (la
+dependencia del juego), localizada sin importar pygame."""
+import importlib.util
+import os
+import random
+
+import pytest
+
+from src.convex_decomposition import clean_contour, decompose_contours, is_convex, signed_area
+from src.font_glyphs import FontGlyphSource
+from src.geometry import is_point_in_polygon
+
+# Con agujeros ("ABOe8%"), curvas ("Sg") y compuestos ("Á" = "A" + acento)
+GLYPHS = "ABOS8eg%Á"
+
+
+def _bundled_font():
+    spec = importlib.util.find_spec("pygame")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(spec.submodule_search_locations[0], "freesansbold.ttf")
+    return path if os.path.exists(path) else None
+
+
+FONT = _bundled_font()
+pytestmark = pytest.mark.skipif(FONT is None, reason="sin fuente TrueType (la de pygame)")
+
+
+@pytest.fixture(scope="module")
+def source():
+    return FontGlyphSource(FONT)
+
+
+def _clip(subject, clipper):
+    """Sutherland-Hodgman: ``subject`` recortado por el convexo ``clipper`` (ambos CCW)."""
+    output = list(subject)
+    for i in range(len(clipper)):
+        (ax, ay), (bx, by) = clipper[i - 1], clipper[i]
+        side = lambda p: (bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax)
+        points, output = output, []
+        for j in range(len(points)):
+            p, q = points[j - 1], points[j]
+            sp, sq = side(p), side(q)
+            if sq >= 0:
+                if sp < 0: output.append(_lerp(p, q, sp / (sp - sq)))
+                output.append(q)
+            elif sp >= 0:
+                output.append(_lerp(p, q, sp / (sp - sq)))
+        if not output: return []
+    return output
+
+
+def _lerp(p, q, t):
+    return (p[0] + (q[0] - p[0]) * t, p[1] + (q[1] - p[1]) * t)
+
+
+def _fill_area(contours):
+    contours = [c for c in (clean_contour(c) for c in contours) if len(c) >= 3]
+    area = 0.0
+    for i, contour in enumerate(contours):
+        depth = sum(1 for j, other in enumerate(contours) if j != i and is_point_in_polygon(contour[0], other))
+        area += abs(signed_area(contour)) * (-1 if depth % 2 else 1)
+    return area
+
+
+def _distance_to_edges(point, contours):
+    best = float("inf")
+    for contour in contours:
+        for i in range(len(contour)):
+            (ax, ay), (bx, by) = contour[i - 1], contour[i]
+            ex, ey = bx - ax, by - ay
+            t = max(0.0, min(1.0, ((point[0] - ax) * ex + (point[1] - ay) * ey) / ((ex * ex + ey * ey) or 1.0)))
+            best = min(best, ((point[0] - ax - t * ex) ** 2 + (point[1] - ay - t * ey) ** 2) ** 0.5)
+    return best
+
+
+def test_font_has_the_glyphs_and_reads_composites(source):
+    assert all(source.has_glyph(char) for char in GLYPHS)
+    # "Á" es compuesto: los contornos de "A" mas el del acento
+    assert len(source.contours("Á")) == len(source.contours("A")) + 1
+    assert source.contours("Á")[:2] == source.contours("A")
+
+
+@pytest.mark.parametrize("char", GLYPHS)
+def test_pieces_are_convex(source, char):
+    pieces = source.polygons(char)
+    assert pieces
+    assert all(is_convex(piece) for piece in pieces)
+
+
+@pytest.mark.parametrize("char", GLYPHS)
+def test_pieces_do_not_overlap(source, char):
+    pieces = source.polygons(char)
+    for i in range(len(pieces)):
+        for other in pieces[i + 1:]:
+            shared = _clip(pieces[i], other)
+            assert len(shared) < 3 or abs(signed_area(shared)) < 1e-9
+
+
+@pytest.mark.parametrize("char", GLYPHS)
+def test_union_matches_the_outline_fill(source, char):
+    contours = source.contours(char)
+    pieces = source.polygons(char)
+    assert sum(signed_area(piece) for piece in pieces) == pytest.approx(_fill_area(contours), rel=1e-9, abs=1e-12)
+    # Puntos lejos de los bordes: dentro del relleno (par-impar) <=> dentro de alguna pieza
+    rng = random.Random(char)
+    xs = [x for contour in contours for x, _ in contour]
+    ys = [y for contour in contours for _, y in contour]
+    checked = 0
+    while checked < 300:
+        point = (rng.uniform(min(xs), max(xs)), rng.uniform(min(ys), max(ys)))
+        if _distance_to_edges(point, contours) < 1e-6: continue
+        filled = sum(is_point_in_polygon(point, contour) for contour in contours) % 2 == 1
+        assert filled == any(is_point_in_polygon(point, piece) for piece in pieces), point
+        checked += 1
+
+
+def test_decompose_contours_ignores_contour_order(source):
+    contours = source.contours("8")
+    pieces = decompose_contours(list(reversed(contours)))
+    assert sum(signed_area(piece) for piece in pieces) == pytest.approx(_fill_area(contours))
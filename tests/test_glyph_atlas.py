@@ -0,0 +1,57 @@
+# tests/test_glyph_atlas.py
+"""Ida y vuelta del atlas: las piezas que ``GlyphAtlas`` decodifica bajo
+demanda de un fichero ``CGDKATL2`` son las mismas que construir el glifo
+desde cero (contorno, niveles de la jerarquia DK y respuestas)."""
+import random
+
+import pytest
+
+from src.glyph_atlas import MAGIC, BlockGlyphSource, GlyphAtlas, build_pieces, write_atlas
+
+CHARS = "AHOR8"
+
+
+def _sources():
+    yield pytest.param(BlockGlyphSource(), id="blocks")
+    from test_font_glyphs import FONT
+
+    if FONT is not None:
+        from src.font_glyphs import FontGlyphSource
+
+        yield pytest.param(FontGlyphSource(FONT, charset=CHARS + "g%"), id="font")
+
+
+def _levels(hierarchy):
+    return [(level.mesh.vertices, level.mesh.faces, level.parents) for level in hierarchy.levels]
+
+
+@pytest.mark.parametrize("source", list(_sources()))
+def test_decoded_glyphs_match_fresh_build(tmp_path, source):
+    path = str(tmp_path / "atlas.bin")
+    write_atlas(path, source)
+    with open(path, "rb") as handle:
+        assert handle.read(len(MAGIC)) == MAGIC
+    atlas = GlyphAtlas(path, source)
+    rng = random.Random(0)
+    for char in source.charset():
+        decoded = atlas.unit_glyph(char)
+        fresh = build_pieces(source.polygons(char))
+        assert len(decoded) == len(fresh) == atlas.piece_count(char)
+        for read, built in zip(decoded, fresh):
+            assert read.vertices == built.vertices
+            assert _levels(read.hierarchy) == _levels(built.hierarchy)
+            assert read.hierarchy.inside_faces == built.hierarchy.inside_faces
+            for _ in range(50):
+                start = (rng.uniform(-0.2, 1.2), rng.uniform(-0.2, 1.2))
+                end = (rng.uniform(-0.2, 1.2), rng.uniform(-0.2, 1.2))
+                assert read.hierarchy.intersects_segment(start, end) == built.hierarchy.intersects_segment(start, end)
+
+
+def test_glyphs_are_decoded_on_first_use(tmp_path):
+    path = str(tmp_path / "atlas.bin")
+    write_atlas(path)
+    atlas = GlyphAtlas(path)
+    assert "A" in atlas and not atlas._unit
+    pieces = atlas.unit_glyph("A")
+    assert list(atlas._unit) == ["A"]
+    assert atlas.unit_glyph("A") is pieces
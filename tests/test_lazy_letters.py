@@ -0,0 +1,41 @@
+# tests/test_lazy_letters.py
+"""Las letras se construyen al pedirlas: ``get_closest_pixel`` da la misma
+pieza que recorrer toda la escena construida, aunque el puntero este lejos de
+cualquier letra o las letras no esten construidas (o se hayan liberado)."""
+import random
+
+import pytest
+
+from src.document import DocumentGoal
+from src.game_entities import WordGoal, get_closest_pixel
+
+
+def _word():
+    return WordGoal("HOLA MUNDO ESCRIBIR", 300, 1280, 50, background_build=False)
+
+
+def _document():
+    return DocumentGoal("HOLA MUNDO ESCRIBIR CONVEXO PALABRA " * 3, 100, 1280, 720, 50, background_build=False)
+
+
+def _centroid(pixel):
+    xs = [v[0] for v in pixel.vertices]
+    ys = [v[1] for v in pixel.vertices]
+    return sum(xs) / len(xs), sum(ys) / len(ys)
+
+
+@pytest.mark.parametrize("make", [_word, _document])
+def test_closest_pixel_matches_full_scan(make):
+    goal, full = make(), make()
+    pixels = []
+    for letter in full.polygons:
+        letter.build()
+        pixels.extend(letter.pixels)
+    rng = random.Random(0)
+    for i in range(60):
+        pos = (rng.uniform(-800, full.total_width + 800), rng.uniform(-400, 1200))
+        expected = min(pixels, key=lambda p: (_centroid(p)[0] - pos[0]) ** 2 + (_centroid(p)[1] - pos[1]) ** 2)
+        closest = get_closest_pixel(goal, pos)
+        assert closest is not None and closest.vertices == expected.vertices, pos
+        if i % 10 == 0:
+            for letter in goal.polygons: letter.release()
@@ -0,0 +1,62 @@
+# tests/test_placement.py
+"""Las piezas colocadas con ``Affine`` responden como su poligono en el mundo:
+un trazo entero que solo toca la arista derecha o inferior de una pieza a
+escala 80 o 60 es un acierto (antes el trazo se llevaba a coordenadas locales
+y el redondeo lo sacaba del borde)."""
+import random
+
+import pytest
+
+from src.game_entities import WordGoal
+from src.geometry import segment_hits_convex
+from src.query_engine import ENGINES, np, set_forced_engine
+
+AVAILABLE = [engine for engine in ENGINES if engine != "numpy" or np is not None]
+
+
+def _strokes(rng, pixels, count):
+    """Trazos de 1 a 3 puntos enteros alrededor de piezas al azar."""
+    for _ in range(count):
+        pixel = rng.choice(pixels)
+        xs = [x for x, _ in pixel.vertices]
+        ys = [y for _, y in pixel.vertices]
+        yield pixel, [(rng.randint(int(min(xs)) - 2, int(max(xs)) + 2), rng.randint(int(min(ys)) - 2, int(max(ys)) + 2))
+                      for _ in range(rng.randint(1, 3))]
+
+
+def _expected(pixel, points):
+    points = points * 2 if len(points) == 1 else points
+    return any(segment_hits_convex(a, b, pixel.vertices) for a, b in zip(points, points[1:]))
+
+
+def _built_pixels(goal):
+    pixels = []
+    for letter in goal.polygons:
+        letter.build()
+        pixels.extend(letter.pixels)
+    return pixels
+
+
+@pytest.mark.parametrize("engine", AVAILABLE)
+@pytest.mark.parametrize("scale", [80, 60])
+def test_placed_pieces_match_world_polygon(engine, scale):
+    set_forced_engine(engine)
+    try:
+        goal = WordGoal("HOLA MUNDO", 300, 1280, scale, background_build=False)
+        pixels = _built_pixels(goal)
+    finally:
+        set_forced_engine(None)
+    rng = random.Random(scale)
+    wrong = [(points, pixel.vertices) for pixel, points in _strokes(rng, pixels, 4000)
+             if pixel.hierarchy.intersects_polyline(points) != _expected(pixel, points)]
+    assert wrong == []
+
+
+def test_moved_pieces_match_world_polygon():
+    goal = WordGoal("HOLA MUNDO", 300, 1280, 50, background_build=False)
+    pixels = _built_pixels(goal)
+    goal.relayout(140, 1000, 80)
+    rng = random.Random(1)
+    for pixel, points in _strokes(rng, pixels, 2000):
+        segment = [points[0], points[-1]]
+        assert pixel.check_collision(*segment) == _expected(pixel, segment), segment
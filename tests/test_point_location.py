@@ -0,0 +1,114 @@
+# tests/test_point_location.py
+"""``PointLocator`` contra fuerza bruta sobre todas las piezas, con puntos
+aleatorios y puntos enteros (que caen en aristas y vertices compartidos), y
+``WordGoal.piece_at`` con y sin localizador."""
+import math
+import random
+
+import pytest
+
+from src import game_entities
+from src.document import DocumentGoal
+from src.game_entities import LOCATOR_MIN_PIECES, VALID_AREA_OFFSET, WordGoal
+from src.geometry import polygon_bounds, segment_hits_convex
+from src.point_location import OUTSIDE, PointLocator
+
+
+def _contains(polygon, point):
+    """Poligono cerrado: el borde cuenta."""
+    return segment_hits_convex(point, point, polygon)
+
+
+def _check(regions, points):
+    locator = PointLocator.from_regions(regions)
+    for point in points:
+        # Regiones cerradas: la de menor etiqueta que contiene el punto, tambien en bordes y vertices
+        expected = min((label for label, polygon in regions if _contains(polygon, point)), default=OUTSIDE)
+        assert locator.locate(point) == expected, point
+
+
+def _grid_regions(rng, size):
+    """Celdas enteras de 10 x 10: cuadrados, mitades triangulares o vacias (aristas compartidas)."""
+    regions = []
+    for i in range(size):
+        for j in range(size):
+            x, y = i * 10, j * 10
+            kind = rng.choice(("square", "halves", "triangle", "empty"))
+            if kind == "square":
+                regions.append([(x, y), (x + 10, y), (x + 10, y + 10), (x, y + 10)])
+            elif kind == "halves":
+                regions.append([(x, y), (x + 10, y), (x + 10, y + 10)])
+                regions.append([(x, y), (x + 10, y + 10), (x, y + 10)])
+            elif kind == "triangle":
+                regions.append([(x + 2, y + 1), (x + 9, y + 3), (x + 4, y + 8)])
+    return list(enumerate(regions))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_grid_regions_random_and_integer_points(seed):
+    rng = random.Random(seed)
+    regions = _grid_regions(rng, 8)
+    points = [(rng.uniform(-5, 85), rng.uniform(-5, 85)) for _ in range(1500)]
+    points += [(rng.randint(-2, 82), rng.randint(-2, 82)) for _ in range(1500)]
+    _check(regions, points)
+
+
+def test_glyph_pieces_match_brute_force():
+    goal = WordGoal("HOLA MUNDO", 300, 1280, 80, background_build=False)
+    regions = []
+    for letter in goal.polygons:
+        placement = letter.placement()
+        for index, piece in enumerate(letter.atlas.unit_glyph(letter.char)):
+            regions.append((letter.first_piece + index, [placement.apply(v) for v in piece.vertices]))
+    rng = random.Random(3)
+    xs = [x for _, polygon in regions for x, _ in polygon]
+    ys = [y for _, polygon in regions for _, y in polygon]
+    x0, x1, y0, y1 = int(min(xs)) - 5, int(max(xs)) + 5, int(min(ys)) - 5, int(max(ys)) + 5
+    points = [(rng.uniform(x0, x1), rng.uniform(y0, y1)) for _ in range(1500)]
+    points += [(rng.randint(x0, x1), rng.randint(y0, y1)) for _ in range(1500)]
+    # Vertices de las piezas: los puntos mas dificiles
+    points += [vertex for _, polygon in regions[::3] for vertex in polygon]
+    _check(regions, points)
+
+
+@pytest.mark.parametrize("size", [4, 12, 20])
+def test_locator_height_is_logarithmic(size):
+    locator = PointLocator.from_regions(_grid_regions(random.Random(4), size))
+    faces = len(locator.levels[0].mesh.faces)
+    assert 1 < locator.height() <= 4 * math.log2(faces)
+
+
+def _expected_piece(polygons, boxes, p1):
+    """Regla de ``WordGoal.piece_at`` por fuerza bruta sobre todas las piezas."""
+    p2 = (p1[0] + VALID_AREA_OFFSET, p1[1] + VALID_AREA_OFFSET)
+    near = [piece for piece, box in enumerate(boxes)
+            if box[0] <= p2[0] and box[2] >= p1[0] and box[1] <= p2[1] and box[3] >= p1[1]]
+    inside = [piece for piece in near if _contains(polygons[piece], p1)]
+    if inside:
+        return min(inside)
+    return min((piece for piece in near if segment_hits_convex(p1, p2, polygons[piece])), default=-1)
+
+
+def test_piece_at_follows_the_closed_rule_with_and_without_locator(monkeypatch):
+    goal = DocumentGoal("HOLA MUNDO ESCRIBIR CONVEXO PALABRA " * 14, 100, 1280, 720, 50, background_build=False)
+    assert goal.total_pieces >= LOCATOR_MIN_PIECES
+    polygons = []
+    for letter in goal.polygons:
+        placement = letter.placement()
+        polygons.extend([placement.apply(v) for v in piece.vertices] for piece in letter.atlas.unit_glyph(letter.char))
+    boxes = [polygon_bounds(polygon) for polygon in polygons]
+    rng = random.Random(5)
+    probes = []
+    for _ in range(1500):
+        x0, y0, x1, y1 = boxes[rng.randrange(len(boxes))]
+        probes.append((rng.randint(int(x0) - 1, int(x1) + 1), rng.randint(int(y0) - 1, int(y1) + 1)))
+    # Vertices de las piezas y puntos a una decima de ellos (el segmento solo roza la pieza)
+    for polygon in polygons[::40]:
+        for x, y in polygon:
+            probes += [(x, y), (x - VALID_AREA_OFFSET, y - VALID_AREA_OFFSET)]
+    expected = [_expected_piece(polygons, boxes, p) for p in probes]
+    assert goal.scene_locator() is not None
+    assert [goal.piece_at(p) for p in probes] == expected
+    monkeypatch.setattr(game_entities, "LOCATOR_MIN_PIECES", goal.total_pieces + 1)
+    assert goal.scene_locator() is None
+    assert [goal.piece_at(p) for p in probes] == expected
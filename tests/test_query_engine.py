@@ -0,0 +1,89 @@
+# tests/test_query_engine.py
+"""Todos los motores de colision aplican la misma regla de borde (el poligono
+es cerrado), tambien con trazos enteros que tocan aristas y vertices."""
+import random
+
+import pytest
+
+from src.dk_hierarchy import Affine, hierarchy_from_convex_polygon
+from src.game_entities import WordGoal
+from src.geometry import segment_hits_convex
+from src.query_engine import ENGINES, np, make_query, set_forced_engine
+from src.session import SessionRecorder, build_goal, goal_layout, read_session
+
+AVAILABLE = [engine for engine in ENGINES if engine != "numpy" or np is not None]
+SQUARE = [(0, 0), (16, 0), (16, 16), (0, 16)]
+
+
+def _queries(polygon, hierarchy=None, transform=None):
+    hierarchy = hierarchy or hierarchy_from_convex_polygon(polygon)
+    return {engine: make_query(engine, polygon, hierarchy).with_transform(transform) for engine in AVAILABLE}
+
+
+@pytest.mark.parametrize("points, expected", [
+    ([(16, 4), (20, 4)], True),      # empieza en una arista
+    ([(20, 16), (16, 20)], False),   # pasa junto a la esquina sin tocarla
+    ([(18, 16), (16, 18)], False),
+    ([(20, 12), (12, 20)], True),    # corta la esquina
+    ([(16, 16), (20, 20)], True),    # empieza en un vertice
+    ([(-4, 0), (20, 0)], True),      # recorre una arista
+    ([(-4, -1), (20, -1)], False),
+    ([(8, 8)], True),                # un solo punto dentro
+    ([(16, 8)], True),               # un solo punto en el borde
+    ([(17, 8)], False),
+    ([(24, -8), (16, 0)], True),     # llega a un vertice
+    ([(20, 0), (24, 4), (16, 8)], True),
+])
+def test_engines_agree_on_boundary_contact(points, expected):
+    # Escalas del juego: el cuadrado local (x / escala) cae en el mundo sobre los enteros de SQUARE
+    for scale in (1, 80, 60):
+        unit = [(x / scale, y / scale) for x, y in SQUARE]
+        for offset in ((0, 0), (32, 48), (-112, 7)):
+            transform = Affine.placement(scale, offset) if (scale, offset) != (1, (0, 0)) else None
+            moved = [(x + offset[0], y + offset[1]) for x, y in points]
+            if transform is not None:
+                assert [transform.apply(v) for v in unit] == [(x + offset[0], y + offset[1]) for x, y in SQUARE]
+            for engine, query in _queries(unit, transform=transform).items():
+                assert query.intersects_polyline(moved) == expected, (engine, scale, offset)
+
+
+@pytest.mark.parametrize("scale", [80, 60])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_engines_agree_on_integer_strokes_against_glyph_pieces(seed, scale):
+    rng = random.Random(seed)
+    goal = WordGoal("HOLA MUNDO", 300, 1280, scale, background_build=False)
+    pieces = []
+    for letter in goal.polygons:
+        letter.build()
+        for pixel, piece in zip(letter.pixels, letter.atlas.unit_glyph(letter.char)):
+            pieces.append((pixel, _queries(piece.vertices, piece.hierarchy, letter.placement())))
+    disagreements = []
+    for _ in range(3000):
+        pixel, queries = rng.choice(pieces)
+        xs = [x for x, _ in pixel.vertices]
+        ys = [y for _, y in pixel.vertices]
+        points = [(rng.randint(int(min(xs)) - 3, int(max(xs)) + 3), rng.randint(int(min(ys)) - 3, int(max(ys)) + 3))
+                  for _ in range(rng.randint(1, 3))]
+        # Referencia: la regla de ``geometry`` sobre el poligono de la pieza en el mundo
+        segments = points * (2 if len(points) == 1 else 1)
+        expected = any(segment_hits_convex(a, b, pixel.vertices) for a, b in zip(segments, segments[1:]))
+        answers = {engine: query.intersects_polyline(points) for engine, query in queries.items()}
+        if any(answer != expected for answer in answers.values()):
+            disagreements.append((points, expected, answers))
+    assert disagreements == []
+
+
+def test_session_records_engine_model(tmp_path):
+    set_forced_engine("dk")
+    try:
+        header = goal_layout("HOLA", 800, 600)
+    finally:
+        set_forced_engine(None)
+    assert header.engine_costs == (("dk", 0.0, 0.0),)
+    path = str(tmp_path / "session.cgs")
+    SessionRecorder(path, header).close(last_tick=1)
+    replayed, _ = read_session(path)
+    assert replayed == header
+    goal = build_goal(replayed, background_build=False)
+    goal.polygons[0].build()
+    assert {pixel.engine for pixel in goal.polygons[0].pixels} == {"dk"}
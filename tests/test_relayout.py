@@ -0,0 +1,61 @@
+# tests/test_relayout.py
+"""``relayout`` deja la escena igual que montarla de nuevo con el layout nuevo,
+sin perder el progreso."""
+import pytest
+
+from src.document import DocumentGoal
+from src.game_entities import WordGoal
+
+TEXT = "HOLA MUNDO ESCRIBIR CONVEXO PALABRA " * 4
+
+
+def _word(start_y, screen_width, scale):
+    return WordGoal("HOLA MUNDO", start_y, screen_width, scale, background_build=False)
+
+
+def _document(start_y, screen_width, scale):
+    return DocumentGoal(TEXT, start_y, screen_width, 720, scale, background_build=False)
+
+
+def _piece_vertices(goal):
+    vertices = []
+    for letter in goal.polygons:
+        letter.build()
+        vertices.extend(pixel.vertices for pixel in letter.pixels)
+    return vertices
+
+
+@pytest.mark.parametrize("make", [_word, _document])
+def test_relayout_matches_fresh_layout(make):
+    goal = make(300, 1280, 50)
+    goal.set_view(0, 1280)
+    built = [letter for letter in goal.polygons if letter.is_built]
+    for pixel in built[0].pixels[:2]:
+        pixel.completed = True
+    progress = goal.get_progress()
+
+    goal.relayout(120, 900, 40)
+    fresh = make(120, 900, 40)
+    assert [(l.x, l.y, l.scale) for l in goal.polygons] == [(l.x, l.y, l.scale) for l in fresh.polygons]
+    assert goal.total_width == fresh.total_width
+    assert goal.get_progress() == pytest.approx(progress)
+    for moved, expected in zip(_piece_vertices(goal), _piece_vertices(fresh)):
+        assert moved == pytest.approx(expected)
+
+    # Las consultas usan el layout nuevo
+    letter = fresh.polygons[len(fresh.polygons) // 2]
+    xs = [v[0] for v in letter.pixels[0].vertices]
+    ys = [v[1] for v in letter.pixels[0].vertices]
+    center = (sum(xs) / len(xs), sum(ys) / len(ys))
+    assert goal.piece_at(center) == fresh.piece_at(center) == letter.first_piece
+
+
+def test_document_relayout_rechunks_and_respects_budget():
+    goal = DocumentGoal(TEXT, 100, 1280, 720, 50, background_build=False, memory_budget=50)
+    goal.set_view(0, 1280)
+    goal.relayout(100, 640, 50, screen_height=400)
+    assert sum(len(chunk.letters) for chunk in goal.chunks) == len(goal.polygons)
+    assert goal.page_count > 1
+    assert goal.resident_pieces() <= goal.memory_budget
+    goal.set_view(0, 640)
+    assert goal.resident_pieces() > 0
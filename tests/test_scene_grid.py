@@ -0,0 +1,83 @@
+# tests/test_scene_grid.py
+"""``SceneGrid`` y ``WordGoal.pieces_hit_by_polyline`` contra fuerza bruta,
+con entradas aleatorias y alineadas con la rejilla (trazos que pasan justo
+por las esquinas de las celdas)."""
+import random
+
+import pytest
+
+from src.game_entities import WordGoal
+from src.geometry import segment_hits_convex
+from src.scene_grid import SceneGrid
+
+
+def _box_polygon(box):
+    x0, y0, x1, y1 = box
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def _touches_box(points, box):
+    points = list(points) * (2 if len(points) == 1 else 1)
+    return any(segment_hits_convex(a, b, _box_polygon(box)) for a, b in zip(points, points[1:]))
+
+
+def _random_boxes(rng, count, aligned):
+    boxes = []
+    for piece in range(count):
+        if aligned:
+            x, y = rng.randint(0, 20) * 10, rng.randint(0, 20) * 10
+            w, h = rng.randint(0, 2) * 10, rng.randint(0, 2) * 10
+        else:
+            x, y = rng.uniform(0, 200), rng.uniform(0, 200)
+            w, h = rng.uniform(0, 25), rng.uniform(0, 25)
+        boxes.append((piece, (x, y, x + w, y + h)))
+    return boxes
+
+
+def _random_polyline(rng, aligned):
+    if aligned:
+        # Multiplos de la celda: diagonales que cruzan esquinas y trazos sobre las lineas
+        return [(rng.randint(0, 22) * 10, rng.randint(0, 22) * 10) for _ in range(rng.randint(1, 3))]
+    return [(rng.uniform(-10, 210), rng.uniform(-10, 210)) for _ in range(rng.randint(1, 3))]
+
+
+@pytest.mark.parametrize("aligned", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_candidates_include_every_touched_box(seed, aligned):
+    rng = random.Random(seed)
+    boxes = _random_boxes(rng, 150, aligned)
+    grid = SceneGrid(boxes, cell_size=10)
+    for _ in range(1000):
+        points = _random_polyline(rng, aligned)
+        found = grid.candidates_along(points)
+        assert len(found) == len(set(found))
+        missing = [piece for piece, box in boxes if _touches_box(points, box) and piece not in found]
+        assert missing == [], points
+
+
+def test_corner_crossing_reaches_both_neighbours():
+    # La diagonal (0,0)-(20,20) pasa por la esquina (10,10); las cajas que solo
+    # tocan esa esquina estan en las celdas que el recorrido no cruza por dentro
+    boxes = [(0, (12, 2, 18, 10)), (1, (2, 10, 10, 18)), (2, (10, 10, 10, 10))]
+    grid = SceneGrid(boxes, cell_size=10)
+    assert sorted(grid.candidates_along([(0, 0), (20, 20)])) == [0, 1, 2]
+    assert sorted(grid.candidates_along([(20, 20), (0, 0)])) == [0, 1, 2]
+    assert sorted(grid.candidates_along([(20, 0), (0, 20)])) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_pieces_hit_by_polyline_matches_brute_force(seed):
+    rng = random.Random(seed)
+    goal = WordGoal("HOLA MUNDO", 300, 1280, 80, background_build=False)
+    pieces = []
+    for letter in goal.polygons:
+        letter.build()
+        pieces.extend((letter.first_piece + index, pixel) for index, pixel in enumerate(letter.pixels))
+    cell = goal.scene_grid().cell_size
+    for _ in range(400):
+        if rng.random() < 0.5:
+            points = [(rng.randint(0, 1280), rng.randint(200, 450)) for _ in range(rng.randint(1, 4))]
+        else:
+            points = [(rng.randint(0, 128) * cell, rng.randint(20, 45) * cell) for _ in range(rng.randint(1, 3))]
+        expected = [piece for piece, pixel in pieces if pixel.hierarchy.intersects_polyline(points)]
+        assert goal.pieces_hit_by_polyline(points) == expected, points
@@ -0,0 +1,118 @@
+# tests/test_service.py
+"""Mensajes mal formados contra un servidor real: cada uno recibe ``error`` y
+la conexion sigue sirviendo."""
+import asyncio
+import json
+
+import pytest
+
+from src.game_entities import LOCATOR_MIN_PIECES
+from src.glyph_atlas import default_atlas
+from src.service import StrokeService, StrokeSession, parse_points
+from src.session import goal_layout
+
+# Documento de mas de ``LOCATOR_MIN_PIECES`` piezas: montarlo tarda
+LONG_TEXT = "HOLA MUNDO ESCRIBIR CONVEXO PALABRA " * 14
+
+
+async def _exchange(lines):
+    service = StrokeService()
+    ready = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(service.serve("127.0.0.1", 0, ready=ready.set_result))
+    server = await ready
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    replies = []
+    try:
+        for line in lines:
+            writer.write(line.encode("utf-8") + b"\n")
+            await writer.drain()
+            replies.append(json.loads(await asyncio.wait_for(reader.readline(), 30)))
+    finally:
+        writer.close()
+        server.close()
+        task.cancel()
+    return replies
+
+
+def _run(lines):
+    return asyncio.run(_exchange(lines))
+
+
+@pytest.mark.parametrize("message", [
+    '[1, 2]',
+    '"start"',
+    '{"type": "input", "points": [[1]]}',
+    '{"type": "input", "points": [[1, "a"]]}',
+    '{"type": "input", "points": 5}',
+    '{"type": "input", "points": [[1, 2, 3]]}',
+    '{"type": "input", "points": [[true, 2]]}',
+    '{"type": "start", "text": "AB", "time_limit": "x"}',
+    '{"type": "start", "text": "AB", "time_limit": -1}',
+    '{"type": "start", "text": "AB", "screen_width": null}',
+    '{"type": "start", "text": "AB", "coverage": 2}',
+    '{"type": "start", "text": 5}',
+    '{"type": "bogus"}',
+    'no es json',
+])
+def test_invalid_message_replies_error_and_keeps_connection(message):
+    start = '{"type": "start", "text": "AB", "screen_width": 800, "screen_height": 600}'
+    replies = _run([start, message, '{"type": "input", "points": [[100, 300]], "clicking": true}', '{"type": "end"}'])
+    kinds = [reply["type"] for reply in replies]
+    assert kinds[1] == "error"
+    # Un 'start' invalido no sustituye a la sesion que ya estaba abierta
+    assert kinds[2:] == ["progress", "summary"]
+
+
+def test_parse_points():
+    assert parse_points([[1, 2], (3.5, -4)]) == [(1.0, 2.0), (3.5, -4.0)]
+    assert parse_points([]) == []
+    for bad in ([[1]], [[1, float("nan")]], [None], "xy", [[1, 2], [3]]):
+        with pytest.raises(ValueError):
+            parse_points(bad)
+
+
+async def _start_while_playing():
+    service = StrokeService()
+    ready = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(service.serve("127.0.0.1", 0, ready=ready.set_result))
+    server = await ready
+    port = server.sockets[0].getsockname()[1]
+    playing = await asyncio.open_connection("127.0.0.1", port)
+    loading = await asyncio.open_connection("127.0.0.1", port)
+    order = []
+
+    async def send(connection, name, message):
+        reader, writer = connection
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        await writer.drain()
+        reply = json.loads(await asyncio.wait_for(reader.readline(), 60))
+        order.append(name)
+        return reply
+
+    try:
+        await send(playing, "small", {"type": "start", "text": "AB", "screen_width": 800, "screen_height": 600})
+        big = asyncio.ensure_future(send(loading, "big", {"type": "start", "text": LONG_TEXT}))
+        # El documento largo se monta en otro hilo: la otra estacion sigue recibiendo respuestas
+        await asyncio.sleep(0.05)
+        for _ in range(3):
+            reply = await send(playing, "input", {"type": "input", "points": [[100, 300]], "clicking": True})
+            assert reply["type"] == "progress"
+        started = await big
+    finally:
+        for _, writer in (playing, loading):
+            writer.close()
+        server.close()
+        task.cancel()
+    return order, started
+
+
+def test_long_start_does_not_block_other_sessions():
+    order, started = asyncio.run(_start_while_playing())
+    assert started["type"] == "started" and started["pieces"] >= LOCATOR_MIN_PIECES
+    assert order == ["small", "input", "input", "input", "big"]
+
+
+def test_session_prebuilds_the_scene_locator():
+    session = StrokeSession(1, goal_layout(LONG_TEXT, 1280, 720), default_atlas())
+    assert session.goal._locator is not None